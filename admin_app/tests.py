@@ -1,3 +1,21 @@
 from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
 
-# Create your tests here.
+from admin_app.views import TranslationMetricsView
+from users_app.models import User
+from users_app.translation import translation_service
+
+
+class TranslationMetricsViewTests(TestCase):
+    def get(self, user):
+        request = APIRequestFactory().get('/api/admin/translation-metrics/')
+        force_authenticate(request, user=user)
+        return TranslationMetricsView.as_view()(request)
+
+    def test_admins_read_the_service_stats(self):
+        response = self.get(User.objects.create_superuser('admin@example.com', 'password'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, translation_service.stats())
+        self.assertIn('circuit_breaker', response.data)
+
+        self.assertEqual(self.get(User.objects.create_user('user@example.com', 'password')).status_code, 403)
@@ -1,11 +1,13 @@
 from food.urls import urlpatterns
 from django.urls import path,include
 
-from  admin_app.views import  AdminUserStatisticsView,AdminGetAllUsersView
+from  admin_app.views import  AdminUserStatisticsView,AdminGetAllUsersView,TranslationMetricsView,EmailMetricsView
 
 
 
 urlpatterns=[
     path("admin/dashboard",AdminUserStatisticsView.as_view(),name="admindashboard"),
     path('admin/users/', AdminGetAllUsersView.as_view(), name='admin_get_all_users'),
+    path('admin/translation-metrics/', TranslationMetricsView.as_view(), name='admin_translation_metrics'),
+    path('admin/email-metrics/', EmailMetricsView.as_view(), name='admin_email_metrics'),
 ]
\ No newline at end of file
@@ -6,6 +6,8 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from users_app.models import User
+from users_app.mail import email_sender
+from users_app.translation import translation_service
 from django.db.models import Q
 from rest_framework import status  # status import qilingan
 
@@ -89,4 +91,21 @@ class AdminGetAllUsersView(APIView):
             for user in users
         ]
 
-        return Response(users_data, status=status.HTTP_200_OK)  # status ishlatiladi
\ No newline at end of file
+        return Response(users_data, status=status.HTTP_200_OK)  # status ishlatiladi
+
+
+
+class TranslationMetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        # Kesh, xatolar va circuit breaker holati (joriy worker jarayoni uchun)
+        return Response(translation_service.stats(), status=status.HTTP_200_OK)
+
+
+class EmailMetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        # Navbat uzunligi, qayta urinishlar va yuborish tezligi (joriy worker jarayoni uchun)
+        return Response(email_sender.stats(), status=status.HTTP_200_OK)
@@ -1,9 +1,8 @@
 from rest_framework import serializers
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from users_app.models import (Program, Session, Exercise, WorkoutCategory,
-UserProgress, Meal, UserProgram)
-from googletrans import Translator
-translator = Translator()
+UserProgress, Meal, UserProgram, SessionCompletion)
 
 def translate_field(instance, field_name, language):
     translated_field = f"{field_name}_{language}"
@@ -158,6 +157,12 @@ class UserProgramSerializer(serializers.ModelSerializer):
 
 
 
+class SessionCompletionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SessionCompletion
+        fields = ['id', 'session', 'is_completed', 'completion_date', 'session_date', 'started_at']
+
+
 class UserProgramAllSerializer(serializers.ModelSerializer):
     class Meta:
         model=UserProgram
@@ -196,4 +201,23 @@ class StartSessionSerializer(serializers.Serializer):
 
 class ProgressRequestSerializer(serializers.Serializer):
     type = serializers.ChoiceField(choices=["daily", "weekly"], required=True)
-    date = serializers.DateField(required=True)
\ No newline at end of file
+    date = serializers.DateField(required=True)
+
+
+class CompletionEventSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=["session", "meal"], required=True)
+    session_id = serializers.IntegerField(required=True)
+    meal_id = serializers.IntegerField(required=False)
+    completed_at = serializers.DateTimeField(required=False, help_text="Client timestamp of the completion")
+
+    def validate(self, data):
+        if data["type"] == "meal" and not data.get("meal_id"):
+            raise serializers.ValidationError("'meal_id' is required for meal events.")
+        # Client clocks may run ahead; a completion cannot be later than now
+        now = timezone.now()
+        data["completed_at"] = min(data.get("completed_at") or now, now)
+        return data
+
+
+class CompletionSyncSerializer(serializers.Serializer):
+    events = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=500)
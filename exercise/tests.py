@@ -1,3 +1,529 @@
-from django.test import TestCase
+import json
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from exercise.utils import program_skeleton
+from exercise.views import (
+    CompletionSyncView, ExerciseViewSet, ProgressRangeView, ProgressView, SessionViewSet, StartSessionView, SyncView,
+    UserFullProgramDetailView,
+)
+from users_app import completions
+from users_app.enrollment import enroll_user, ensure_materialized
+from users_app.jobs import run_due_jobs
+from users_app.models import (
+    ChangeLog, Meal, MealCompletion, Preparation, ScheduledJob, Session, SessionCompletion, User, UserProgress,
+)
+from users_app.progress import compute_rollups
+from users_app.testing import create_program
+from users_app.translation import translate_instance, translation_service
+
+
+class UserFullProgramDetailViewTests(TestCase):
+    def get_detail(self, user, **headers):
+        request = APIRequestFactory().get('/api/exercise/user-full-program/', **headers)
+        force_authenticate(request, user=user)
+        return UserFullProgramDetailView.as_view()(request)
+
+    def enroll(self, email, session_count):
+        user = User.objects.create_user(email, 'password')
+        program = create_program(session_count)
+        with self.captureOnCommitCallbacks(execute=True):
+            enroll_user(user, program)
+        return user
+
+    def test_query_count_does_not_grow_with_program_length(self):
+        for email, session_count in (('short@example.com', 3), ('long@example.com', 90)):
+            user = self.enroll(email, session_count)
+            # The program plan was cached by enroll_user; the first request renders the
+            # skeleton from exercises, meals and preparations. The user data and program
+            # versions are one read each from the shared version cache.
+            with self.assertNumQueries(8):
+                response = self.get_detail(user)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['sessions']), session_count)
+
+            # Afterwards only the user program, the versions and the two completion maps are read
+            with self.assertNumQueries(5):
+                self.assertEqual(self.get_detail(user).data, response.data)
+
+    def test_completion_flags(self):
+        user = self.enroll('flags@example.com', 3)
+        session = Session.objects.get(program__user_programs__user=user, session_number=2)
+        SessionCompletion.objects.filter(user=user, session=session).update(is_completed=True)
+        meal_completion = MealCompletion.objects.filter(user=user, session=session).order_by('meal_id').first()
+        MealCompletion.objects.filter(pk=meal_completion.pk).update(is_completed=True)
+
+        sessions = self.get_detail(user).data['sessions']
+        self.assertEqual([s['is_completed'] for s in sessions], [False, True, False])
+        meals = {meal['id']: meal['is_completed'] for meal in sessions[1]['meals']}
+        self.assertTrue(meals.pop(meal_completion.meal_id))
+        self.assertFalse(any(meals.values()))
+        self.assertFalse(any(meal['is_completed'] for meal in sessions[0]['meals']))
+
+    def test_skeleton_is_shared_and_refreshed_on_translation(self):
+        user = self.enroll('first@example.com', 2)
+        other = User.objects.create_user('second@example.com', 'password')
+        with self.captureOnCommitCallbacks(execute=True):
+            enroll_user(other, user.user_programs.get().program)
+        SessionCompletion.objects.filter(user=user).update(is_completed=True)
+
+        self.assertTrue(all(s['is_completed'] for s in self.get_detail(user).data['sessions']))
+        with self.assertNumQueries(5):
+            sessions = self.get_detail(other).data['sessions']
+        self.assertFalse(any(s['is_completed'] for s in sessions))
+        other.language = 'uz'
+        sessions = self.get_detail(other).data['sessions']
+        self.assertEqual(sessions[0]['meals'][0]['food_name'], 'Meal 0')
+
+        meal = Meal.objects.get(pk=sessions[0]['meals'][0]['id'])
+        with mock.patch.object(translation_service, 'translate', return_value='Taom 0'), \
+                self.captureOnCommitCallbacks(execute=True):
+            translate_instance(Meal, meal.pk)
+        sessions = self.get_detail(other).data['sessions']
+        self.assertEqual(sessions[0]['meals'][0]['food_name'], 'Taom 0')
+
+    def test_unchanged_program_answers_not_modified(self):
+        user = self.enroll('etag@example.com', 3)
+        response = self.get_detail(user)
+        etag = response['ETag']
+
+        # The user program and the two versions
+        with self.assertNumQueries(3):
+            response = self.get_detail(user, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        completion = SessionCompletion.objects.filter(user=user).first()
+        completion.is_completed = True
+        with self.captureOnCommitCallbacks(execute=True):
+            completion.save()
+        response = self.get_detail(user, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_stream_errors_before_the_first_chunk_get_a_status(self):
+        user = self.enroll('broken@example.com', 3)
+        request = APIRequestFactory().get(
+            '/api/exercise/user-full-program/', {'stream': 1, 'from_session': 2, 'limit': 1}
+        )
+        force_authenticate(request, user=user)
+        with mock.patch('exercise.utils.session_data', side_effect=RuntimeError('broken session')):
+            response = UserFullProgramDetailView.as_view()(request)
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_unknown_language_falls_back_to_the_user_language(self):
+        user = self.enroll('lang@example.com', 2)
+        user.language = 'uz'
+        expected = self.get_detail_json(user)
+        self.assertEqual(expected['program']['goal'], 'Ozish')
+        self.assertEqual(self.get_detail_json(user, lang='ru')['program']['goal'], 'Похудение')
+
+        with mock.patch('exercise.views.program_skeleton', wraps=program_skeleton) as skeleton:
+            for lang in ('xx', 'uz-evil', ''):
+                self.assertEqual(self.get_detail_json(user, lang=lang), expected)
+        self.assertEqual({call.args[1] for call in skeleton.call_args_list}, {'uz'})
+
+    def get_detail_json(self, user, **params):
+        request = APIRequestFactory().get('/api/exercise/user-full-program/', params)
+        force_authenticate(request, user=user)
+        response = UserFullProgramDetailView.as_view()(request)
+        if response.streaming:
+            return json.loads(b''.join(response.streaming_content))
+        return json.loads(response.render().content)
+
+    def test_streaming_matches_regular_response(self):
+        user = self.enroll('stream@example.com', 45)
+        SessionCompletion.objects.filter(user=user, session_number_private__in=[3, 10]).update(is_completed=True)
+
+        regular = self.get_detail_json(user)
+        streamed = self.get_detail_json(user, stream=1)
+        self.assertEqual(streamed, regular)
+        self.assertEqual([s['session_number'] for s in streamed['sessions'] if s['is_completed']], [3, 10])
+
+        for params in ({'from_session': 9, 'limit': 5}, {'from_session': 44}):
+            window = self.get_detail_json(user, **params)
+            self.assertEqual(window, self.get_detail_json(user, stream=1, **params))
+            first = params['from_session'] - 1
+            self.assertEqual(window['sessions'], regular['sessions'][first:first + params.get('limit', 45)])
+
+        # A window past the last session streams an empty list
+        self.assertEqual(self.get_detail_json(user, stream=1, from_session=46)['sessions'], [])
+
+        request = APIRequestFactory().get('/api/exercise/user-full-program/', {'limit': 0})
+        force_authenticate(request, user=user)
+        self.assertEqual(UserFullProgramDetailView.as_view()(request).status_code, 400)
+
+
+class ProgressViewTests(TestCase):
+    def get_progress(self, user, **headers):
+        request = APIRequestFactory().get(
+            '/api/exercise/user/statistics/', {'type': 'daily', 'date': str(date.today())}, **headers
+        )
+        force_authenticate(request, user=user)
+        return ProgressView.as_view()(request)
+
+    def test_get_supports_etags(self):
+        user = User.objects.create_user('progress@example.com', 'password')
+        program = create_program(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            enroll_user(user, program)
+        response = self.get_progress(user)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['missed_sessions_count'], 1)
+
+        response = self.get_progress(user, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(COMPLETION_WINDOW_DAYS=14)
+    def test_summary_is_aggregated_in_the_database(self):
+        user = User.objects.create_user('weekly@example.com', 'password')
+        program = create_program(14)
+        enroll_user(user, program, start_date=date.today() - timedelta(days=6))
+        ensure_materialized(user)
+        # Saved one by one so the rollups are maintained
+        completions = [
+            *SessionCompletion.objects.filter(user=user, session_number_private__in=[1, 2]),
+            *MealCompletion.objects.filter(user=user, session__session_number=1),
+        ]
+        for completion in completions:
+            completion.is_completed = True
+            completion.save()
+
+        request = APIRequestFactory().post(
+            '/api/exercise/user/statistics/', {'type': 'weekly', 'date': str(date.today())}, format='json'
+        )
+        force_authenticate(request, user=user)
+        # The materialization check, the rollup totals and a detail fetch per completion table
+        with self.assertNumQueries(4):
+            data = ProgressView.as_view()(request).data
+
+        week_start = date.today() - timedelta(days=date.today().weekday())
+        in_week = [
+            number for number in range(1, 15)
+            if week_start <= date.today() - timedelta(days=6) + timedelta(days=number - 1) <= week_start + timedelta(days=6)
+        ]
+        completed = [number for number in in_week if number in (1, 2)]
+        self.assertEqual(data['completed_sessions_count'], len(completed))
+        self.assertEqual(data['missed_sessions_count'], len(in_week) - len(completed))
+        self.assertEqual(data['total_calories_burned'], 150.0 * len(completed))
+        self.assertEqual(data['completed_meals_count'], 4 if 1 in in_week else 0)
+        self.assertEqual(data['calories_gained'], 1200.0 if 1 in in_week else 0.0)
+        self.assertEqual(len(data['sessions']), len(in_week))
+        self.assertEqual(len(data['meals']), 4 * len(in_week))
+
+    def test_rollups_follow_completions_and_rebuild(self):
+        user = User.objects.create_user('rollup@example.com', 'password')
+        program = create_program(3)
+        enroll_user(user, program)
+        today = date.today()
+        self.assertEqual(UserProgress.objects.filter(user=user).count(), 3)
+
+        completion = SessionCompletion.objects.get(user=user, session_date=today)
+        completion.is_completed = True
+        completion.save()
+        progress = UserProgress.objects.get(user=user, date=today)
+        self.assertEqual((progress.completed_sessions, progress.missed_sessions), (1, 0))
+        self.assertEqual(progress.total_calories_burned, 150)
+        self.assertEqual((progress.completed_meals, progress.missed_meals), (0, 4))
+
+        MealCompletion.objects.filter(user=user, meal_date=today).update(is_completed=True)
+        UserProgress.objects.filter(user=user).delete()
+        call_command('rebuild_progress', user=[user.pk], stdout=StringIO())
+        progress = UserProgress.objects.get(user=user, date=today)
+        self.assertEqual((progress.completed_meals, progress.missed_meals), (4, 0))
+        self.assertEqual(progress.calories_gained, 1200)
+        self.assertEqual(UserProgress.objects.filter(user=user).count(), 3)
+
+        program.delete()
+        self.assertFalse(UserProgress.objects.filter(user=user).exists())
+
+    def test_rollups_refresh_only_the_dates_a_save_touches(self):
+        user = User.objects.create_user('moved@example.com', 'password')
+        enroll_user(user, create_program(3))
+        today = date.today()
+        completion = SessionCompletion.objects.get(user=user, session_date=today)
+
+        # A save that leaves the rollup columns alone costs the save and its changelog entry
+        completion.started_at = timezone.now()
+        with self.assertNumQueries(2):
+            completion.save(update_fields=['started_at'])
+
+        completion.is_completed = True
+        completion.session_date = today + timedelta(days=5)
+        completion.save()
+        # Today's meals keep their rollup row, without the moved session
+        left = UserProgress.objects.get(user=user, date=today)
+        self.assertEqual((left.completed_sessions, left.missed_sessions, left.missed_meals), (0, 0, 4))
+        moved = UserProgress.objects.get(user=user, date=today + timedelta(days=5))
+        self.assertEqual((moved.completed_sessions, moved.missed_sessions), (1, 0))
+
+        completion = SessionCompletion.objects.get(pk=completion.pk)
+        completion.delete()
+        self.assertFalse(UserProgress.objects.filter(user=user, date=today + timedelta(days=5)).exists())
+
+    def get_range(self, user, **params):
+        request = APIRequestFactory().get('/api/exercise/user/statistics/range/', params)
+        force_authenticate(request, user=user)
+        return ProgressRangeView.as_view()(request)
+
+    def test_range_series_is_dense(self):
+        user = User.objects.create_user('range@example.com', 'password')
+        program = create_program(3)
+        start = date(2024, 1, 30)
+        enroll_user(user, program, start_date=start)
+        completion = SessionCompletion.objects.get(user=user, session_date=start)
+        completion.is_completed = True
+        completion.save()
+
+        data = self.get_range(user, start='2024-01-01', end='2024-03-31', bucket='month').data
+        self.assertEqual([point['period_start'] for point in data['series']], ['2024-01-01', '2024-02-01', '2024-03-01'])
+        self.assertEqual([point['completed_sessions_count'] for point in data['series']], [1, 0, 0])
+        self.assertEqual([point['missed_sessions_count'] for point in data['series']], [1, 1, 0])
+        self.assertEqual(data['series'][0]['total_calories_burned'], 150.0)
+
+        series = self.get_range(user, start='2024-01-29', end='2024-02-11', bucket='week').data['series']
+        self.assertEqual([point['period_start'] for point in series], ['2024-01-29', '2024-02-05'])
+        self.assertEqual([point['missed_meals_count'] for point in series], [12, 0])
+
+        series = self.get_range(user, start='2024-01-25', end='2024-02-05').data['series']
+        self.assertEqual(len(series), 12)
+        self.assertEqual(sum(point['missed_sessions_count'] for point in series), 2)
+
+        self.assertEqual(self.get_range(user, start='2024-02-01', end='2024-01-01').status_code, 400)
+        self.assertEqual(self.get_range(user, start='2024-01-01', end='2024-02-01', bucket='year').status_code, 400)
+
+    def test_range_covers_far_future_days_without_a_window(self):
+        # The default: whole programs are materialized at enrollment, so every planned day counts
+        user = User.objects.create_user('future@example.com', 'password')
+        enroll_user(user, create_program(40))
+        today = date.today()
+        series = self.get_range(user, start=str(today), end=str(today + timedelta(days=60)), bucket='month').data
+        self.assertEqual(sum(point['missed_sessions_count'] for point in series['series']), 40)
+
+    @override_settings(COMPLETION_WINDOW_DAYS=3)
+    def test_range_materializes_one_more_window_at_most(self):
+        user = User.objects.create_user('window-range@example.com', 'password')
+        enroll_user(user, create_program(40))
+        today = date.today()
+        self.assertEqual(self.get_range(user, start=str(today), end=str(today + timedelta(days=365))).status_code, 200)
+        self.assertEqual(SessionCompletion.objects.filter(user=user).count(), 6)
+
+
+class StartSessionViewTests(TestCase):
+    def test_started_session_is_completed_by_the_job_worker(self):
+        user = User.objects.create_user('start@example.com', 'password')
+        program = create_program(2)
+        enroll_user(user, program)
+        completion = SessionCompletion.objects.get(user=user, session_number_private=1)
+
+        for _ in range(2):
+            request = APIRequestFactory().post('/api/exercise/sessions/complete/', {'session_id': completion.session_id})
+            force_authenticate(request, user=user)
+            response = StartSessionView.as_view()(request)
+            self.assertEqual(response.status_code, 200)
+
+        # Starting again reschedules the same job
+        scheduled_job = ScheduledJob.objects.get()
+        self.assertEqual(scheduled_job.payload, {'completion_id': completion.pk})
+        completion.refresh_from_db()
+        self.assertIsNotNone(completion.started_at)
+        self.assertFalse(completion.is_completed)
+
+        self.assertEqual(run_due_jobs(), 1)
+        completion.refresh_from_db()
+        self.assertTrue(completion.is_completed)
+        scheduled_job.refresh_from_db()
+        self.assertEqual(scheduled_job.status, ScheduledJob.STATUS_DONE)
+        self.assertEqual(run_due_jobs(), 0)
+
+
+class MarkSessionCompleteTests(TestCase):
+    def complete(self, user, session):
+        request = APIRequestFactory().post(f'/api/exercise/api/sessions/{session.pk}/complete/')
+        force_authenticate(request, user=user)
+        return SessionViewSet.as_view({'post': 'mark_as_complete'})(request, pk=session.pk)
+
+    def test_sessions_complete_once_and_in_order(self):
+        # SessionViewSet writes are limited to superusers by IsAdminOrReadOnly
+        user = User.objects.create_user('complete@example.com', 'password', is_superuser=True)
+        program = create_program(3)
+        enroll_user(user, program, start_date=date.today() - timedelta(days=1))
+        first, second, third = Session.objects.filter(program=program).order_by('session_number')
+
+        self.assertEqual(self.complete(user, second).status_code, 403)
+        self.assertEqual(self.complete(user, third).status_code, 403)
+        self.assertEqual(self.complete(user, first).status_code, 200)
+        self.assertEqual(self.complete(user, first).status_code, 400)
+        self.assertEqual(self.complete(user, second).status_code, 200)
+
+        self.assertEqual(
+            list(SessionCompletion.objects.filter(user=user).order_by('session_number_private')
+                 .values_list('is_completed', flat=True)),
+            [True, True, False],
+        )
+        self.assertEqual(UserProgress.objects.get(user=user, date=date.today()).completed_sessions, 1)
+
+    def test_completion_updates_the_day_rollup_in_place(self):
+        user = User.objects.create_user('cost@example.com', 'password')
+        program = create_program(2)
+        enroll_user(user, program)
+        session = Session.objects.get(program=program, session_number=1)
+        meal = session.meals.order_by('id').first()
+
+        # The conditional UPDATE, the read-back, the user lock, the rollup UPDATE and the
+        # changelog insert, plus the savepoints of the nested atomic blocks
+        with self.assertNumQueries(9):
+            self.assertEqual(completions.complete_session(user, session.pk), completions.COMPLETED)
+        with self.assertNumQueries(9):
+            self.assertEqual(completions.complete_meal(user, session.pk, meal.pk), completions.COMPLETED)
+
+        progress = UserProgress.objects.get(user=user, date=date.today())
+        # Same counts as a rebuild from the completion rows
+        [expected] = compute_rollups(user.pk, [date.today()])
+        for field in ('completed_sessions', 'missed_sessions', 'total_calories_burned',
+                      'completed_meals', 'missed_meals', 'calories_gained'):
+            self.assertEqual(getattr(progress, field), getattr(expected, field))
+        self.assertEqual((progress.completed_sessions, progress.completed_meals), (1, 1))
+        self.assertEqual((progress.total_calories_burned, progress.calories_gained), (150, 300))
+
+
+class CompletionSyncViewTests(TestCase):
+    def test_events_are_applied_in_one_request(self):
+        user = User.objects.create_user('sync@example.com', 'password')
+        program = create_program(3)
+        enroll_user(user, program, start_date=date.today() - timedelta(days=2))
+        first, second, third = Session.objects.filter(program=program).order_by('session_number')
+        meal = first.meals.order_by('id').first()
+        yesterday = (timezone.now() - timedelta(days=1)).isoformat()
+
+        events = [
+            {'type': 'session', 'session_id': second.pk, 'completed_at': timezone.now().isoformat()},
+            {'type': 'session', 'session_id': first.pk, 'completed_at': yesterday},
+            {'type': 'meal', 'session_id': first.pk, 'meal_id': meal.pk, 'completed_at': yesterday},
+            {'type': 'meal', 'session_id': first.pk, 'meal_id': meal.pk},
+            {'type': 'session', 'session_id': first.pk + 100},
+            {'type': 'meal', 'session_id': first.pk},
+        ]
+        request = APIRequestFactory().post('/api/exercise/user/sync/completions/', {'events': events}, format='json')
+        force_authenticate(request, user=user)
+        response = CompletionSyncView.as_view()(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['completed', 'completed', 'completed', 'already_completed', 'not_found', 'invalid'],
+        )
+        completion = SessionCompletion.objects.get(user=user, session=first)
+        self.assertTrue(completion.is_completed)
+        self.assertEqual(completion.completion_date, date.today() - timedelta(days=1))
+        self.assertFalse(SessionCompletion.objects.get(user=user, session=third).is_completed)
+        self.assertEqual(UserProgress.objects.get(user=user, date=date.today() - timedelta(days=2)).completed_meals, 1)
+
+
+@mock.patch('users_app.changelog.SETTLE_TIME', timedelta(0))
+@mock.patch('users_app.changelog.RESCAN_TIME', timedelta(0))
+class SyncViewTests(TestCase):
+    def sync(self, user, **params):
+        request = APIRequestFactory().get('/api/exercise/sync/', params)
+        force_authenticate(request, user=user)
+        return SyncView.as_view()(request)
+
+    def test_only_changes_since_the_token_are_returned(self):
+        user = User.objects.create_user('delta@example.com', 'password')
+        other = User.objects.create_user('other@example.com', 'password')
+        program = create_program(2)
+        enroll_user(user, program)
+        enroll_user(other, program)
+
+        token = self.sync(user).data['token']
+        data = self.sync(user, since=token).data
+        self.assertEqual(data['token'], token)
+        self.assertFalse(any(data['changes'].values()))
+
+        meal = Meal.objects.order_by('id').first()
+        meal.food_name = 'Porridge'
+        meal.save()
+        Preparation.objects.filter(meal=meal).delete()
+        completion = MealCompletion.objects.filter(user=other).first()
+        completion.is_completed = True
+        completion.save()
+        completions.complete_session(user, Session.objects.get(program=program, session_number=1).pk)
+
+        data = self.sync(user, since=token).data
+        self.assertEqual([row['food_name'] for row in data['changes']['meals']], ['Porridge'])
+        self.assertEqual(len(data['deleted']['preparations']), 1)
+        self.assertEqual(data['changes']['meal_completions'], [])
+        self.assertEqual([row['is_completed'] for row in data['changes']['session_completions']], [True])
+        self.assertGreater(int(data['token']), int(token))
+        self.assertFalse(any(self.sync(user, since=data['token']).data['changes'].values()))
+
+    def test_late_commits_below_the_token_are_rescanned(self):
+        user = User.objects.create_user('late@example.com', 'password')
+        meal = create_program(1).sessions.get().meals.order_by('id').first()
+        # An id taken by a transaction that has not committed yet
+        late_id = ChangeLog.objects.create(model='users_app.meal', object_id=meal.pk, action='upsert').pk
+        ChangeLog.objects.filter(pk=late_id).delete()
+        meal.save()
+        token = self.sync(user, since=0).data['token']
+        self.assertGreater(int(token), late_id)
+
+        # The transaction commits after the token was handed out
+        ChangeLog.objects.create(id=late_id, model='users_app.meal', object_id=meal.pk, action='upsert')
+        ChangeLog.objects.filter(pk=late_id).update(created_at=timezone.now() - timedelta(seconds=30))
+        ChangeLog.objects.exclude(pk=late_id).update(created_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(self.sync(user, since=token).data['changes']['meals'], [])
+        with mock.patch('users_app.changelog.RESCAN_TIME', timedelta(seconds=60)):
+            data = self.sync(user, since=token).data
+        self.assertEqual([row['id'] for row in data['changes']['meals']], [meal.pk])
+        self.assertEqual(data['token'], token)
+
+    def test_enrollment_rows_are_logged(self):
+        user = User.objects.create_user('fresh@example.com', 'password')
+        program = create_program(2)
+        data = self.sync(user, since=0).data
+        self.assertEqual(data['changes']['user_programs'], [])
+
+        enroll_user(user, program)
+        data = self.sync(user, since=data['token']).data
+        self.assertEqual(len(data['changes']['user_programs']), 1)
+        self.assertEqual(len(data['changes']['session_completions']), 2)
+        self.assertEqual(len(data['changes']['meal_completions']), 8)
+        self.assertEqual(self.sync(user, since='abc').status_code, 400)
+
+
+class FixedMessageTests(TestCase):
+    expected = {
+        'ru': ('Упражнение успешно создано', 'Упражнение успешно удалено'),
+        'uz': ('Mashq muvaffaqiyatli yaratildi', "Mashq muvaffaqiyatli o'chirildi"),
+    }
+
+    def call(self, user, request, action, **kwargs):
+        force_authenticate(request, user=user)
+        return ExerciseViewSet.as_view(action)(request, **kwargs)
+
+    def test_write_endpoints_read_messages_from_the_catalog(self):
+        payload = {
+            'name': 'Squat', 'description': 'Bodyweight squat', 'difficulty_level': 'easy',
+            'target_muscle': 'legs', 'video_url': 'https://example.com/squat',
+        }
+        backend = mock.Mock()
+        with mock.patch.object(translation_service, 'backend', backend):
+            for language, (created, deleted) in self.expected.items():
+                user = User.objects.create_superuser(f'admin-{language}@example.com', 'password', language=language)
+                request = APIRequestFactory().post('/api/exercise/exercises/', payload, format='json')
+                response = self.call(user, request, {'post': 'create'})
+                self.assertEqual(response.data['message'], created)
+
+                pk = response.data['exercise']['id']
+                request = APIRequestFactory().delete(f'/api/exercise/exercises/{pk}/')
+                response = self.call(user, request, {'delete': 'destroy'}, pk=pk)
+                self.assertEqual(response.data['message'], deleted)
+        # Fixed messages never go out to the translation backend
+        backend.translate.assert_not_called()
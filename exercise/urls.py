@@ -3,8 +3,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from exercise.views import (ProgramViewSet, SessionViewSet,
                             ExerciseViewSet, WorkoutCategoryViewSet,
-                            UserProgramViewSet,UserFullProgramDetailView,ProgressView,
-                            UserProgramAllViewSet,StartSessionView)
+                            UserProgramViewSet,UserFullProgramDetailView,ProgressView,ProgressRangeView,
+                            UserProgramAllViewSet,StartSessionView,CompletionSyncView,SyncView)
 from food.views import CompleteMealView
 
 # Initialize a single router for all viewsets
@@ -27,5 +27,8 @@ urlpatterns += [
     # path('user/userprogress/', UpdateProgressView.as_view(), name='user-progress'),
     path('sessions/complete/', StartSessionView.as_view(), name='start_session'),
     path('user/statistics/',ProgressView.as_view(),name='user-progress'),
+    path('user/statistics/range/', ProgressRangeView.as_view(), name='user-progress-range'),
     path('api/meal/complete/', CompleteMealView.as_view(), name='complete-meal'),
+    path('user/sync/completions/', CompletionSyncView.as_view(), name='completion-sync'),
+    path('sync/', SyncView.as_view(), name='sync'),
 ]
\ No newline at end of file
@@ -0,0 +1,121 @@
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.utils import translation
+
+from exercise.serializers import translate_field
+from users_app.models import Exercise, Meal, Session
+from users_app.plan import PLAN_CACHE_TIMEOUT, get_program_plan, program_version
+
+
+def translate_message(message, language):
+    """
+    Look up a fixed API message in the compiled gettext catalog for ``language``.
+
+    Wrap the literal in ``gettext_noop`` at the call site so makemessages
+    extracts it; the lookup itself never leaves the process.
+    """
+    with translation.override(language):
+        return translation.gettext(message)
+
+
+def program_skeleton(program_id, language, version=None):
+    """
+    Pre-serialized sessions of a program with exercises, meals and preparations.
+
+    The skeleton is the same for every user on the program, so it is cached
+    per (program, language, plan version); the plan version changes whenever
+    the program content or its translations do. ``is_completed`` flags are
+    left False for the caller to overlay.
+    """
+    version = version or program_version(program_id)
+    key = f'program_skeleton_{program_id}_{language}_{version}'
+    skeleton = cache.get(key)
+    if skeleton is not None:
+        return skeleton
+
+    plan = get_program_plan(program_id, version)
+    exercises = Exercise.objects.in_bulk(
+        {exercise_id for session in plan.sessions for exercise_id in session.exercise_ids}
+    )
+    meals = Meal.objects.prefetch_related('preparations').in_bulk(
+        {meal_id for session in plan.sessions for meal_id in session.meal_ids}
+    )
+    skeleton = [
+        session_data(
+            session,
+            [exercises[exercise_id] for exercise_id in session.exercise_ids],
+            [meals[meal_id] for meal_id in session.meal_ids],
+            language,
+        )
+        for session in plan.sessions
+    ]
+    cache.set(f'program_skeleton_{program_id}_{language}_{plan.version}', skeleton, PLAN_CACHE_TIMEOUT)
+    return skeleton
+
+
+def session_data(session, exercises, meals, language):
+    """One session of the full-program payload, with ``is_completed`` flags left False."""
+    return {
+        "id": session.id,
+        "session_number": session.session_number,
+        "calories_burned": session.calories_burned,
+        "is_completed": False,
+        "exercises": [
+            {
+                "id": exercise.id,
+                "name": translate_field(exercise, 'name', language),
+                "description": translate_field(exercise, 'description', language),
+                "difficulty_level": exercise.difficulty_level,
+                "target_muscle": exercise.target_muscle,
+                "video_url": exercise.video_url,
+            }
+            for exercise in exercises
+        ],
+        "meals": [
+            {
+                "id": meal.id,
+                "type": meal.meal_type,
+                "food_name": translate_field(meal, 'food_name', language),
+                "calories": meal.calories,
+                "water_content": meal.water_content,
+                "preparation_time": meal.preparation_time,
+                "is_completed": False,
+                "preparations": [
+                    {
+                        "id": preparation.id,
+                        "name": translate_field(preparation, 'name', language),
+                        "description": translate_field(preparation, 'description', language),
+                        "preparation_time": preparation.preparation_time,
+                    }
+                    for preparation in meal.preparations.all()
+                ],
+            }
+            for meal in meals
+        ],
+    }
+
+
+def iter_session_chunks(program_id, language, from_session=1, limit=None, chunk_size=20):
+    """
+    Yield lists of at most ``chunk_size`` serialized sessions, read through a server-side cursor.
+
+    Unlike program_skeleton() nothing is held for the whole program, so
+    memory stays flat however long the program is.
+    """
+    sessions = Session.objects.filter(
+        program_id=program_id, session_number__gte=from_session
+    ).order_by('session_number').prefetch_related(
+        Prefetch('exercises', queryset=Exercise.objects.order_by('id')),
+        Prefetch('meals', queryset=Meal.objects.order_by('id').prefetch_related('preparations')),
+    )
+    if limit is not None:
+        sessions = sessions[:limit]
+
+    chunk = []
+    for session in sessions.iterator(chunk_size=chunk_size):
+        chunk.append(session_data(session, session.exercises.all(), session.meals.all(), language))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -1,23 +1,32 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
-from food.serializers import MealSerializer
+from food.serializers import MealCompletionSerializer, MealSerializer, PreparationSerializer
 from users_app.models import *
 from exercise.serializers import *
 from django.utils.translation import gettext_lazy as _
 from drf_yasg.utils import swagger_auto_schema
 from exercise.permissions import IsAdminOrReadOnly
-from googletrans import Translator
 from django.conf import settings
 from rest_framework.permissions import IsAuthenticated
-from users_app.models import translate_text
-from googletrans import Translator
+from exercise.utils import iter_session_chunks, program_skeleton, translate_message
+from users_app import changelog, completions
+from users_app.enrollment import ensure_materialized
+from users_app.jobs import schedule as schedule_job
+from django.db import transaction
+from users_app.plan import get_program_plan, program_version
+from users_app.progress import BUCKETS as PROGRESS_BUCKETS, progress_series, progress_totals
+from users_app.versions import make_etag, user_data_version
+from django.utils.cache import get_conditional_response
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+import json
+from itertools import chain
 from django.conf import settings
 from rest_framework.views import APIView
 from users_app.serializers import UserProgramFullSerializer
 from rest_framework import status
 from django.utils.timezone import now
 from datetime import timedelta
-from threading import Timer
 from rest_framework.decorators import action
 from drf_yasg import openapi
 
@@ -26,7 +35,7 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils.timezone import now
-from django.utils.translation import gettext as _
+from django.utils.translation import gettext as _, gettext_noop
 
 from .serializers import SessionSerializer
 from django.db.models import Q
@@ -64,7 +73,7 @@ class ProgramViewSet(viewsets.ModelViewSet):
         language = request.user.language
         if serializer.is_valid():
             program = serializer.save()
-            message = translate_text("Program created successfully", language)
+            message = translate_message(gettext_noop("Program created successfully"), language)
             return Response({"message": message, "program": serializer.data})
         return Response(serializer.errors, status=400)
 
@@ -75,7 +84,7 @@ class ProgramViewSet(viewsets.ModelViewSet):
         language = request.user.language
         if serializer.is_valid():
             serializer.save()
-            message = translate_text("Program updated successfully", language)
+            message = translate_message(gettext_noop("Program updated successfully"), language)
             return Response({"message": message, "program": serializer.data})
         return Response(serializer.errors, status=400)
 
@@ -86,18 +95,18 @@ class ProgramViewSet(viewsets.ModelViewSet):
         language = request.user.language
         if serializer.is_valid():
             serializer.save()
-            message = translate_text("Program partially updated successfully", language)
+            message = translate_message(gettext_noop("Program partially updated successfully"), language)
             return Response({"message": message, "program": serializer.data})
         return Response(serializer.errors, status=400)
 
     @swagger_auto_schema(tags=['Programs'], operation_description=_("Delete a program"))
     def destroy(self, request, pk=None):
         if not request.user.is_superuser:
-            message = translate_text("You do not have permission to delete a program.", request.user.language)
+            message = translate_message(gettext_noop("You do not have permission to delete a program."), request.user.language)
             return Response({"error": message}, status=403)
         program = self.get_object()
         program.delete()
-        message = translate_text("Program deleted successfully", request.user.language)
+        message = translate_message(gettext_noop("Program deleted successfully"), request.user.language)
         return Response({"message": message})
 
 
@@ -112,9 +121,11 @@ class SessionViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='by-session-number')
     def get_by_session_number(self, request):
-        user_program = UserProgram.objects.filter(user=request.user, is_active=True).first()
+        program_id = UserProgram.objects.filter(
+            user=request.user, is_active=True
+        ).values_list('program_id', flat=True).first()
 
-        if not user_program:
+        if not program_id:
             return Response(
                 {"error": "No active program found for the logged-in user."},
                 status=status.HTTP_404_NOT_FOUND,
@@ -127,16 +138,30 @@ class SessionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            session = Session.objects.get(program=user_program.program, session_number=session_number)
-        except Session.DoesNotExist:
+        # Sessionning tarkibi dastur rejasidan olinadi (users_app.plan)
+        session = None
+        if session_number.isdigit():
+            session = get_program_plan(program_id).session_by_number(int(session_number))
+        if session is None:
             return Response(
                 {"error": "Session not found for the given session_number in the user's program."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        serializer = self.get_serializer(session)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        fields = self.get_serializer().fields
+        data = {
+            'id': session.id,
+            'program': program_id,
+            'calories_burned': fields['calories_burned'].to_representation(session.calories_burned),
+            'session_number': session.session_number,
+            'session_time': (
+                fields['session_time'].to_representation(session.session_time)
+                if session.session_time is not None else None
+            ),
+            'exercises': list(session.exercise_ids),
+            'meals': list(session.meal_ids),
+        }
+        return Response(data, status=status.HTTP_200_OK)
 
     @swagger_auto_schema(tags=['Sessions'],
                          operation_description=_("List completed sessions and the next upcoming session for the user"))
@@ -155,6 +180,8 @@ class SessionViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
 
+            ensure_materialized(request.user)
+
             # Fetch completed sessions
             completed_sessions_ids = SessionCompletion.objects.filter(
                 user=request.user,
@@ -184,37 +211,25 @@ class SessionViewSet(viewsets.ModelViewSet):
     def mark_as_complete(self, request, pk=None):
         session = self.get_object()
         user = request.user
+        ensure_materialized(user)
 
-        # Check if the session belongs to the user's active program
-        session_completion = SessionCompletion.objects.filter(user=user, session=session).first()
-        if not session_completion:
+        # One conditional UPDATE; the outcome tells which check failed
+        result = completions.complete_session(user, session.id)
+
+        if result == completions.NOT_FOUND:
             return Response({"error": _("Session not found in your program.")}, status=status.HTTP_404_NOT_FOUND)
 
-        # Check if the session is already completed
-        if session_completion.is_completed:
+        if result == completions.ALREADY_COMPLETED:
             return Response({"error": _("Session is already completed.")}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Ensure the session date is today or in the past
-        if session_completion.session_date > now().date():
+        if result == completions.NOT_DUE:
             return Response({"error": _("You cannot complete a session before its scheduled date.")},
                             status=status.HTTP_403_FORBIDDEN)
 
-        # Restrict to only the next upcoming session
-        next_upcoming_session = SessionCompletion.objects.filter(
-            user=user,
-            is_completed=False,
-            session_date__lte=now().date()
-        ).order_by('session_date').first()
-
-        if session != next_upcoming_session.session:
+        if result == completions.NOT_NEXT:
             return Response({"error": _("You can only complete the next upcoming session.")},
                             status=status.HTTP_403_FORBIDDEN)
 
-        # Mark session as complete
-        session_completion.is_completed = True
-        session_completion.completion_date = now().date()
-        session_completion.save()
-
         return Response({"message": _("Session marked as complete.")}, status=status.HTTP_200_OK)
 
     @swagger_auto_schema(tags=['Sessions'], operation_description=_("Retrieve session by ID"))
@@ -322,12 +337,12 @@ class ExerciseViewSet(viewsets.ModelViewSet):
     def create(self, request):
         language = self.get_user_language()
         if not request.user.is_superuser:
-            message = translate_text("You do not have permission to create an exercise.", language)
+            message = translate_message(gettext_noop("You do not have permission to create an exercise."), language)
             return Response({"error": message}, status=403)
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
-            message = translate_text("Exercise created successfully", language)
+            message = translate_message(gettext_noop("Exercise created successfully"), language)
             return Response({"message": message, "exercise": serializer.data})
         return Response(serializer.errors, status=400)
 
@@ -336,12 +351,12 @@ class ExerciseViewSet(viewsets.ModelViewSet):
         language = self.get_user_language()
         exercise = self.get_object()
         if not request.user.is_superuser:
-            message = translate_text("You do not have permission to update this exercise.", language)
+            message = translate_message(gettext_noop("You do not have permission to update this exercise."), language)
             return Response({"error": message}, status=403)
         serializer = self.get_serializer(exercise, data=request.data)
         if serializer.is_valid():
             serializer.save()
-            message = translate_text("Exercise updated successfully", language)
+            message = translate_message(gettext_noop("Exercise updated successfully"), language)
             return Response({"message": message, "exercise": serializer.data})
         return Response(serializer.errors, status=400)
 
@@ -350,12 +365,12 @@ class ExerciseViewSet(viewsets.ModelViewSet):
         language = self.get_user_language()
         exercise = self.get_object()
         if not request.user.is_superuser:
-            message = translate_text("You do not have permission to partially update this exercise.", language)
+            message = translate_message(gettext_noop("You do not have permission to partially update this exercise."), language)
             return Response({"error": message}, status=403)
         serializer = self.get_serializer(exercise, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
-            message = translate_text("Exercise partially updated successfully", language)
+            message = translate_message(gettext_noop("Exercise partially updated successfully"), language)
             return Response({"message": message, "exercise": serializer.data})
         return Response(serializer.errors, status=400)
 
@@ -363,11 +378,11 @@ class ExerciseViewSet(viewsets.ModelViewSet):
     def destroy(self, request, pk=None):
         language = self.get_user_language()
         if not request.user.is_superuser:
-            message = translate_text("You do not have permission to delete this exercise.", language)
+            message = translate_message(gettext_noop("You do not have permission to delete this exercise."), language)
             return Response({"error": message}, status=403)
         exercise = self.get_object()
         exercise.delete()
-        message = translate_text("Exercise deleted successfully", language)
+        message = translate_message(gettext_noop("Exercise deleted successfully"), language)
         return Response({"message": message})
 
 
@@ -398,12 +413,12 @@ class WorkoutCategoryViewSet(viewsets.ModelViewSet):
     def create(self, request):
         language = self.get_user_language()
         if not request.user.is_superuser:
-            message = translate_text("You do not have permission to create a workout category.", language)
+            message = translate_message(gettext_noop("You do not have permission to create a workout category."), language)
             return Response({"error": message}, status=403)
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
-            message = translate_text("Workout category created successfully", language)
+            message = translate_message(gettext_noop("Workout category created successfully"), language)
             return Response({"message": message, "workout_category": serializer.data})
         return Response(serializer.errors, status=400)
 
@@ -412,12 +427,12 @@ class WorkoutCategoryViewSet(viewsets.ModelViewSet):
         language = self.get_user_language()
         workout_category = self.get_object()
         if not request.user.is_superuser:
-            message = translate_text("You do not have permission to update this workout category.", language)
+            message = translate_message(gettext_noop("You do not have permission to update this workout category."), language)
             return Response({"error": message}, status=403)
         serializer = self.get_serializer(workout_category, data=request.data)
         if serializer.is_valid():
             serializer.save()
-            message = translate_text("Workout category updated successfully", language)
+            message = translate_message(gettext_noop("Workout category updated successfully"), language)
             return Response({"message": message, "workout_category": serializer.data})
         return Response(serializer.errors, status=400)
 
@@ -426,12 +441,12 @@ class WorkoutCategoryViewSet(viewsets.ModelViewSet):
         language = self.get_user_language()
         workout_category = self.get_object()
         if not request.user.is_superuser:
-            message = translate_text("You do not have permission to partially update this workout category.", language)
+            message = translate_message(gettext_noop("You do not have permission to partially update this workout category."), language)
             return Response({"error": message}, status=403)
         serializer = self.get_serializer(workout_category, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
-            message = translate_text("Workout category updated successfully", language)
+            message = translate_message(gettext_noop("Workout category updated successfully"), language)
             return Response({"message": message, "workout_category": serializer.data})
         return Response(serializer.errors, status=400)
 
@@ -439,11 +454,11 @@ class WorkoutCategoryViewSet(viewsets.ModelViewSet):
     def destroy(self, request, pk=None):
         language = self.get_user_language()
         if not request.user.is_superuser:
-            message = translate_text("You do not have permission to delete this workout category.", language)
+            message = translate_message(gettext_noop("You do not have permission to delete this workout category."), language)
             return Response({"error": message}, status=403)
         workout_category = self.get_object()
         workout_category.delete()
-        message = translate_text("Workout category deleted successfully", language)
+        message = translate_message(gettext_noop("Workout category deleted successfully"), language)
         return Response({"message": message})
 
 # User Program ViewSet
@@ -478,7 +493,7 @@ class UserProgramViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             serializer.save(user=request.user)
-            message = translate_text("User program created successfully", language)
+            message = translate_message(gettext_noop("User program created successfully"), language)
             return Response({"message": message, "user_program": serializer.data})
         return Response(serializer.errors, status=400)
 
@@ -487,12 +502,12 @@ class UserProgramViewSet(viewsets.ModelViewSet):
         language = self.get_user_language()
         user_program = self.get_object()
         if user_program.user != request.user:
-            message = translate_text("You do not have permission to update this user program.", language)
+            message = translate_message(gettext_noop("You do not have permission to update this user program."), language)
             return Response({"error": message}, status=403)
         serializer = self.get_serializer(user_program, data=request.data)
         if serializer.is_valid():
             serializer.save()
-            message = translate_text("User program updated successfully", language)
+            message = translate_message(gettext_noop("User program updated successfully"), language)
             return Response({"message": message, "user_program": serializer.data})
         return Response(serializer.errors, status=400)
 
@@ -501,12 +516,12 @@ class UserProgramViewSet(viewsets.ModelViewSet):
         language = self.get_user_language()
         user_program = self.get_object()
         if user_program.user != request.user:
-            message = translate_text("You do not have permission to partially update this user program.", language)
+            message = translate_message(gettext_noop("You do not have permission to partially update this user program."), language)
             return Response({"error": message}, status=403)
         serializer = self.get_serializer(user_program, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
-            message = translate_text("User program partially updated successfully", language)
+            message = translate_message(gettext_noop("User program partially updated successfully"), language)
             return Response({"message": message, "user_program": serializer.data})
         return Response(serializer.errors, status=400)
 
@@ -515,10 +530,10 @@ class UserProgramViewSet(viewsets.ModelViewSet):
         language = self.get_user_language()
         user_program = self.get_object()
         if user_program.user != request.user:
-            message = translate_text("You do not have permission to delete this user program.", language)
+            message = translate_message(gettext_noop("You do not have permission to delete this user program."), language)
             return Response({"error": message}, status=403)
         user_program.delete()
-        message = translate_text("User program deleted successfully", language)
+        message = translate_message(gettext_noop("User program deleted successfully"), language)
         return Response({"message": message})
 
 
@@ -556,90 +571,131 @@ class UserFullProgramDetailView(APIView):
     def get(self, request):
         try:
             # Fetch the user's active program
-            user_program = UserProgram.objects.filter(user=request.user, is_active=True).first()
+            user_program = UserProgram.objects.filter(
+                user=request.user, is_active=True
+            ).select_related('program').first()
             if not user_program:
                 return Response(
                     {"error": "Foydalanuvchining faol dasturi topilmadi."},
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            # Fetch all sessions for the program
-            sessions = Session.objects.filter(program=user_program.program).prefetch_related(
-                'exercises', 'meals__preparations'
+            # Noma'lum til kesh kalitiga tushmasligi uchun foydalanuvchi tiliga qaytiladi
+            language = request.query_params.get('lang')
+            if language not in dict(settings.LANGUAGES):
+                language = request.user.language
+            stream = request.query_params.get('stream') in ('1', 'true')
+            try:
+                from_session = int(request.query_params.get('from_session', 1))
+                limit = request.query_params.get('limit')
+                limit = int(limit) if limit is not None else None
+                if from_session < 1 or (limit is not None and limit < 1):
+                    raise ValueError
+            except ValueError:
+                return Response(
+                    {"error": "from_session va limit musbat butun son bo'lishi kerak."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            # Ma'lumotlar o'zgarmagan bo'lsa, bajarilganlik jadvallariga murojaat qilinmaydi
+            version = program_version(user_program.program_id)
+            etag = make_etag(
+                user_data_version(request.user.pk), version, user_program.pk, language, from_session, limit, stream,
             )
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                return not_modified
+
+            program_data = {
+                "id": user_program.program.id,
+                "goal": translate_field(user_program.program, 'program_goal', language),
+                "progress": user_program.progress,
+                "total_sessions": user_program.program.total_sessions,
+                "is_active": user_program.is_active,
+                "start_date": user_program.start_date,
+                "end_date": user_program.end_date,
+            }
+
+            # Uzun dasturlar uchun javob bo'laklab, sessiyama-sessiya yuboriladi
+            if stream:
+                # Birinchi bo'lak javobdan oldin tayyorlanadi, shunda xatolar to'g'ri status bilan qaytadi
+                chunks = iter_session_chunks(user_program.program_id, language, from_session, limit)
+                first_chunk = next(chunks, [])
+                response = StreamingHttpResponse(
+                    self._stream(request.user, user_program.program_id, program_data, chain([first_chunk], chunks)),
+                    content_type='application/json',
+                )
+                response['ETag'] = etag
+                return response
+
+            # Dastur skeleti barcha foydalanuvchilar uchun bir xil va keshlanadi,
+            # so'rov faqat foydalanuvchining bajarilgan belgilarini qo'shadi
+            sessions = program_skeleton(user_program.program_id, language, version)
+            session_ids = None
+            if from_session > 1 or limit is not None:
+                sessions = [session for session in sessions if session["session_number"] >= from_session][:limit]
+                session_ids = [session["id"] for session in sessions]
+            completions = self._completion_maps(request.user, user_program.program_id, session_ids)
 
             # Prepare response data
             response_data = {
-                "program": {
-                    "id": user_program.program.id,
-                    "goal": user_program.program.program_goal,
-                    "progress": user_program.progress,
-                    "total_sessions": user_program.program.total_sessions,
-                    "is_active": user_program.is_active,
-                    "start_date": user_program.start_date,
-                    "end_date": user_program.end_date,
-                },
-                "sessions": [
-                    {
-                        "id": session.id,
-                        "session_number": session.session_number,
-                        "calories_burned": session.calories_burned,
-                        "is_completed": self._is_session_completed(request.user, session),
-                        "exercises": [
-                            {
-                                "id": exercise.id,
-                                "name": exercise.name,
-                                "description": exercise.description,
-                                "difficulty_level": exercise.difficulty_level,
-                                "target_muscle": exercise.target_muscle,
-                                "video_url": exercise.video_url,
-                            }
-                            for exercise in session.exercises.all()
-                        ],
-                        "meals": [
-                            {
-                                "id": meal.id,
-                                "type": meal.meal_type,
-                                "food_name": meal.food_name,
-                                "calories": meal.calories,
-                                "water_content": meal.water_content,
-                                "preparation_time": meal.preparation_time,
-                                "is_completed": self._is_meal_completed(request.user, session, meal),
-                                "preparations": [
-                                    {
-                                        "id": preparation.id,
-                                        "name": preparation.name,
-                                        "description": preparation.description,
-                                        "preparation_time": preparation.preparation_time,
-                                    }
-                                    for preparation in meal.preparations.all()
-                                ],
-                            }
-                            for meal in session.meals.all()
-                        ],
-                    }
-                    for session in sessions
-                ],
+                "program": program_data,
+                "sessions": [self._with_completions(session, *completions) for session in sessions],
             }
 
-            return Response(response_data, status=status.HTTP_200_OK)
+            return Response(response_data, status=status.HTTP_200_OK, headers={'ETag': etag})
         except Exception as e:
             return Response(
                 {"error": f"Xato yuz berdi: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    def _is_session_completed(self, user, session):
-        """Helper method to check if a session is completed."""
-        completion = SessionCompletion.objects.filter(user=user, session=session).first()
-        return completion.is_completed if completion else False
+    def _completion_maps(self, user, program_id, session_ids=None):
+        """
+        Completion flags of the user's sessions and meals in the program, in two queries.
+
+        Returns {session_id: is_completed} and {(session_id, meal_id): is_completed},
+        limited to ``session_ids`` when given.
+        """
+        session_completions = SessionCompletion.objects.filter(user=user, session__program_id=program_id)
+        meal_completions = MealCompletion.objects.filter(user=user, session__program_id=program_id)
+        if session_ids is not None:
+            session_completions = session_completions.filter(session_id__in=session_ids)
+            meal_completions = meal_completions.filter(session_id__in=session_ids)
+
+        completed_sessions = dict(session_completions.values_list('session_id', 'is_completed'))
+        completed_meals = {
+            (session_id, meal_id): is_completed
+            for session_id, meal_id, is_completed in meal_completions.values_list(
+                'session_id', 'meal_id', 'is_completed'
+            )
+        }
+        return completed_sessions, completed_meals
+
+    def _with_completions(self, session, completed_sessions, completed_meals):
+        """Copy of a skeleton session with the user's completion flags merged in."""
+        return {
+            **session,
+            "is_completed": completed_sessions.get(session["id"], False),
+            "meals": [
+                {**meal, "is_completed": completed_meals.get((session["id"], meal["id"]), False)}
+                for meal in session["meals"]
+            ],
+        }
+
+    def _stream(self, user, program_id, program_data, chunks):
+        """Encode the payload piece by piece, loading completion flags one chunk of sessions at a time."""
+        def dumps(data):
+            return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
 
-    def _is_meal_completed(self, user, session, meal):
-        """Helper method to check if a meal is completed."""
-        meal_completion = MealCompletion.objects.filter(
-            user=user, session=session, meal=meal
-        ).first()
-        return meal_completion.is_completed if meal_completion else False
+        yield '{"program":' + dumps(program_data) + ',"sessions":['
+        separator = ''
+        for chunk in chunks:
+            completions = self._completion_maps(user, program_id, [session["id"] for session in chunk])
+            for session in chunk:
+                yield separator + dumps(self._with_completions(session, *completions))
+                separator = ','
+        yield ']}'
 
 
 
@@ -682,6 +738,7 @@ class StartSessionView(APIView):
             )
 
         user = request.user
+        ensure_materialized(user)
         session_completion = SessionCompletion.objects.filter(user=user, session_id=session_id).first()
 
         if not session_completion:
@@ -696,9 +753,6 @@ class StartSessionView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        session_completion.start_time = now()
-        session_completion.save()
-
         session = session_completion.session
         session_duration = timedelta(
             hours=session.session_time.hour if session.session_time else 0,
@@ -706,18 +760,22 @@ class StartSessionView(APIView):
             seconds=session.session_time.second if session.session_time else 0,
         )
 
-        def mark_session_complete():
-            session_completion.is_completed = True
-            session_completion.completion_date = now()
-            session_completion.save()
-
-        Timer(session_duration.total_seconds(), mark_session_complete).start()
+        # Sessiya davomiyligi o'tgach run_jobs uni avtomatik yakunlaydi (qayta ishga tushishlarda ham saqlanadi)
+        with transaction.atomic():
+            session_completion.started_at = now()
+            session_completion.save(update_fields=['started_at'])
+            schedule_job(
+                'complete_session',
+                session_completion.started_at + session_duration,
+                key=f'complete_session:{session_completion.pk}',
+                completion_id=session_completion.pk,
+            )
 
         return Response(
             {
                 "message": "Sessiya boshlandi",
-                "start_time": session_completion.start_time,
-                "estimated_end_time": session_completion.start_time + session_duration,
+                "start_time": session_completion.started_at,
+                "estimated_end_time": session_completion.started_at + session_duration,
             },
             status=status.HTTP_200_OK,
         )
@@ -783,9 +841,22 @@ class ProgressView(APIView):
         },
     )
     def post(self, request):
-        query_type = request.data.get("type")
-        date_str = request.data.get("date")
+        return self.progress_response(request, request.data.get("type"), request.data.get("date"))
 
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('type', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=["daily", "weekly"]),
+            openapi.Parameter('date', openapi.IN_QUERY, type=openapi.TYPE_STRING, format="date"),
+        ],
+        responses={200: "Progress response", 304: "Not modified", 400: "Invalid request"},
+    )
+    def get(self, request):
+        """Same as POST, but cacheable: answers 304 when If-None-Match carries the current ETag."""
+        return self.progress_response(
+            request, request.query_params.get("type"), request.query_params.get("date"), conditional=True
+        )
+
+    def progress_response(self, request, query_type, date_str, conditional=False):
         # Validate query_type
         if query_type not in ["daily", "weekly"]:
             return Response(
@@ -798,104 +869,301 @@ class ProgressView(APIView):
             date = parse_date(date_str)
             if not date:
                 raise ValueError
-        except ValueError:
+        except (TypeError, ValueError):
             return Response(
                 {"error": "Invalid date format. Expected 'YYYY-MM-DD'."},
                 status=400,
             )
 
+        # Rows beyond the materialized window are created on first access
+        ensure_materialized(request.user, through=date + timedelta(days=6))
+
+        headers = {}
+        if conditional:
+            # Calories come from the program content, so its version is part of the tag
+            program_ids = UserProgram.objects.filter(user=request.user, is_active=True).values_list(
+                'program_id', flat=True
+            )
+            etag = make_etag(
+                user_data_version(request.user.pk), *map(program_version, sorted(program_ids)),
+                query_type, date,
+            )
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                return not_modified
+            headers['ETag'] = etag
+
         # Calculate progress based on query_type
         if query_type == "daily":
             progress = self.calculate_daily_progress(request.user, date)
         elif query_type == "weekly":
             progress = self.calculate_weekly_progress(request.user, date)
 
-        return Response(progress, status=200)
+        return Response(progress, status=200, headers=headers)
 
     def calculate_daily_progress(self, user, date):
-        completed_sessions = SessionCompletion.objects.filter(
-            user=user,
-            session_date=date,
-        )
+        return {"date": str(date), **self.summarize(user, date, date)}
+
+    def calculate_weekly_progress(self, user, date):
+        week_start = date - timedelta(days=date.weekday())
+        week_end = week_start + timedelta(days=6)
+
+        return {
+            "week_start_date": str(week_start),
+            "week_end_date": str(week_end),
+            **self.summarize(user, week_start, week_end),
+        }
+
+    def summarize(self, user, start, end):
+        """
+        Counts and calorie totals over start..end from the UserProgress rollups, plus the detail lists.
+
+        The totals are an index range scan over one rollup row per day; the
+        detail lists are one joined fetch per completion table.
+        """
+        totals = progress_totals(user, start, end)
+        session_completions = SessionCompletion.objects.filter(user=user, session_date__range=(start, end))
+        meal_completions = MealCompletion.objects.filter(user=user, meal_date__range=(start, end))
+
         sessions = [
             {
-                "id": session.session.id,
-                "calories_burned": float(session.session.calories_burned) if session.is_completed else 0.0,
-                "status": "completed" if session.is_completed else "missed"
+                "id": session_id,
+                "calories_burned": float(calories_burned) if is_completed else 0.0,
+                "status": "completed" if is_completed else "missed"
             }
-            for session in completed_sessions
+            for session_id, is_completed, calories_burned in session_completions.values_list(
+                'session_id', 'is_completed', 'session__calories_burned'
+            )
         ]
-
-        completed_meals = MealCompletion.objects.filter(
-            user=user,
-            meal_date=date,
-        )
         meals = [
             {
-                "id": meal.meal.id,
-                "calories": float(meal.meal.calories) if meal.is_completed else 0.0,
-                "status": "completed" if meal.is_completed else "missed"
+                "id": meal_id,
+                "calories": float(calories) if is_completed else 0.0,
+                "status": "completed" if is_completed else "missed"
             }
-            for meal in completed_meals
+            for meal_id, is_completed, calories in meal_completions.values_list(
+                'meal_id', 'is_completed', 'meal__calories'
+            )
         ]
 
-        total_calories_burned = sum(session["calories_burned"] for session in sessions)
-        total_calories_gained = sum(meal["calories"] for meal in meals)
-
         return {
-            "date": str(date),
-            "completed_sessions_count": sum(1 for session in sessions if session["status"] == "completed"),
-            "missed_sessions_count": sum(1 for session in sessions if session["status"] == "missed"),
-            "total_calories_burned": total_calories_burned,
-            "completed_meals_count": sum(1 for meal in meals if meal["status"] == "completed"),
-            "missed_meals_count": sum(1 for meal in meals if meal["status"] == "missed"),
-            "calories_gained": total_calories_gained,
+            "completed_sessions_count": totals["completed_sessions"],
+            "missed_sessions_count": totals["missed_sessions"],
+            "total_calories_burned": float(totals["total_calories_burned"]),
+            "completed_meals_count": totals["completed_meals"],
+            "missed_meals_count": totals["missed_meals"],
+            "calories_gained": float(totals["calories_gained"]),
             "sessions": sessions,
             "meals": meals,
         }
 
-    def calculate_weekly_progress(self, user, date):
-        week_start = date - timedelta(days=date.weekday())
-        week_end = week_start + timedelta(days=6)
 
-        completed_sessions = SessionCompletion.objects.filter(
-            user=user,
-            session_date__range=(week_start, week_end),
-        )
-        sessions = [
-            {
-                "id": session.session.id,
-                "calories_burned": float(session.session.calories_burned) if session.is_completed else 0.0,
-                "status": "completed" if session.is_completed else "missed"
-            }
-            for session in completed_sessions
-        ]
+class ProgressRangeView(APIView):
+    """Progress over an arbitrary date range as a dense day, week or month series."""
+    permission_classes = [IsAuthenticated]
+    max_range_days = 3 * 366
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('start', openapi.IN_QUERY, type=openapi.TYPE_STRING, format="date", required=True),
+            openapi.Parameter('end', openapi.IN_QUERY, type=openapi.TYPE_STRING, format="date", required=True),
+            openapi.Parameter('bucket', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              enum=list(PROGRESS_BUCKETS), default="day"),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Progress series",
+                examples={
+                    "application/json": {
+                        "start": "2024-11-01",
+                        "end": "2024-11-30",
+                        "bucket": "week",
+                        "series": [
+                            {
+                                "period_start": "2024-10-28",
+                                "completed_sessions_count": 2,
+                                "missed_sessions_count": 1,
+                                "total_calories_burned": 350.5,
+                                "completed_meals_count": 8,
+                                "missed_meals_count": 4,
+                                "calories_gained": 4200.0,
+                            }
+                        ],
+                    }
+                },
+            ),
+            304: "Not modified",
+            400: "Invalid request",
+        },
+    )
+    def get(self, request):
+        bucket = request.query_params.get("bucket", "day")
+        if bucket not in PROGRESS_BUCKETS:
+            return Response(
+                {"error": "Invalid bucket. Expected 'day', 'week' or 'month'."},
+                status=400,
+            )
 
-        completed_meals = MealCompletion.objects.filter(
-            user=user,
-            meal_date__range=(week_start, week_end),
+        try:
+            start = parse_date(request.query_params.get("start"))
+            end = parse_date(request.query_params.get("end"))
+            if not start or not end:
+                raise ValueError
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "Invalid date format. Expected 'YYYY-MM-DD' for start and end."},
+                status=400,
+            )
+        if start > end or (end - start).days >= self.max_range_days:
+            return Response(
+                {"error": f"end must not precede start and the range must be under {self.max_range_days} days."},
+                status=400,
+            )
+
+        # Rows beyond the materialized window are created on first access
+        ensure_materialized(request.user, through=end)
+
+        program_ids = UserProgram.objects.filter(user=request.user, is_active=True).values_list(
+            'program_id', flat=True
         )
-        meals = [
+        etag = make_etag(
+            user_data_version(request.user.pk), *map(program_version, sorted(program_ids)),
+            start, end, bucket,
+        )
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        series = [
             {
-                "id": meal.meal.id,
-                "calories": float(meal.meal.calories) if meal.is_completed else 0.0,
-                "status": "completed" if meal.is_completed else "missed"
+                "period_start": str(point["period_start"]),
+                "completed_sessions_count": point["completed_sessions"],
+                "missed_sessions_count": point["missed_sessions"],
+                "total_calories_burned": float(point["total_calories_burned"]),
+                "completed_meals_count": point["completed_meals"],
+                "missed_meals_count": point["missed_meals"],
+                "calories_gained": float(point["calories_gained"]),
             }
-            for meal in completed_meals
+            for point in progress_series(request.user, start, end, bucket)
         ]
+        return Response(
+            {"start": str(start), "end": str(end), "bucket": bucket, "series": series},
+            status=200,
+            headers={'ETag': etag},
+        )
 
-        total_calories_burned = sum(session["calories_burned"] for session in sessions)
-        total_calories_gained = sum(meal["calories"] for meal in meals)
 
-        return {
-            "week_start_date": str(week_start),
-            "week_end_date": str(week_end),
-            "completed_sessions_count": sum(1 for session in sessions if session["status"] == "completed"),
-            "missed_sessions_count": sum(1 for session in sessions if session["status"] == "missed"),
-            "total_calories_burned": total_calories_burned,
-            "completed_meals_count": sum(1 for meal in meals if meal["status"] == "completed"),
-            "missed_meals_count": sum(1 for meal in meals if meal["status"] == "missed"),
-            "calories_gained": total_calories_gained,
-            "sessions": sessions,
-            "meals": meals,
-        }
+class CompletionSyncView(APIView):
+    """Replay of completions made offline: many session and meal events in one request."""
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        request_body=CompletionSyncSerializer,
+        responses={
+            200: openapi.Response(
+                description="Per-event results, in request order",
+                examples={
+                    "application/json": {
+                        "results": [
+                            {"index": 0, "status": "completed"},
+                            {"index": 1, "status": "already_completed"},
+                            {"index": 2, "status": "invalid", "errors": {"session_id": ["This field is required."]}},
+                        ]
+                    }
+                },
+            ),
+            400: "Invalid request",
+        },
+    )
+    def post(self, request):
+        serializer = CompletionSyncSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        results = []
+        events = []
+        for index, raw_event in enumerate(serializer.validated_data["events"]):
+            event = CompletionEventSerializer(data=raw_event)
+            if event.is_valid():
+                events.append(event.validated_data)
+                results.append({"index": index})
+            else:
+                results.append({"index": index, "status": "invalid", "errors": event.errors})
+
+        ensure_materialized(request.user)
+        statuses = iter(completions.apply_completion_events(request.user, events))
+        for result in results:
+            if "status" not in result:
+                result["status"] = next(statuses)
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class SyncView(APIView):
+    """
+    Delta sync: rows created, updated or deleted since the client's last token.
+
+    Without ``since`` only the current token is returned; a client fetches
+    everything once through the regular endpoints and syncs from that token.
+    """
+    permission_classes = [IsAuthenticated]
+
+    # Collection -> serializer and queryset of the rows the user may see
+    collections = {
+        Program: (ProgramSerializer, lambda user: Program.objects.all()),
+        Session: (SessionSerializer, lambda user: Session.objects.prefetch_related('exercises', 'meals')),
+        Exercise: (ExerciseSerializer, lambda user: Exercise.objects.all()),
+        Meal: (MealSerializer, lambda user: Meal.objects.all()),
+        Preparation: (PreparationSerializer, lambda user: Preparation.objects.all()),
+        UserProgram: (UserProgramSerializer, lambda user: UserProgram.objects.filter(user=user)),
+        SessionCompletion: (SessionCompletionSerializer, lambda user: SessionCompletion.objects.filter(user=user)),
+        MealCompletion: (
+            MealCompletionSerializer, lambda user: MealCompletion.objects.filter(user=user).select_related('meal')
+        ),
+    }
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('since', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Token returned by the previous sync"),
+            openapi.Parameter('lang', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Changed rows by collection, deleted ids and the next token",
+                examples={
+                    "application/json": {
+                        "token": "1042",
+                        "has_more": False,
+                        "changes": {"meals": [{"id": 7, "food_name": "Oatmeal"}], "meal_completions": []},
+                        "deleted": {"preparations": [12]},
+                    }
+                },
+            ),
+            400: "Invalid token",
+        },
+    )
+    def get(self, request):
+        since = request.query_params.get("since")
+        if since is None:
+            return Response({"token": str(changelog.current_token()), "has_more": False, "changes": {}, "deleted": {}})
+        if not since.isdigit():
+            return Response({"error": "Invalid sync token."}, status=status.HTTP_400_BAD_REQUEST)
+
+        token, upserts, deletes, has_more = changelog.changes_since(request.user, int(since))
+        context = {"request": request, "language": request.query_params.get("lang", request.user.language)}
+
+        changes = {}
+        deleted = {}
+        for model, (serializer_class, queryset) in self.collections.items():
+            name, _per_user = changelog.SYNCED_MODELS[model]
+            rows = list(queryset(request.user).filter(pk__in=upserts[model])) if upserts.get(model) else []
+            changes[name] = serializer_class(rows, many=True, context=context).data
+            # Rows updated and then deleted are reported as deleted
+            missing = upserts.get(model, set()) - {row.pk for row in rows}
+            deleted[name] = sorted(deletes.get(model, set()) | missing)
+
+        return Response(
+            {"token": str(token), "has_more": has_more, "changes": changes, "deleted": deleted},
+            status=status.HTTP_200_OK,
+        )
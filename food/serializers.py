@@ -1,20 +1,12 @@
 from rest_framework import serializers
 from django.utils.translation import gettext_lazy as _
 from users_app.models import Preparation, Meal, MealCompletion, Session
-from googletrans import Translator
+from exercise.serializers import translate_field
 
-# Initialize the Google Translator
-translator = Translator()
+def meal_type_label(meal, language):
+    """Stored meal_type_{language}, falling back to the English choice label."""
+    return getattr(meal, f'meal_type_{language}', None) or meal.get_meal_type_display()
 
-def translate_text(text, target_language):
-    """Translate the text to the specified language using Google Translate."""
-    try:
-        translation = translator.translate(text, dest=target_language)
-        return translation.text
-    except Exception as e:
-        # Log the error and return the original text if translation fails
-        print(f"Translation error: {e}")
-        return text
 
 class MealSerializer(serializers.ModelSerializer):
     session_date = serializers.DateField(source='session.scheduled_date', read_only=True)
@@ -32,17 +24,9 @@ class MealSerializer(serializers.ModelSerializer):
         data = super().to_representation(instance)
         language = self.context.get("language", "en")  # Get language from context, default to 'en'
 
-        # Translate meal type choices
-        meal_type_translations = {
-            'breakfast': translate_text('Breakfast', language),
-            'lunch': translate_text('Lunch', language),
-            'snack': translate_text('Snack', language),
-            'dinner': translate_text('Dinner', language)
-        }
-
-        # Apply translations for meal type and food name
-        data['meal_type'] = meal_type_translations.get(instance.meal_type, instance.meal_type)
-        data['food_name'] = translate_text(instance.food_name, language)
+        # Render from the columns filled by Meal.save(), never from the translator
+        data['meal_type'] = meal_type_label(instance, language)
+        data['food_name'] = translate_field(instance, 'food_name', language)
 
         return data
 
@@ -57,12 +41,18 @@ class MealCompletionSerializer(serializers.ModelSerializer):
         read_only_fields = ['completion_date']
 
 
+    def update(self, instance, validated_data):
+        # A moved meal is reminded again at its new time
+        if 'meal_time' in validated_data and validated_data['meal_time'] != instance.meal_time:
+            instance.reminder_sent = False
+        return super().update(instance, validated_data)
+
     def to_representation(self, instance):
         data = super().to_representation(instance)
         language = self.context.get("language", "en")
 
 
-        data['meal_name'] = translate_text(instance.meal.food_name, language)
+        data['meal_name'] = translate_field(instance.meal, 'food_name', language)
 
         return data
 
@@ -81,21 +71,6 @@ class PreparationSerializer(serializers.ModelSerializer):
             'preparation_time': {'label': _("Preparation Time"), 'required': True},
         }
 
-    def create(self, validated_data):
-        # Automatically translate missing fields if they are not provided
-        name = validated_data.get('name', '')
-        description = validated_data.get('description', '')
-
-        validated_data['name_uz'] = translate_text(name, 'uz')
-        validated_data['name_ru'] = translate_text(name, 'ru')
-        validated_data['name_en'] = translate_text(name, 'en')
-
-        validated_data['description_uz'] = translate_text(description, 'uz')
-        validated_data['description_ru'] = translate_text(description, 'ru')
-        validated_data['description_en'] = translate_text(description, 'en')
-
-        return super().create(validated_data)
-
     def to_representation(self, instance):
         data = super().to_representation(instance)
         language = self.context.get('language', 'en')
@@ -1,3 +1,111 @@
+from datetime import date, time
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from food.serializers import MealSerializer, MealCompletionSerializer
+from food.views import CompleteMealView, MealViewSet
+from users_app.models import Meal, MealCompletion, Program, Session, User, UserProgress
+from users_app.testing import create_meal
+from users_app.translation import translation_service
+
+
+class MealRenderingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('meals@example.com', 'password')
+        self.meals = [create_meal() for _ in range(20)]
+        translate_patcher = mock.patch.object(
+            translation_service.backend, 'translate',
+            side_effect=AssertionError("Meal rendering must not call the translator"),
+        )
+        self.translate = translate_patcher.start()
+        self.addCleanup(translate_patcher.stop)
+
+    def test_meal_serializer_uses_stored_translations(self):
+        data = MealSerializer(self.meals, many=True, context={'language': 'ru'}).data
+        self.assertEqual(data[0]['food_name'], 'Овсянка')
+        self.assertEqual(data[0]['meal_type'], 'Завтрак')
+        self.translate.assert_not_called()
+
+    def test_meal_serializer_falls_back_to_source_values(self):
+        meal = self.meals[0]
+        Meal.objects.filter(pk=meal.pk).update(food_name_uz=None, meal_type_uz=None)
+        meal.refresh_from_db()
+
+        data = MealSerializer(meal, context={'language': 'uz'}).data
+        self.assertEqual(data['food_name'], 'Oatmeal')
+        self.assertEqual(data['meal_type'], 'Breakfast')
+
+        data = MealSerializer(meal, context={'language': 'de'}).data
+        self.assertEqual(data['food_name'], 'Oatmeal')
+        self.assertEqual(data['meal_type'], 'Breakfast')
+
+    def test_meal_completion_serializer_uses_stored_translations(self):
+        program = Program.objects.create(
+            frequency_per_week=3, program_goal='Lose weight', program_goal_uz='Ozish',
+            program_goal_ru='Похудение', program_goal_en='Lose weight',
+        )
+        session = Session.objects.create(program=program, session_number=1)
+        completion = MealCompletion.objects.create(user=self.user, session=session, meal=self.meals[0])
+
+        data = MealCompletionSerializer(completion, context={'language': 'uz'}).data
+        self.assertEqual(data['meal_name'], "Suli bo'tqasi")
+        self.translate.assert_not_called()
+
+    def test_moving_a_meal_resets_its_reminder(self):
+        program = Program.objects.create(frequency_per_week=3, program_goal='Lose weight')
+        session = Session.objects.create(program=program, session_number=1)
+        completion = MealCompletion.objects.create(
+            user=self.user, session=session, meal=self.meals[0], meal_time=time(8, 0), reminder_sent=True,
+        )
+
+        for meal_time, reminder_sent in (('08:00', True), ('13:00', False)):
+            serializer = MealCompletionSerializer(completion, data={'meal_time': meal_time}, partial=True)
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+            serializer.save()
+            completion.refresh_from_db()
+            self.assertEqual(completion.reminder_sent, reminder_sent)
+
+    def test_meal_list_makes_no_outbound_requests(self):
+        request = APIRequestFactory().get('/api/food/api/meals/', {'lang': 'uz'})
+        force_authenticate(request, user=self.user)
+
+        with mock.patch('httpx.Client.send', side_effect=AssertionError("Outbound request")) as send:
+            response = MealViewSet.as_view({'get': 'list'})(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['meals']), 20)
+        self.assertEqual(response.data['meals'][0]['meal_type'], 'Nonushta')
+        send.assert_not_called()
+        self.translate.assert_not_called()
+
+
+class CompleteMealViewTests(TestCase):
+    def complete(self, user, session_id, meal_id):
+        request = APIRequestFactory().post(
+            '/api/exercise/api/meal/complete/', {'session_id': session_id, 'meal_id': meal_id}, format='json'
+        )
+        force_authenticate(request, user=user)
+        return CompleteMealView.as_view()(request)
+
+    def test_meal_is_completed_once(self):
+        user = User.objects.create_user('meal@example.com', 'password')
+        program = Program.objects.create(
+            frequency_per_week=3, program_goal='Lose weight', program_goal_uz='Ozish',
+            program_goal_ru='Похудение', program_goal_en='Lose weight',
+        )
+        session = Session.objects.create(program=program, session_number=1)
+        meal = create_meal()
+        MealCompletion.objects.create(user=user, session=session, meal=meal, meal_date=date.today())
+
+        response = self.complete(user, session.pk, meal.pk)
+        self.assertEqual(response.data, {"message": "Taom muvaffaqiyatli bajarildi."})
+        response = self.complete(user, session.pk, meal.pk)
+        self.assertEqual(response.data, {"message": "Ushbu taom allaqachon bajarilgan."})
+        self.assertEqual(self.complete(user, session.pk, meal.pk + 1).status_code, 404)
 
-# Create your tests here.
+        completion = MealCompletion.objects.get(user=user)
+        self.assertTrue(completion.is_completed)
+        self.assertEqual(completion.completion_date, date.today())
+        self.assertEqual(UserProgress.objects.get(user=user).calories_gained, 350)
@@ -1,7 +1,4 @@
-from datetime import datetime, timedelta
-
 from django.shortcuts import render
-from django.utils import timezone
 from rest_framework.exceptions import NotAuthenticated
 from rest_framework.views import APIView
 from django.utils.timezone import now
@@ -15,25 +12,14 @@ from food.serializers import MealSerializer, MealCompletionSerializer
 from exercise.permissions import IsAdminOrReadOnly
 from django.utils.translation import gettext_lazy as _
 from drf_yasg.utils import swagger_auto_schema
-from googletrans import Translator
 from rest_framework.decorators import action
+from users_app.translation import translate_instance
+from users_app import completions
+from users_app.enrollment import ensure_materialized
 
 from  food.serializers import  *
 
 
-
-translator = Translator()
-
-def translate_text(text, target_language):
-    try:
-        translation = translator.translate(text, dest=target_language)
-        return translation.text
-    except Exception as e:
-        # If there's an error, return the original text
-        print(f"Translation error: {e}")
-        return text
-
-
 class MealViewSet(viewsets.ModelViewSet):
     queryset = Meal.objects.all()
     serializer_class = MealSerializer
@@ -99,7 +85,7 @@ class MealCompletionViewSet(viewsets.ModelViewSet):
         # If the view is accessed by Swagger or the user is not authenticated, return an empty queryset
         if getattr(self, 'swagger_fake_view', False) or not self.request.user.is_authenticated:
             return MealCompletion.objects.none()
-        return MealCompletion.objects.filter(user=self.request.user)
+        return MealCompletion.objects.filter(user=self.request.user).select_related('meal')
 
     def get_serializer_context(self):
         # Use 'lang' query parameter to determine language, with 'en' as the default
@@ -109,6 +95,7 @@ class MealCompletionViewSet(viewsets.ModelViewSet):
     @swagger_auto_schema(tags=['Meal Completions'],
                          operation_description=_("List all meal completions for the authenticated user"))
     def list(self, request, *args, **kwargs):
+        ensure_materialized(request.user)
         queryset = self.get_queryset()
         serializer = self.get_serializer(queryset, many=True)
         return Response({"meal_completions": serializer.data})
@@ -165,20 +152,6 @@ class MealCompletionViewSet(viewsets.ModelViewSet):
             return Response({"message": "Meal completion record partially updated successfully", "meal_completion": serializer.data})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    def schedule_reminder(self, meal_completion):
-        """
-        Schedules a reminder for a meal based on the user's preferred reminder time offset.
-        """
-        user_reminder_offset = getattr(self.request.user, 'reminder_time', None)
-        if meal_completion.meal and meal_completion.meal.scheduled_time and user_reminder_offset:
-            meal_time = meal_completion.meal.scheduled_time
-            reminder_time = datetime.combine(timezone.now().date(), meal_time) - timedelta(
-                minutes=user_reminder_offset.minute)
-
-            # Placeholder for scheduling logic
-            # Implement your logic to actually schedule the reminder (e.g., using Celery or Django signals)
-            print(f"Reminder scheduled at {reminder_time} for meal at {meal_time}")
-
     @swagger_auto_schema(tags=['Meal Completions'], operation_description=_("Delete a meal completion record"))
     def destroy(self, request, pk=None, *args, **kwargs):
         meal_completion = self.get_object()
@@ -222,22 +195,8 @@ class PreparationViewSet(viewsets.ModelViewSet):
     def translate_fields(self, request, pk=None):
         preparation = self.get_object()
 
-        # Translate fields if they are missing
-        if not preparation.name_uz:
-            preparation.name_uz = translate_text(preparation.name, 'uz')
-        if not preparation.name_ru:
-            preparation.name_ru = translate_text(preparation.name, 'ru')
-        if not preparation.name_en:
-            preparation.name_en = translate_text(preparation.name, 'en')
-
-        if not preparation.description_uz:
-            preparation.description_uz = translate_text(preparation.description, 'uz')
-        if not preparation.description_ru:
-            preparation.description_ru = translate_text(preparation.description, 'ru')
-        if not preparation.description_en:
-            preparation.description_en = translate_text(preparation.description, 'en')
-
-        preparation.save()
+        # Translate missing fields now instead of waiting for the background worker
+        translate_instance(Preparation, preparation.pk)
         return Response({"message": _("Fields translated successfully.")}, status=status.HTTP_200_OK)
 
 
@@ -260,24 +219,17 @@ class CompleteMealView(APIView):
             session_id = serializer.validated_data.get('session_id')
             meal_id = serializer.validated_data.get('meal_id')
 
-            # MealCompletion obyektini topish
-            meal_completion = MealCompletion.objects.filter(
-                session_id=session_id,
-                meal_id=meal_id,
-                user=request.user
-            ).first()
+            ensure_materialized(request.user)
 
-            if not meal_completion:
+            # MealCompletionni bitta shartli UPDATE bilan bajarilgan deb belgilash
+            result = completions.complete_meal(request.user, session_id, meal_id)
+
+            if result == completions.NOT_FOUND:
                 return Response({"error": "Session va Meal kombinatsiyasi topilmadi."}, status=404)
 
-            if meal_completion.is_completed:
+            if result == completions.ALREADY_COMPLETED:
                 return Response({"message": "Ushbu taom allaqachon bajarilgan."}, status=200)
 
-            # MealCompletionni bajarilgan deb belgilash
-            meal_completion.is_completed = True
-            meal_completion.completion_date = now().date()
-            meal_completion.save()
-
             return Response({"message": "Taom muvaffaqiyatli bajarildi."}, status=200)
 
         return Response(serializer.errors, status=400)
\ No newline at end of file
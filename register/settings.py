@@ -188,6 +188,15 @@ SIMPLE_JWT = {
 
 
 
+# Only keep SessionCompletion/MealCompletion rows this many days ahead of today.
+# The rest of a program is materialized by the extend_completion_windows command
+# (run nightly) or on first access. None materializes whole programs at enrollment.
+# With a window set, progress for days past it reads as empty until they come
+# within reach (at most two windows ahead of today), so it is off by default.
+COMPLETION_WINDOW_DAYS = None
+
+
+
 #eskiz uchun
 
 # Eskiz API Configuration
@@ -201,9 +210,17 @@ CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
-
-
+    },
+    # Program plan and user data versions (users_app.versions). They are bumped by
+    # every process: web workers, run_jobs, the translation worker and the management
+    # commands, so this cache must be shared between processes; a per-process backend
+    # would serve stale plans and 304s. Plans and skeletons stay in 'default', keyed
+    # by version. The database cache needs `manage.py createcachetable` once; Redis
+    # (django.core.cache.backends.redis.RedisCache) serves it faster where available.
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'version_cache',
+    },
 }
 
 SWAGGER_SETTINGS = {
@@ -226,7 +243,16 @@ SWAGGER_SETTINGS = {
 
 
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Requests only enqueue; a background thread delivers over QUEUED_EMAIL_BACKEND (see users_app.mail).
+# The queue is in process memory: mail not yet delivered when a worker is killed is lost,
+# and SMTP errors are logged rather than raised to the view that sent the mail.
+EMAIL_BACKEND = 'users_app.mail.QueuedEmailBackend'
+QUEUED_EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_QUEUE_BATCH_SIZE = 100  # Messages taken off the queue per batch
+EMAIL_QUEUE_MAX_ATTEMPTS = 5  # Attempts per message before it is dropped
+EMAIL_QUEUE_RETRY_DELAY = 2  # Seconds before the first retry, doubled on each further one
+EMAIL_QUEUE_IDLE_TIMEOUT = 30  # Seconds without mail before the SMTP connection is closed
+EMAIL_QUEUE_FLUSH_TIMEOUT = 30  # Seconds a finishing process waits for queued mail
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
@@ -239,9 +265,25 @@ DEFAULT_FROM_EMAIL = 'sohajon2005@gmail.com'
 
 #google translate settings
 
+# Translation backend: users_app.translation.GoogleTranslateBackend (network) or
+# users_app.translation.LocalDictionaryBackend (offline, reads TRANSLATION_DICTIONARY)
+TRANSLATION_BACKEND = 'users_app.translation.GoogleTranslateBackend'
+TRANSLATION_DICTIONARY = None  # {language: {text: translation}} or path to a JSON file
+TRANSLATION_TIMEOUT = 5  # Hard deadline per backend call, in seconds
+TRANSLATION_MAX_CONCURRENCY = 4  # Backend calls allowed in flight at once; timed-out calls no longer count
+TRANSLATION_BREAKER_THRESHOLD = 5  # Consecutive failures before failing fast
+TRANSLATION_BREAKER_RESET = 60  # Seconds before a trial call is let through again
+
+# Number of translations kept in the in-process LRU in front of the TranslationCache table
+TRANSLATION_CACHE_SIZE = 10000
+
 
 # settings.py
 LANGUAGE_CODE = 'uz'
+
+# Compiled message catalogs for fixed API messages.
+# Rebuild after editing the .po files with: python manage.py compile_catalogs
+LOCALE_PATHS = [BASE_DIR / 'locale']
 LANGUAGES = [
     ('en', _('English')),
     ('ru', _('Russian')),
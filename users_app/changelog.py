@@ -0,0 +1,91 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from users_app.models import (
+    ChangeLog, Exercise, Meal, MealCompletion, Preparation, Program, Session, SessionCompletion, UserProgram,
+)
+
+# Synced models: collection name in the sync payload and whether rows belong to a user
+SYNCED_MODELS = {
+    Program: ('programs', False),
+    Session: ('sessions', False),
+    Exercise: ('exercises', False),
+    Meal: ('meals', False),
+    Preparation: ('preparations', False),
+    UserProgram: ('user_programs', True),
+    SessionCompletion: ('session_completions', True),
+    MealCompletion: ('meal_completions', True),
+}
+
+# Entries younger than this are not served yet, so a transaction that took
+# its id earlier but commits later is not skipped by a client's token.
+SETTLE_TIME = timedelta(seconds=5)
+# created_at is the insert time, not the commit time: a transaction open
+# longer than SETTLE_TIME (a bulk enrollment, say) commits entries below
+# tokens already handed out. Entries this recent are served again behind
+# the token, so such late commits reach a client polling within RESCAN_TIME
+# of the insert; transactions open longer than that can still be missed.
+RESCAN_TIME = timedelta(seconds=60)
+PAGE_SIZE = 1000
+
+
+def record(model, pks, action=ChangeLog.ACTION_UPSERT, user_id=None):
+    """Append one change-log entry per primary key."""
+    ChangeLog.objects.bulk_create(
+        [
+            ChangeLog(model=model._meta.label_lower, object_id=pk, action=action, user_id=user_id)
+            for pk in pks
+        ],
+        batch_size=500,
+    )
+
+
+def record_queryset(queryset, user_id=None):
+    """Record upserts for every row of ``queryset``; used after update()/bulk_create()."""
+    record(queryset.model, list(queryset.values_list('pk', flat=True)), user_id=user_id)
+
+
+def current_token():
+    """Token to start from after a full download; settled entries only, so nothing is skipped."""
+    settled = ChangeLog.objects.filter(created_at__lte=timezone.now() - SETTLE_TIME)
+    return settled.aggregate(token=Max('id'))['token'] or 0
+
+
+def changes_since(user, since, limit=PAGE_SIZE):
+    """
+    Changes visible to ``user`` after token ``since``.
+
+    Returns (token, upserts, deletes, has_more); upserts and deletes map a
+    model class to primary keys, with the latest action of each row winning.
+    Entries at or below the token inserted within RESCAN_TIME are included
+    again, outside the page limit, so rows of a late commit are not skipped.
+    """
+    now = timezone.now()
+    visible = ChangeLog.objects.filter(Q(user__isnull=True) | Q(user=user)).order_by('id')
+    entries = list(
+        visible.filter(id__gt=since, created_at__lte=now - SETTLE_TIME)
+        .values_list('id', 'model', 'object_id', 'action')[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    token = entries[-1][0] if entries else since
+    rescanned = list(
+        visible.filter(id__lte=since, created_at__gt=now - RESCAN_TIME)
+        .values_list('id', 'model', 'object_id', 'action')
+    ) if since else []
+
+    models = {model._meta.label_lower: model for model in SYNCED_MODELS}
+    latest = {}
+    for _id, label, object_id, action in rescanned + entries:
+        if label in models:
+            latest[models[label], object_id] = action
+
+    upserts = defaultdict(set)
+    deletes = defaultdict(set)
+    for (model, object_id), action in latest.items():
+        (deletes if action == ChangeLog.ACTION_DELETE else upserts)[model].add(object_id)
+
+    return token, upserts, deletes, has_more
@@ -0,0 +1,159 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from users_app.changelog import record as record_change
+from users_app.models import MealCompletion, SessionCompletion
+from users_app.progress import count_completion, refresh_progress
+from users_app.versions import bump_user_data_version
+
+COMPLETED = 'completed'
+NOT_FOUND = 'not_found'
+ALREADY_COMPLETED = 'already_completed'
+NOT_DUE = 'not_due'
+NOT_NEXT = 'not_next'
+
+
+def _completed(user, completion, date_field, calories_field):
+    # update() skips post_save, so the rollup, the data version and the change log are maintained here
+    pk, day, program_id, calories = completion.values_list(
+        'pk', date_field, 'session__program_id', calories_field
+    ).first()
+    count_completion(user.pk, completion.model, program_id, day, calories)
+    bump_user_data_version(user.pk)
+    record_change(completion.model, [pk], user_id=user.pk)
+
+
+def complete_session(user, session_id):
+    """
+    Mark the user's session complete with a single conditional UPDATE.
+
+    The row only changes while it is still open, due today or earlier and
+    the next open session in order; the affected row count decides the
+    outcome, so concurrent requests cannot both succeed. Failures are
+    explained with one extra read. A success also reads the row back, moves
+    it to the completed column of the day's rollup under the user lock and
+    logs the change: five queries in all. Returns one of the module constants.
+    """
+    today = timezone.now().date()
+    completion = SessionCompletion.objects.filter(user=user, session_id=session_id)
+    earlier_open = SessionCompletion.objects.filter(
+        user=user, is_completed=False, session_date__lte=today
+    ).filter(
+        Q(session_date__lt=OuterRef('session_date'))
+        | Q(session_date=OuterRef('session_date'), session_number_private__lt=OuterRef('session_number_private'))
+    )
+
+    with transaction.atomic():
+        updated = completion.filter(is_completed=False, session_date__lte=today).filter(
+            ~Exists(earlier_open)
+        ).update(is_completed=True, completion_date=today)
+        if updated:
+            _completed(user, completion, 'session_date', 'session__calories_burned')
+            return COMPLETED
+
+    row = completion.values('is_completed', 'session_date').first()
+    if row is None:
+        return NOT_FOUND
+    if row['is_completed']:
+        return ALREADY_COMPLETED
+    if row['session_date'] is None or row['session_date'] > today:
+        return NOT_DUE
+    return NOT_NEXT
+
+
+def complete_meal(user, session_id, meal_id):
+    """Mark the user's meal complete with a single conditional UPDATE; see complete_session()."""
+    completion = MealCompletion.objects.filter(user=user, session_id=session_id, meal_id=meal_id)
+
+    with transaction.atomic():
+        updated = completion.filter(is_completed=False).update(
+            is_completed=True, completion_date=timezone.now().date()
+        )
+        if updated:
+            _completed(user, completion, 'meal_date', 'meal__calories')
+            return COMPLETED
+
+    return ALREADY_COMPLETED if completion.exists() else NOT_FOUND
+
+
+def apply_completion_events(user, events):
+    """
+    Apply a batch of offline completion events in one transaction.
+
+    ``events`` are dicts with ``type`` ('session' or 'meal'), ``session_id``,
+    ``meal_id`` (meals only) and ``completed_at``, the client timestamp.
+    Rows are loaded and locked with two queries, checked with the same rules
+    as complete_session() and complete_meal() as of the client timestamp,
+    and written back with bulk_update. Returns one module constant per event,
+    in the order given.
+    """
+    today = timezone.localdate()
+    results = [None] * len(events)
+    session_events = [(index, event) for index, event in enumerate(events) if event['type'] == 'session']
+    meal_events = [(index, event) for index, event in enumerate(events) if event['type'] == 'meal']
+
+    with transaction.atomic():
+        # Referenced rows plus every open due session, for the ordering check
+        session_rows = list(
+            SessionCompletion.objects.select_for_update().filter(user=user).filter(
+                Q(session_id__in={event['session_id'] for _index, event in session_events})
+                | Q(is_completed=False, session_date__lte=today)
+            ).order_by('session_date', 'session_number_private')
+        )
+        meal_rows = MealCompletion.objects.select_for_update().filter(
+            user=user,
+            session_id__in={event['session_id'] for _index, event in meal_events},
+            meal_id__in={event['meal_id'] for _index, event in meal_events},
+        )
+
+        sessions = {row.session_id: row for row in session_rows}
+        open_sessions = [
+            row for row in session_rows
+            if not row.is_completed and row.session_date is not None and row.session_date <= today
+        ]
+        next_open = 0
+        changed_sessions = []
+        for index, event in sorted(session_events, key=lambda item: item[1]['completed_at']):
+            row = sessions.get(event['session_id'])
+            day = timezone.localdate(event['completed_at'])
+            if row is None:
+                results[index] = NOT_FOUND
+            elif row.is_completed:
+                results[index] = ALREADY_COMPLETED
+            elif row.session_date is None or row.session_date > day:
+                results[index] = NOT_DUE
+            elif open_sessions[next_open] is not row:
+                results[index] = NOT_NEXT
+            else:
+                row.is_completed = True
+                row.completion_date = day
+                changed_sessions.append(row)
+                next_open += 1
+                results[index] = COMPLETED
+
+        meals = {(row.session_id, row.meal_id): row for row in meal_rows}
+        changed_meals = []
+        for index, event in meal_events:
+            row = meals.get((event['session_id'], event['meal_id']))
+            if row is None:
+                results[index] = NOT_FOUND
+            elif row.is_completed:
+                results[index] = ALREADY_COMPLETED
+            else:
+                row.is_completed = True
+                row.completion_date = timezone.localdate(event['completed_at'])
+                changed_meals.append(row)
+                results[index] = COMPLETED
+
+        SessionCompletion.objects.bulk_update(changed_sessions, ['is_completed', 'completion_date'], batch_size=500)
+        MealCompletion.objects.bulk_update(changed_meals, ['is_completed', 'completion_date'], batch_size=500)
+        if changed_sessions or changed_meals:
+            # bulk_update skips post_save as well
+            days = [row.session_date for row in changed_sessions] + [row.meal_date for row in changed_meals]
+            refresh_progress(user.pk, days)
+            bump_user_data_version(user.pk)
+            record_change(SessionCompletion, [row.pk for row in changed_sessions], user_id=user.pk)
+            record_change(MealCompletion, [row.pk for row in changed_meals], user_id=user.pk)
+
+    return results
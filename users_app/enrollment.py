@@ -0,0 +1,151 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from users_app.changelog import record_queryset
+from users_app.models import MealCompletion, SessionCompletion, UserProgram
+from users_app.plan import get_program_plan
+from users_app.progress import refresh_progress
+from users_app.versions import bump_user_data_version
+
+
+def completion_window():
+    """Days of completion rows kept materialized ahead of today, or None for the whole program."""
+    return getattr(settings, 'COMPLETION_WINDOW_DAYS', None)
+
+
+def load_plan(program_id):
+    """Ordered (session id, session number) pairs and the meal ids of each session."""
+    plan = get_program_plan(program_id)
+    sessions = [(session.id, session.session_number) for session in plan.sessions]
+    meals_by_session = {session.id: session.meal_ids for session in plan.sessions}
+    return sessions, meals_by_session
+
+
+def build_completions(user, sessions, meals_by_session, start_date, first_day, last_day):
+    """Unsaved completion rows for the sessions planned on days first_day..last_day (0-based)."""
+    session_completions = []
+    meal_completions = []
+    for index, (session_id, session_number) in enumerate(sessions):
+        if not first_day <= index <= last_day:
+            continue
+        session_date = start_date + timedelta(days=index)
+        session_completions.append(SessionCompletion(
+            user=user,
+            session_id=session_id,
+            is_completed=False,
+            session_number_private=session_number,
+            session_date=session_date,
+        ))
+        meal_completions.extend(
+            MealCompletion(
+                user=user,
+                session_id=session_id,
+                meal_id=meal_id,
+                is_completed=False,
+                meal_date=session_date,
+            )
+            for meal_id in meals_by_session[session_id]
+        )
+    return session_completions, meal_completions
+
+
+def record_changes(user_id, program_id, first_date, last_date):
+    """Change-log entries for the completion rows bulk-created between the two dates."""
+    rows = {'user_id': user_id, 'session__program_id': program_id}
+    record_queryset(SessionCompletion.objects.filter(session_date__range=(first_date, last_date), **rows), user_id)
+    record_queryset(MealCompletion.objects.filter(meal_date__range=(first_date, last_date), **rows), user_id)
+
+
+def enroll_user(user, program, start_date=None):
+    """
+    Enroll ``user`` in ``program`` with one completion row per session and meal.
+
+    The program plan comes from the plan cache and every row is written with
+    bulk_create inside a single transaction, so the query count does not
+    depend on the length of the program. Session N is planned for day N
+    counted from ``start_date``. With COMPLETION_WINDOW_DAYS set, only the
+    first days of the program are materialized; see materialize_until().
+    """
+    start_date = start_date or timezone.now().date()
+    sessions, meals_by_session = load_plan(program.pk)
+
+    window = completion_window()
+    last_day = len(sessions) - 1 if window is None else min(window, len(sessions)) - 1
+    session_completions, meal_completions = build_completions(
+        user, sessions, meals_by_session, start_date, 0, last_day
+    )
+
+    with transaction.atomic():
+        user_program = UserProgram.objects.create(
+            user=user,
+            program=program,
+            start_date=start_date,
+            end_date=start_date + timedelta(days=len(sessions)),
+            materialized_until=None if window is None else start_date + timedelta(days=last_day),
+        )
+        SessionCompletion.objects.bulk_create(session_completions, batch_size=500)
+        MealCompletion.objects.bulk_create(meal_completions, batch_size=500)
+        record_changes(user.pk, program.pk, start_date, start_date + timedelta(days=last_day))
+        refresh_progress(user.pk, [completion.session_date for completion in session_completions])
+        bump_user_data_version(user.pk)
+
+    return user_program
+
+
+def materialize_until(user_program, until):
+    """
+    Create the missing completion rows of ``user_program`` up to the date ``until``.
+
+    Rows are inserted with ignore_conflicts, so concurrent extensions of the
+    same window are harmless. Returns the number of session rows created.
+    """
+    if user_program.materialized_until is None or user_program.materialized_until >= until:
+        return 0
+
+    sessions, meals_by_session = load_plan(user_program.program_id)
+    first_day = (user_program.materialized_until - user_program.start_date).days + 1
+    last_day = min((until - user_program.start_date).days, len(sessions) - 1)
+    session_completions, meal_completions = build_completions(
+        user_program.user, sessions, meals_by_session, user_program.start_date, first_day, last_day
+    )
+
+    with transaction.atomic():
+        SessionCompletion.objects.bulk_create(session_completions, batch_size=500, ignore_conflicts=True)
+        MealCompletion.objects.bulk_create(meal_completions, batch_size=500, ignore_conflicts=True)
+        UserProgram.objects.filter(pk=user_program.pk, materialized_until__lt=until).update(materialized_until=until)
+        record_changes(
+            user_program.user_id,
+            user_program.program_id,
+            user_program.start_date + timedelta(days=first_day),
+            user_program.start_date + timedelta(days=last_day),
+        )
+        refresh_progress(user_program.user_id, [completion.session_date for completion in session_completions])
+        bump_user_data_version(user_program.user_id)
+    user_program.materialized_until = until
+    return len(session_completions)
+
+
+def ensure_materialized(user, through=None):
+    """
+    Extend the user's active programs so completion rows exist for the window.
+
+    The window runs from today for COMPLETION_WINDOW_DAYS, or further out to
+    ``through`` when given, but never more than one more window ahead: a
+    request for a far-future date must not materialize a whole program.
+    Called on access by the views reading completion rows; costs a single
+    query when nothing is due.
+    """
+    window = completion_window()
+    if window is None:
+        return
+    target = timezone.now().date() + timedelta(days=window - 1)
+    through = min(max(target, through), target + timedelta(days=window)) if through else target
+    due = UserProgram.objects.filter(
+        user=user, is_active=True, materialized_until__lt=through
+    ).filter(materialized_until__lt=F('end_date')).select_related('user')
+    for user_program in due:
+        materialize_until(user_program, min(through, user_program.end_date))
@@ -0,0 +1,112 @@
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from users_app.models import ScheduledJob, SessionCompletion
+
+logger = logging.getLogger(__name__)
+
+JOB_LEASE = timedelta(minutes=5)
+MAX_ATTEMPTS = 5
+
+_handlers = {}
+
+
+def job(name):
+    """Register the decorated function as the handler of jobs called ``name``."""
+    def decorator(func):
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+def schedule(name, run_at, key=None, **payload):
+    """
+    Store a job calling handler ``name`` with ``payload`` once ``run_at`` has passed.
+
+    Jobs with a ``key`` are replaced when scheduled again, so rescheduling
+    moves the job instead of adding a second one.
+    """
+    fields = {
+        'name': name,
+        'payload': payload,
+        'run_at': run_at,
+        'status': ScheduledJob.STATUS_PENDING,
+        'attempts': 0,
+        'locked_until': None,
+        'last_error': '',
+    }
+    if key is None:
+        return ScheduledJob.objects.create(**fields)
+    scheduled_job, _created = ScheduledJob.objects.update_or_create(key=key, defaults=fields)
+    return scheduled_job
+
+
+def claim_due_jobs(limit):
+    """
+    Lease up to ``limit`` due jobs to this worker.
+
+    Rows locked by another worker are skipped, and jobs whose lease ran out
+    (the worker died mid-job) are claimed again.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            ScheduledJob.objects.select_for_update(skip_locked=True).filter(
+                Q(status=ScheduledJob.STATUS_PENDING) | Q(status=ScheduledJob.STATUS_RUNNING, locked_until__lt=now),
+                run_at__lte=now,
+            ).order_by('run_at')[:limit]
+        )
+        ScheduledJob.objects.filter(pk__in=[scheduled_job.pk for scheduled_job in jobs]).update(
+            status=ScheduledJob.STATUS_RUNNING, locked_until=now + JOB_LEASE, attempts=F('attempts') + 1,
+        )
+    for scheduled_job in jobs:
+        scheduled_job.locked_until = now + JOB_LEASE
+        scheduled_job.attempts += 1
+    return jobs
+
+
+def run_job(scheduled_job):
+    """Run one claimed job; failures are retried with a linear backoff up to MAX_ATTEMPTS."""
+    # Only the lease holder may finish the job; a reschedule in the meantime clears the lease
+    claimed = ScheduledJob.objects.filter(
+        pk=scheduled_job.pk, status=ScheduledJob.STATUS_RUNNING, locked_until=scheduled_job.locked_until
+    )
+    try:
+        handler = _handlers[scheduled_job.name]
+        handler(**scheduled_job.payload)
+    except Exception as e:
+        logger.error(f"Job {scheduled_job.name} #{scheduled_job.pk} failed (attempt {scheduled_job.attempts}): {e}")
+        if scheduled_job.attempts >= MAX_ATTEMPTS:
+            claimed.update(status=ScheduledJob.STATUS_FAILED, locked_until=None, last_error=str(e))
+        else:
+            claimed.update(
+                status=ScheduledJob.STATUS_PENDING,
+                locked_until=None,
+                run_at=timezone.now() + timedelta(minutes=scheduled_job.attempts),
+                last_error=str(e),
+            )
+        return False
+    claimed.update(status=ScheduledJob.STATUS_DONE, locked_until=None)
+    return True
+
+
+def run_due_jobs(batch_size=100):
+    """Claim and run one batch of due jobs; returns how many were claimed."""
+    jobs = claim_due_jobs(batch_size)
+    for scheduled_job in jobs:
+        run_job(scheduled_job)
+    return len(jobs)
+
+
+@job('complete_session')
+def complete_session(completion_id):
+    """Auto-complete a started session once its planned duration has passed."""
+    completion = SessionCompletion.objects.filter(pk=completion_id, is_completed=False).first()
+    if completion is None:
+        return
+    completion.is_completed = True
+    completion.save()
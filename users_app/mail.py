@@ -0,0 +1,213 @@
+import atexit
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+logger = logging.getLogger(__name__)
+
+
+class EmailSender:
+    """
+    Background worker delivering queued emails over one reused connection.
+
+    Messages are drained from the queue in batches of up to ``batch_size``
+    and sent with the backend named by QUEUED_EMAIL_BACKEND; the connection
+    stays open between batches and is closed after ``idle_timeout`` seconds
+    without mail. Each message of a batch is handed to send_messages() on its
+    own: a backend raising midway through a list does not say which messages
+    went out, so retrying the whole list could send some twice. A failed
+    message goes back on a retry heap with exponential backoff and is dropped
+    after ``max_attempts``. Counters and a sliding send rate can be read with
+    stats().
+
+    The queue lives in process memory. Mail still queued or waiting for a
+    retry when the process dies is lost with no trace: the atexit flush
+    covers a normal exit for up to EMAIL_QUEUE_FLUSH_TIMEOUT seconds, but
+    not SIGKILL or a SIGTERM the server does not turn into a clean exit.
+    Delivery errors are only logged, so a caller's except branch around
+    send_mail() sees enqueue failures, never SMTP ones.
+    """
+
+    def __init__(self, batch_size=None, max_attempts=None, retry_delay=None, idle_timeout=None, rate_window=60.0):
+        self.batch_size = batch_size or getattr(settings, "EMAIL_QUEUE_BATCH_SIZE", 100)
+        self.max_attempts = max_attempts or getattr(settings, "EMAIL_QUEUE_MAX_ATTEMPTS", 5)
+        self.retry_delay = retry_delay or getattr(settings, "EMAIL_QUEUE_RETRY_DELAY", 2.0)
+        self.idle_timeout = idle_timeout or getattr(settings, "EMAIL_QUEUE_IDLE_TIMEOUT", 30.0)
+        self.rate_window = rate_window
+        self.queue = deque()  # (attempts, message) pairs, guarded by _lock
+        self.retries = []  # heap of (ready_at, sequence, attempts, message)
+        self._sequence = itertools.count()
+        self._connection = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._wakeup = threading.Condition(self._lock)  # Notified on new mail and on stop()
+        self._pending = 0
+        self._stopped = None  # Event of the current worker thread
+        self._sent_at = deque()  # monotonic time of each send within rate_window
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.connections_opened = 0
+
+    def enqueue(self, messages):
+        with self._lock:
+            self._pending += len(messages)
+            self.queue.extend((0, message) for message in messages)
+            self._wakeup.notify()
+        self._ensure_worker()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._stopped,), name="email-sender", daemon=True
+                )
+                self._thread.start()
+
+    def _next_batch(self, stopped):
+        """Wait for mail; returns (attempts, message) pairs, empty when idle for idle_timeout or stopped."""
+        timeout = self.idle_timeout
+        if self.retries:
+            timeout = max(0.0, min(timeout, self.retries[0][0] - time.monotonic()))
+        batch = []
+        with self._lock:
+            self._wakeup.wait_for(lambda: self.queue or stopped.is_set(), timeout)
+            if stopped.is_set():
+                return batch
+            while self.queue and len(batch) < self.batch_size:
+                batch.append(self.queue.popleft())
+        now = time.monotonic()
+        while self.retries and self.retries[0][0] <= now and len(batch) < self.batch_size:
+            _ready_at, _sequence, attempts, message = heapq.heappop(self.retries)
+            batch.append((attempts, message))
+        return batch
+
+    def _open(self):
+        if self._connection is None:
+            self._connection = get_connection(
+                backend=getattr(settings, "QUEUED_EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend"),
+                fail_silently=False,
+            )
+            self._connection.open()
+            self.connections_opened += 1
+        return self._connection
+
+    def _close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    def _finish(self, count=1):
+        with self._lock:
+            self._pending -= count
+            if self._pending <= 0:
+                self._idle.notify_all()
+
+    def _send(self, attempts, message):
+        attempts += 1
+        try:
+            self._open().send_messages([message])
+        except Exception as e:
+            self._close()  # The next send starts from a fresh connection
+            if attempts >= self.max_attempts:
+                logger.error(f"Giving up on email to {message.to} after {attempts} attempts: {e}")
+                with self._lock:
+                    self.failed += 1
+                self._finish()
+                return
+            delay = self.retry_delay * 2 ** (attempts - 1)
+            logger.warning(f"Email to {message.to} failed (attempt {attempts}), retrying in {delay:g}s: {e}")
+            heapq.heappush(self.retries, (time.monotonic() + delay, next(self._sequence), attempts, message))
+            with self._lock:
+                self.retried += 1
+            return
+        with self._lock:
+            self.sent += 1
+            now = time.monotonic()
+            self._sent_at.append(now)
+            self._trim_sent_at(now)
+        self._finish()
+
+    def _trim_sent_at(self, now):
+        """Drop send times older than rate_window; call with the lock held."""
+        cutoff = now - self.rate_window
+        while self._sent_at and self._sent_at[0] < cutoff:
+            self._sent_at.popleft()
+
+    def _run(self, stopped):
+        while not stopped.is_set():
+            batch = self._next_batch(stopped)
+            if not batch:
+                self._close()
+                continue
+            for attempts, message in batch:
+                self._send(attempts, message)
+        self._close()
+
+    def flush(self, timeout=None):
+        """Wait until every queued message is sent or given up; returns False on timeout."""
+        with self._lock:
+            return self._idle.wait_for(lambda: self._pending <= 0, timeout)
+
+    def stop(self, timeout=None):
+        """
+        Stop the worker thread after the batch in hand; call flush() first to deliver the rest.
+
+        The next enqueue() starts a new worker.
+        """
+        with self._lock:
+            thread, stopped = self._thread, self._stopped
+            self._thread = None
+            if thread is None:
+                return
+            stopped.set()
+            self._wakeup.notify_all()
+        thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            self._trim_sent_at(time.monotonic())
+            return {
+                "queue_depth": len(self.queue),
+                "waiting_retry": len(self.retries),
+                "pending": self._pending,
+                "sent": self.sent,
+                "failed": self.failed,
+                "retried": self.retried,
+                "connections_opened": self.connections_opened,
+                "sent_per_second": len(self._sent_at) / self.rate_window,
+            }
+
+
+email_sender = EmailSender()
+
+# Give management commands a chance to deliver what they queued before the process exits
+atexit.register(lambda: email_sender.flush(getattr(settings, "EMAIL_QUEUE_FLUSH_TIMEOUT", 30.0)))
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """
+    Email backend that only enqueues; delivery happens on the email_sender thread.
+
+    send_mail() and friends return as soon as the messages are queued, so a
+    request never waits for an SMTP handshake. Delivery errors are logged
+    and retried by the sender rather than raised to the caller.
+    """
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        email_sender.enqueue(list(email_messages))
+        return len(email_messages)
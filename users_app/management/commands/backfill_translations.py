@@ -0,0 +1,152 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce
+from itertools import islice
+from operator import or_
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Q
+
+from users_app.models import TRANSLATABLE_MODELS, TranslatableModel
+from users_app.translation import LocalDictionaryBackend, translation_service, translations_updated
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill empty *_uz/_ru/_en columns in bulk. Rows are scanned in chunks, identical '
+        'source strings are translated once, and batches run over a bounded thread pool. '
+        'Only pending rows that still have empty columns are selected, so an interrupted '
+        'run resumes where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', dest='models',
+                            help='Model name to backfill (repeatable); defaults to all translatable models')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows read and written per chunk')
+        parser.add_argument('--batch-size', type=int, default=50, help='Texts sent per translator call')
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent translator calls')
+        parser.add_argument('--start-after', type=int, default=0, help='Skip rows with a primary key up to this one')
+        parser.add_argument('--retry-failed', action='store_true', help='Also retry rows that failed before')
+        parser.add_argument('--translator', choices=['default', 'local'], default='default',
+                            help="'default' uses TRANSLATION_BACKEND, 'local' the offline dictionary backend "
+                                 "(benchmarking only, implies --dry-run)")
+        parser.add_argument('--latency', type=float, default=0.0,
+                            help='Artificial delay per call of the local backend, in seconds')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Translate but write neither the rows nor TranslationCache')
+
+    def handle(self, *args, **options):
+        models = TRANSLATABLE_MODELS
+        if options['models']:
+            by_name = {model.__name__.lower(): model for model in TRANSLATABLE_MODELS}
+            try:
+                models = [by_name[name.lower()] for name in options['models']]
+            except KeyError as e:
+                raise CommandError(f"Unknown model {e}. Choose from: {', '.join(by_name)}")
+
+        self.options = options
+        self.languages = [code for code, _name in settings.LANGUAGES]
+        if options['translator'] == 'local':
+            # Stand-in output must end up neither in the rows nor in TranslationCache
+            self.backend = LocalDictionaryBackend(latency=options['latency'])
+            if not options['dry_run']:
+                self.stdout.write(self.style.WARNING('--translator local only benchmarks; nothing is written'))
+                options['dry_run'] = True
+        else:
+            self.backend = None
+        self.persist = not options['dry_run']
+        self.statuses = [TranslatableModel.TRANSLATION_PENDING]
+        if options['retry_failed']:
+            self.statuses.append(TranslatableModel.TRANSLATION_FAILED)
+
+        started = time.monotonic()
+        total = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for model in models:
+                total += self.backfill_model(model, pool)
+
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfilled {total} rows in {elapsed:.1f}s ({rate:.0f} rows/s), cache {translation_service.stats()}'
+        ))
+
+    def missing_filter(self, model):
+        # A field only counts when its source text is set; rows that are done or failed are left alone
+        missing = []
+        for field in model.translated_fields:
+            has_source = ~Q(**{f'{field}__isnull': True}) & ~Q(**{field: ''})
+            empty = reduce(or_, (
+                Q(**{f'{field}_{language}__isnull': True}) | Q(**{f'{field}_{language}': ''})
+                for language in self.languages
+            ))
+            missing.append(has_source & empty)
+        return Q(translation_status__in=self.statuses) & reduce(or_, missing)
+
+    def backfill_model(self, model, pool):
+        queryset = model.objects.filter(self.missing_filter(model), pk__gt=self.options['start_after']).order_by('pk')
+        remaining = queryset.count()
+        if not remaining:
+            return 0
+
+        self.stdout.write(f'{model.__name__}: {remaining} rows with missing translations')
+        rows = queryset.iterator(chunk_size=self.options['chunk_size'])
+        done = 0
+        while True:
+            chunk = list(islice(rows, self.options['chunk_size']))
+            if not chunk:
+                break
+            self.backfill_chunk(model, chunk, pool)
+            done += len(chunk)
+            self.stdout.write(f'  {model.__name__}: {done}/{remaining} (last id {chunk[-1].pk})')
+        return done
+
+    def backfill_chunk(self, model, chunk, pool):
+        # Deduplicate: every distinct source string is translated once per language
+        wanted = {language: set() for language in self.languages}
+        for instance in chunk:
+            for field, language, text in instance.missing_translations():
+                wanted[language].add(text)
+
+        batch_size = self.options['batch_size']
+        futures = []
+        for language, texts in wanted.items():
+            texts = sorted(texts)
+            for start in range(0, len(texts), batch_size):
+                futures.append((language, pool.submit(self.translate_batch, texts[start:start + batch_size], language)))
+
+        translations = {language: {} for language in self.languages}
+        for language, future in futures:
+            translations[language].update(future.result())
+
+        fields = {'translation_status'}
+        for instance in chunk:
+            status = model.TRANSLATION_DONE
+            for field, language, text in instance.missing_translations():
+                translated = translations[language].get(text)
+                if translated is None:
+                    status = model.TRANSLATION_FAILED
+                    continue
+                setattr(instance, f'{field}_{language}', translated)
+                fields.add(f'{field}_{language}')
+            instance.translation_status = status
+
+        if not self.options['dry_run']:
+            model.objects.bulk_update(chunk, sorted(fields))
+            translations_updated.send(sender=model, pks=[instance.pk for instance in chunk])
+
+    def translate_batch(self, texts, language):
+        try:
+            return translation_service.translate_many(
+                texts, language, backend=self.backend, persist=self.persist
+            )
+        except Exception as e:
+            logger.error(f"Failed to translate batch into {language}: {e}")
+            return {}
+        finally:
+            connections.close_all()
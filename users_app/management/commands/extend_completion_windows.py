@@ -0,0 +1,42 @@
+import logging
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.utils import timezone
+
+from users_app.enrollment import completion_window, materialize_until
+from users_app.models import UserProgram
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Materialize completion rows for the next COMPLETION_WINDOW_DAYS of every active program (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Window to materialize instead of COMPLETION_WINDOW_DAYS')
+
+    def handle(self, *args, **options):
+        window = options['days'] or completion_window()
+        if window is None:
+            self.stdout.write('COMPLETION_WINDOW_DAYS is not set; programs are materialized at enrollment')
+            return
+
+        through = timezone.now().date() + timedelta(days=window - 1)
+        due = UserProgram.objects.filter(
+            is_active=True, materialized_until__lt=through
+        ).filter(materialized_until__lt=F('end_date')).select_related('user')
+
+        programs = 0
+        sessions = 0
+        for user_program in due.iterator(chunk_size=500):
+            try:
+                sessions += materialize_until(user_program, min(through, user_program.end_date))
+                programs += 1
+            except Exception as e:
+                logger.error(f"Failed to extend user program #{user_program.pk}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Extended {programs} user programs through {through} ({sessions} sessions materialized)'
+        ))
@@ -0,0 +1,37 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from users_app.models import TRANSLATABLE_MODELS
+from users_app.translation import translate_instance
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Translate rows whose translation_status is pending (or failed, with --retry-failed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true', help='Also retry rows that failed before')
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new pending rows')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        statuses = ['pending', 'failed'] if options['retry_failed'] else ['pending']
+        while True:
+            processed = 0
+            for model in TRANSLATABLE_MODELS:
+                pks = model.objects.filter(translation_status__in=statuses).values_list('pk', flat=True)
+                for pk in pks.iterator():
+                    try:
+                        translate_instance(model, pk)
+                        processed += 1
+                    except Exception as e:
+                        logger.error(f"Failed to translate {model.__name__} #{pk}: {e}")
+
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f'Translated {processed} rows'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,34 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from users_app.models import MealCompletion, SessionCompletion
+from users_app.progress import refresh_progress
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the UserProgress daily rollups from the completion rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help='Only rebuild this user id (repeatable)')
+
+    def handle(self, *args, **options):
+        user_ids = options['users']
+        if not user_ids:
+            user_ids = sorted(
+                set(SessionCompletion.objects.values_list('user_id', flat=True).distinct())
+                | set(MealCompletion.objects.values_list('user_id', flat=True).distinct())
+            )
+
+        rebuilt = 0
+        for user_id in user_ids:
+            try:
+                refresh_progress(user_id)
+                rebuilt += 1
+            except Exception as e:
+                logger.error(f"Failed to rebuild progress of user #{user_id}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt progress rollups of {rebuilt} users'))
@@ -0,0 +1,38 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from users_app.jobs import run_due_jobs
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Run due scheduled jobs (session auto-completion and other deferred work)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Jobs claimed per batch')
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for due jobs')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            processed = 0
+            while True:
+                try:
+                    claimed = run_due_jobs(batch_size)
+                except Exception as e:
+                    logger.error(f"Failed to claim scheduled jobs: {e}")
+                    break
+                processed += claimed
+                # A full batch means more jobs may be due right away
+                if claimed < batch_size:
+                    break
+
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f'Ran {processed} jobs'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
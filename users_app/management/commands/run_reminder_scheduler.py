@@ -0,0 +1,41 @@
+import logging
+import signal
+
+from django.core.management.base import BaseCommand
+
+from users_app.notifications import NotificationService
+from users_app.reminder_scheduler import FEED_INTERVAL, ReminderScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Keep running and send reminders the moment they are due (see users_app.reminder_scheduler)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Threads sending reminders')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Due users sent per worker task')
+        parser.add_argument(
+            '--feed-interval', type=float, default=FEED_INTERVAL,
+            help='Seconds between reads of the schedule change feed',
+        )
+        parser.add_argument(
+            '--window', type=int, default=NotificationService.REMINDER_WINDOW,
+            help='Minutes of missed reminders still sent at startup',
+        )
+
+    def handle(self, *args, **options):
+        scheduler = ReminderScheduler(
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            feed_interval=options['feed_interval'],
+            window=options['window'],
+        )
+        signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+        self.stdout.write(self.style.SUCCESS('Reminder scheduler started'))
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            scheduler.stop()
+        logger.info("Reminder scheduler stopped")
+        self.stdout.write(self.style.SUCCESS('Reminder scheduler stopped'))
@@ -0,0 +1,34 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from users_app.notifications import NotificationService
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Remind users of meals whose meal_time has come (run every minute)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Due meals handled per batch')
+        parser.add_argument(
+            '--window', type=int, default=NotificationService.REMINDER_WINDOW,
+            help='Minutes of meal times looked back on, to catch up after late runs',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            stats = NotificationService.send_meal_reminders(
+                chunk_size=options['chunk_size'], window=options['window']
+            )
+            summary = (
+                f"Reminded {stats['sent']} of {stats['due']} due meals, {stats['emails']} emails "
+                f"({stats['email_failures']} failed) and {stats['sms']} SMS ({stats['sms_failures']} failed) "
+                f"in {stats['elapsed']:.2f}s, {stats['per_second']:.0f} reminders/s"
+            )
+            self.stdout.write(self.style.SUCCESS(summary))
+            logger.info(summary)
+        except Exception as e:
+            logger.error(f"Failed to send meal reminders: {e}")
+            self.stdout.write(self.style.ERROR('Failed to send meal reminders'))
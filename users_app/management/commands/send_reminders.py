@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from users_app.notifications import NotificationService
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Send scheduled reminders to users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Due reminders handled per batch')
+        parser.add_argument(
+            '--window', type=int, default=NotificationService.REMINDER_WINDOW,
+            help='Minutes of reminder buckets looked back on, to catch up after late runs',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            stats = NotificationService.schedule_reminders(
+                chunk_size=options['chunk_size'], window=options['window']
+            )
+            summary = (
+                f"Sent {stats['sent']} reminders to {stats['due']} due users and {stats['emails']} emails "
+                f"({stats['email_failures']} failed) in {stats['elapsed']:.2f}s, {stats['per_second']:.0f} reminders/s"
+            )
+            self.stdout.write(self.style.SUCCESS(summary))
+            logger.info(summary)
+        except Exception as e:
+            logger.error(f"Failed to send reminders: {e}")
+            self.stdout.write(self.style.ERROR('Failed to send reminders'))
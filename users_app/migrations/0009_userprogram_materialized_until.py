@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_app', '0008_translation_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprogram',
+            name='materialized_until',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_app', '0009_userprogram_materialized_until'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprogress',
+            name='completed_meals',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprogress',
+            name='missed_meals',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='userprogress',
+            name='calories_gained',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='userprogress',
+            name='total_calories_burned',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=10),
+        ),
+        migrations.AlterUniqueTogether(
+            name='userprogress',
+            unique_together={('user', 'date', 'program')},
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max, Q
+
+
+def backfill_schedules(apps, schema_editor):
+    User = apps.get_model('users_app', 'User')
+    ReminderSchedule = apps.get_model('users_app', 'ReminderSchedule')
+    users = User.objects.filter(reminder_time__isnull=False).annotate(
+        last_sent=Max('notification__sent_at', filter=Q(notification__notification_type='reminder'))
+    ).values_list('pk', 'reminder_time', 'notification_preferences', 'last_sent')
+    ReminderSchedule.objects.bulk_create(
+        [
+            ReminderSchedule(
+                user_id=pk,
+                minute_of_day=reminder_time.hour * 60 + reminder_time.minute,
+                # Users already reminded today are not reminded again after the deploy
+                last_sent_date=last_sent.date() if last_sent else None,
+            )
+            for pk, reminder_time, preferences, last_sent in users.iterator()
+            if (preferences or {}).get('reminder_enabled', False)
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_app', '0012_changelog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderSchedule',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('minute_of_day', models.PositiveSmallIntegerField()),
+                ('last_sent_date', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['minute_of_day', 'last_sent_date', 'user'], name='reminder_due_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_schedules, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_app', '0013_reminderschedule'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mealcompletion',
+            index=models.Index(fields=['meal_date', 'meal_time', 'reminder_sent'], name='users_app_m_meal_da_7039b6_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:02
+
+from functools import reduce
+from operator import or_
+
+from django.db import migrations
+from django.db.models import Q
+
+# Translated fields as of this migration; rows created before 0008 got status 'done' regardless
+TRANSLATED_FIELDS = {
+    'Program': ('program_goal',),
+    'WorkoutCategory': ('category_name', 'description'),
+    'Exercise': ('name', 'description'),
+    'Meal': ('food_name', 'meal_type'),
+    'Preparation': ('name', 'description'),
+    'Notification': ('message',),
+}
+LANGUAGES = ('en', 'ru', 'uz')
+
+
+def mark_pending(apps, schema_editor):
+    for model_name, fields in TRANSLATED_FIELDS.items():
+        model = apps.get_model('users_app', model_name)
+        missing = reduce(or_, (
+            ~Q(**{f'{field}__isnull': True}) & ~Q(**{field: ''}) & reduce(or_, (
+                Q(**{f'{field}_{language}__isnull': True}) | Q(**{f'{field}_{language}': ''})
+                for language in LANGUAGES
+            ))
+            for field in fields
+        ))
+        model.objects.filter(missing, translation_status='done').update(translation_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_app', '0014_mealcompletion_reminder_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_pending, migrations.RunPython.noop),
+    ]
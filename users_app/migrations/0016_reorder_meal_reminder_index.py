@@ -0,0 +1,21 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_app', '0015_mark_untranslated_rows_pending'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='mealcompletion',
+            name='users_app_m_meal_da_7039b6_idx',
+        ),
+        migrations.AddIndex(
+            model_name='mealcompletion',
+            index=models.Index(fields=['meal_date', 'reminder_sent', 'meal_time'], name='users_app_m_meal_da_73045c_idx'),
+        ),
+    ]
@@ -2,7 +2,6 @@ from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, Permis
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from googletrans import Translator
 from django.utils import timezone
 from rest_framework import status
 from rest_framework import status
@@ -10,16 +9,9 @@ from django.utils.timezone import now
 from datetime import timedelta
 from threading import Timer
 
-translator = Translator()
-
-
-def translate_text(text, target_language):
-    try:
-        translation = translator.translate(text, dest=target_language)
-        return translation.text if translation else text
-    except Exception as e:
-        print(f"Translation error: {e}")
-        return text
+from django.conf import settings
+from django.db import transaction
+from users_app.translation import translate_text, translation_queue
 
 
 # Default function for notification_preferences
@@ -32,6 +24,51 @@ def default_notification_preferences():
     }
 
 
+class TranslatableModel(models.Model):
+    """
+    Base for models whose text fields have *_uz/_ru/_en copies.
+
+    save() writes the source text immediately and hands any missing copies to
+    the background translation worker once the transaction commits.
+    """
+    TRANSLATION_PENDING = 'pending'
+    TRANSLATION_DONE = 'done'
+    TRANSLATION_FAILED = 'failed'
+    TRANSLATION_STATUSES = (
+        (TRANSLATION_PENDING, 'Pending'),
+        (TRANSLATION_DONE, 'Done'),
+        (TRANSLATION_FAILED, 'Failed'),
+    )
+
+    translated_fields = ()
+
+    translation_status = models.CharField(max_length=10, choices=TRANSLATION_STATUSES, default=TRANSLATION_DONE)
+
+    class Meta:
+        abstract = True
+
+    def translation_sources(self):
+        """Source text for every translated field, keyed by field name."""
+        return {field: getattr(self, field) for field in self.translated_fields}
+
+    def missing_translations(self):
+        return [
+            (field, language, text)
+            for field, text in self.translation_sources().items()
+            for language, _name in settings.LANGUAGES
+            if text and not getattr(self, f'{field}_{language}')
+        ]
+
+    def save(self, *args, **kwargs):
+        pending = bool(self.missing_translations())
+        self.translation_status = self.TRANSLATION_PENDING if pending else self.TRANSLATION_DONE
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'translation_status'}
+        super().save(*args, **kwargs)
+        if pending:
+            transaction.on_commit(lambda: translation_queue.enqueue(self.__class__, self.pk))
+
+
 # Custom User Manager
 class CustomUserManager(BaseUserManager):
     def create_user(self, email_or_phone, password=None, **extra_fields):
@@ -113,18 +150,24 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 # User Progress Model
 class UserProgress(models.Model):
+    """Daily rollup of a user's completion rows in one program, maintained by users_app.progress."""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     date = models.DateField()
     completed_sessions = models.IntegerField(default=0)
-    total_calories_burned = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
-    calories_gained = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
+    total_calories_burned = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    calories_gained = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     missed_sessions = models.IntegerField(default=0)
+    completed_meals = models.IntegerField(default=0)
+    missed_meals = models.IntegerField(default=0)
     week_number = models.IntegerField()
     program = models.ForeignKey('Program', on_delete=models.CASCADE)  # Link to the program for tracking
 
+    class Meta:
+        unique_together = ('user', 'date', 'program')  # One rollup per user, day and program
+
 
 # Program Model
-class Program(models.Model):
+class Program(TranslatableModel):
     frequency_per_week = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(7)])
     total_sessions = models.IntegerField(default=0)  # Number of sessions in the program
     program_goal = models.CharField(max_length=255)
@@ -133,14 +176,7 @@ class Program(models.Model):
     program_goal_en = models.CharField(max_length=255, blank=True, null=True)
     is_active = models.BooleanField(default=True)
 
-    def save(self, *args, **kwargs):
-        if not self.program_goal_uz:
-            self.program_goal_uz = translate_text(self.program_goal, 'uz')
-        if not self.program_goal_ru:
-            self.program_goal_ru = translate_text(self.program_goal, 'ru')
-        if not self.program_goal_en:
-            self.program_goal_en = translate_text(self.program_goal, 'en')
-        super(Program, self).save(*args, **kwargs)
+    translated_fields = ('program_goal',)
 
     def __str__(self):
         return f"{self.program_goal} "
@@ -165,6 +201,7 @@ class UserProgram(models.Model):
     total_amount = models.IntegerField(blank=True, null=True)
     is_paid = models.BooleanField(default=False)
     payment_method = models.CharField(max_length=255)
+    materialized_until = models.DateField(null=True, blank=True)  # Completion rows exist up to this date; null = whole program
 
     def calculate_progress(self):
         total_sessions = self.program.total_sessions
@@ -180,7 +217,7 @@ class UserProgram(models.Model):
 
 
 # Workout Category Model
-class WorkoutCategory(models.Model):
+class WorkoutCategory(TranslatableModel):
     category_name = models.CharField(max_length=255)
     category_name_uz = models.CharField(max_length=255, blank=True, null=True)
     category_name_ru = models.CharField(max_length=255, blank=True, null=True)
@@ -191,22 +228,7 @@ class WorkoutCategory(models.Model):
     description_ru = models.TextField(blank=True, null=True)
     description_en = models.TextField(blank=True, null=True)
 
-    def save(self, *args, **kwargs):
-        if not self.category_name_uz:
-            self.category_name_uz = translate_text(self.category_name, 'uz')
-        if not self.category_name_ru:
-            self.category_name_ru = translate_text(self.category_name, 'ru')
-        if not self.category_name_en:
-            self.category_name_en = translate_text(self.category_name, 'en')
-
-        if not self.description_uz:
-            self.description_uz = translate_text(self.description, 'uz')
-        if not self.description_ru:
-            self.description_ru = translate_text(self.description, 'ru')
-        if not self.description_en:
-            self.description_en = translate_text(self.description, 'en')
-
-        super(WorkoutCategory, self).save(*args, **kwargs)
+    translated_fields = ('category_name', 'description')
 
     def __str__(self):
         return self.category_name
@@ -232,6 +254,7 @@ class SessionCompletion(models.Model):
     completion_date = models.DateField(null=True, blank=True)
     session_date = models.DateField(null=True, blank=True)  # New field for planned date
     session_number_private = models.IntegerField(null=False)
+    started_at = models.DateTimeField(null=True, blank=True)  # Set by StartSessionView
 
 
     class Meta:
@@ -247,7 +270,7 @@ class SessionCompletion(models.Model):
         return f"{self.user.email_or_phone} - {self.session.program.program_goal} ({status})"
 
 
-class Exercise(models.Model):
+class Exercise(TranslatableModel):
     category = models.ForeignKey(WorkoutCategory, on_delete=models.SET_NULL, null=True, blank=True)
     name = models.CharField(max_length=255)
     name_uz = models.CharField(max_length=255, blank=True, null=True)
@@ -265,22 +288,7 @@ class Exercise(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    def save(self, *args, **kwargs):
-        if not self.name_uz:
-            self.name_uz = translate_text(self.name, 'uz')
-        if not self.name_ru:
-            self.name_ru = translate_text(self.name, 'ru')
-        if not self.name_en:
-            self.name_en = translate_text(self.name, 'en')
-
-        if not self.description_uz:
-            self.description_uz = translate_text(self.description, 'uz')
-        if not self.description_ru:
-            self.description_ru = translate_text(self.description, 'ru')
-        if not self.description_en:
-            self.description_en = translate_text(self.description, 'en')
-
-        super(Exercise, self).save(*args, **kwargs)
+    translated_fields = ('name', 'description')
 
     def __str__(self):
         return self.name
@@ -290,7 +298,7 @@ class Exercise(models.Model):
 
 
 
-class Meal(models.Model):
+class Meal(TranslatableModel):
     MEAL_TYPES = (
         ('breakfast', 'Breakfast'),
         ('lunch', 'Lunch'),
@@ -311,23 +319,14 @@ class Meal(models.Model):
     meal_type_ru = models.CharField(max_length=20, blank=True, null=True)
     meal_type_en = models.CharField(max_length=20, blank=True, null=True)
 
-    def save(self, *args, **kwargs):
-        # Tarjima qilish
-        if not self.food_name_uz:
-            self.food_name_uz = translate_text(self.food_name, 'uz')
-        if not self.food_name_ru:
-            self.food_name_ru = translate_text(self.food_name, 'ru')
-        if not self.food_name_en:
-            self.food_name_en = translate_text(self.food_name, 'en')
-
-        if not self.meal_type_uz:
-            self.meal_type_uz = translate_text(dict(self.MEAL_TYPES).get(self.meal_type), 'uz')
-        if not self.meal_type_ru:
-            self.meal_type_ru = translate_text(dict(self.MEAL_TYPES).get(self.meal_type), 'ru')
-        if not self.meal_type_en:
-            self.meal_type_en = translate_text(dict(self.MEAL_TYPES).get(self.meal_type), 'en')
-
-        super(Meal, self).save(*args, **kwargs)
+    translated_fields = ('food_name', 'meal_type')
+
+    def translation_sources(self):
+        # Meal types are translated from their display label, not the stored key
+        return {
+            'food_name': self.food_name,
+            'meal_type': dict(self.MEAL_TYPES).get(self.meal_type),
+        }
 
     def __str__(self):
         return f"{self.meal_type.capitalize()} for {self.session.user} on {self.session.date}"
@@ -348,6 +347,7 @@ class MealCompletion(models.Model):
 
     class Meta:
         unique_together = ('user', 'session', 'meal')  # Ensures unique tracking per user-session-meal combination
+        indexes = [models.Index(fields=['meal_date', 'reminder_sent', 'meal_time'])]  # Due meal reminders
 
     def save(self, *args, **kwargs):
         if self.is_completed and not self.completion_date:
@@ -360,7 +360,7 @@ class MealCompletion(models.Model):
 
 
 # Preparation model
-class Preparation(models.Model):
+class Preparation(TranslatableModel):
     meal = models.ForeignKey('Meal', on_delete=models.CASCADE, related_name="preparations")
     name = models.CharField(max_length=255)
     description = models.TextField(help_text="Description of the preparation method")
@@ -375,30 +375,14 @@ class Preparation(models.Model):
     description_ru = models.TextField(blank=True, null=True)
     description_en = models.TextField(blank=True, null=True)
 
-    def save(self, *args, **kwargs):
-        # Check if translations are missing, then add them
-        if not self.name_uz:
-            self.name_uz = translate_text(self.name, 'uz')
-        if not self.name_ru:
-            self.name_ru = translate_text(self.name, 'ru')
-        if not self.name_en:
-            self.name_en = translate_text(self.name, 'en')
-
-        if not self.description_uz:
-            self.description_uz = translate_text(self.description, 'uz')
-        if not self.description_ru:
-            self.description_ru = translate_text(self.description, 'ru')
-        if not self.description_en:
-            self.description_en = translate_text(self.description, 'en')
-
-        super(Preparation, self).save(*args, **kwargs)
+    translated_fields = ('name', 'description')
 
     def __str__(self):
         return f"Preparation for {self.meal.food_name}: {self.name}"
 
 
 
-class Notification(models.Model):
+class Notification(TranslatableModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     message = models.TextField()
     message_uz = models.TextField(blank=True, null=True)
@@ -410,20 +394,92 @@ class Notification(models.Model):
     notification_type = models.CharField(max_length=50, default="general")  # e.g., "reminder", "update"
     scheduled_time = models.TimeField(null=True, blank=True)
 
-    def save(self, *args, **kwargs):
-        if not self.message_uz:
-            self.message_uz = translate_text(self.message, 'uz')
-        if not self.message_ru:
-            self.message_ru = translate_text(self.message, 'ru')
-        if not self.message_en:
-            self.message_en = translate_text(self.message, 'en')
-        super(Notification, self).save(*args, **kwargs)
+    translated_fields = ('message',)
 
     def __str__(self):
         return f"Notification for {self.user.email_or_phone} - {self.sent_at}"
 
 
+# Models whose *_uz/_ru/_en columns are filled by the translation worker
+TRANSLATABLE_MODELS = (Program, WorkoutCategory, Exercise, Meal, Preparation, Notification)
 
 
+class TranslationCache(models.Model):
+    source_hash = models.CharField(max_length=64)
+    target_language = models.CharField(max_length=10)
+    source_text = models.TextField()
+    translated_text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('source_hash', 'target_language')  # One cached translation per text and language
+
+    def __str__(self):
+        return f"{self.target_language}: {self.source_text[:50]}"
+
+
+class ScheduledJob(models.Model):
+    """A unit of deferred work, run by the run_jobs command once run_at has passed (see users_app.jobs)."""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    key = models.CharField(max_length=255, unique=True, null=True, blank=True)  # Rescheduling the same key replaces the job
+    payload = models.JSONField(default=dict)
+    run_at = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.IntegerField(default=0)
+    locked_until = models.DateTimeField(null=True, blank=True)  # Lease of the worker running the job
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_at'])]
+
+    def __str__(self):
+        return f"{self.name} at {self.run_at} ({self.status})"
 
 
+class ChangeLog(models.Model):
+    """Append-only feed of created, updated and deleted rows, read by the delta sync endpoint and the reminder scheduler."""
+    ACTION_UPSERT = 'upsert'
+    ACTION_DELETE = 'delete'
+    ACTION_CHOICES = [
+        (ACTION_UPSERT, 'Created or updated'),
+        (ACTION_DELETE, 'Deleted'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)  # Doubles as the client's sync token
+    model = models.CharField(max_length=100)  # Model label, e.g. users_app.meal
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)  # Owner of per-user rows; null for catalog rows
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.id} {self.action} {self.model} #{self.object_id}"
+
+
+class ReminderSchedule(models.Model):
+    """
+    One row per user with reminders enabled, kept in step with User.reminder_time
+    and notification_preferences by a post_save signal; read by schedule_reminders.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    minute_of_day = models.PositiveSmallIntegerField()  # reminder_time as minutes after midnight, 0..1439
+    last_sent_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        # Covers the due lookup: a range over minute buckets, then the date, then the user
+        indexes = [models.Index(fields=['minute_of_day', 'last_sent_date', 'user'], name='reminder_due_idx')]
+
+    def __str__(self):
+        return f"Reminder for user #{self.user_id} at minute {self.minute_of_day}"
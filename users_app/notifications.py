@@ -1,10 +1,32 @@
+import logging
+import time
+
 from django.utils import translation
-from users_app.models import Notification
-from django.core.mail import send_mail
+from users_app.changelog import record as record_change
+from users_app.eskiz_api import EskizAPI
+from users_app.models import ChangeLog, MealCompletion, Notification, ReminderSchedule
+from django.core.mail import EmailMessage, get_connection, send_mail
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
-from django.utils.translation import gettext_lazy as _
-from datetime import timedelta
+from django.utils.translation import gettext_lazy as _, gettext_noop
+from datetime import datetime, time as dt_time, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderClaimConflict(Exception):
+    """Rolls back a chunk's claim when another sender already marked some of its rows."""
+
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def minute_of_day(value):
+    """Minutes after midnight of a time; the reminder bucket it falls in."""
+    return value.hour * 60 + value.minute
+
 
 class NotificationService:
     @staticmethod
@@ -39,23 +61,284 @@ class NotificationService:
         translation.deactivate()
         return notification
 
+    REMINDER_MESSAGE = gettext_noop("Remember to complete your session!")
+    REMINDER_SUBJECT = gettext_noop("Notification")
+    MEAL_REMINDER_MESSAGE = gettext_noop("Time for your meal: {meal}")
+
     @staticmethod
-    def schedule_reminders():
-        now = timezone.now()
-        notifications = Notification.objects.filter(
-            notification_type="reminder",
-            is_read=False,
-            scheduled_time__lte=now.time(),
-            sent_at__date__lt=now.date()
-        )
+    def render_catalog(message_key):
+        """``message_key`` rendered from the compiled catalog of every configured language."""
+        rendered = {}
+        for language, _name in settings.LANGUAGES:
+            with translation.override(language):
+                rendered[language] = translation.gettext(message_key)
+        return rendered
+
+    # Minutes of buckets looked back on each run, so a late or skipped run still sends them
+    REMINDER_WINDOW = 60
+
+    @staticmethod
+    def sync_reminder_schedule(user):
+        """
+        Create, move or drop the user's ReminderSchedule row to match reminder_time and preferences.
+
+        Actual changes are written to the change log, which the reminder
+        scheduler tails to keep its heap current.
+        """
+        current = ReminderSchedule.objects.filter(user=user).values_list('minute_of_day', flat=True).first()
+        if user.reminder_time is None or not user.notification_preferences.get("reminder_enabled", False):
+            if current is not None:
+                ReminderSchedule.objects.filter(user=user).delete()
+                record_change(ReminderSchedule, [user.pk], ChangeLog.ACTION_DELETE, user_id=user.pk)
+            return
+        minute = minute_of_day(user.reminder_time)
+        if minute != current:
+            ReminderSchedule.objects.update_or_create(user=user, defaults={"minute_of_day": minute})
+            record_change(ReminderSchedule, [user.pk], user_id=user.pk)
+
+    @staticmethod
+    def not_sent_on(day):
+        """Filter of ReminderSchedule rows that have not been sent on ``day``."""
+        return Q(last_sent_date__lt=day) | Q(last_sent_date__isnull=True)
+
+    @staticmethod
+    def send_reminder_chunk(schedules, today, messages, subjects, stats):
+        """
+        Remind the users of the ReminderSchedule queryset ``schedules`` and mark them sent.
+
+        The rows read are claimed with a conditional UPDATE of last_sent_date
+        that skips rows already sent ``today``, and only claimed rows are
+        reminded, so the send_reminders command and the reminder scheduler
+        never remind a user twice on one day, whether or not the database
+        honours select_for_update(). Reminders are inserted in the same
+        transaction; emails go out afterwards over one SMTP connection.
+        Adds to ``stats`` and returns the rows read.
+        """
+        with transaction.atomic():
+            rows = list(schedules)
+            if not rows:
+                return rows
+            claim = ReminderSchedule.objects.filter(NotificationService.not_sent_on(today))
+            try:
+                with transaction.atomic():
+                    claimed = claim.filter(pk__in=[schedule.pk for schedule in rows]).update(last_sent_date=today)
+                    if claimed != len(rows):
+                        raise ReminderClaimConflict
+                chunk = rows
+            except ReminderClaimConflict:
+                # Another sender marked some of the rows since they were read; claim them one at a time
+                chunk = [schedule for schedule in rows if claim.filter(pk=schedule.pk).update(last_sent_date=today)]
+
+            # Preferences changed through queryset.update() skip the sync signal
+            users = [
+                schedule.user for schedule in chunk
+                if schedule.user.notification_preferences.get("reminder_enabled", False)
+            ]
 
-        for notification in notifications:
-            if notification.user.notification_preferences.get("reminder_enabled", False):
-                NotificationService.send_notification(
-                    user=notification.user,
-                    message_key="Remember to complete your session!",
-                    notification_type="reminder"
+            reminders = []
+            emails = []
+            for user in users:
+                language = user.language if user.language in messages else settings.LANGUAGE_CODE
+                reminders.append(Notification(
+                    user=user,
+                    message=messages[language],
+                    language=language,
+                    notification_type="reminder",
+                    scheduled_time=user.reminder_time,
+                    translation_status=Notification.TRANSLATION_DONE,
+                    **{f"message_{code}": text for code, text in messages.items()},
+                ))
+                if user.notification_preferences.get("email", False):
+                    emails.append(EmailMessage(
+                        subject=subjects[language],
+                        body=messages[language],
+                        from_email=settings.DEFAULT_FROM_EMAIL,
+                        to=[user.email_or_phone],
+                    ))
+
+            Notification.objects.bulk_create(reminders, batch_size=500)
+
+        if emails:
+            try:
+                stats["emails"] += get_connection().send_messages(emails) or 0
+            except Exception as e:
+                logger.error(f"Failed to send {len(emails)} reminder emails: {e}")
+                stats["email_failures"] += len(emails)
+
+        stats["due"] += len(chunk)
+        stats["sent"] += len(reminders)
+        return rows
+
+    @staticmethod
+    def schedule_reminders(chunk_size=1000, window=REMINDER_WINDOW):
+        """
+        Send today's reminders in set-based batches and return run statistics.
+
+        Due users are read from ReminderSchedule, whose index is a range
+        over the minute buckets of the last ``window`` minutes followed
+        by the last sent date, so a run only touches the users due in
+        those buckets; just after midnight the window also covers
+        yesterday's last buckets, whose reminders count as sent
+        yesterday. They are loaded with their user rows in
+        keyset-paginated chunks. Each user gets one new reminder,
+        rendered from the message catalogs with every language column
+        filled, so no translation is queued. A chunk costs one select,
+        one bulk_create, one UPDATE of last_sent_date and one SMTP
+        connection for all its emails; see send_reminder_chunk().
+        """
+        started = time.monotonic()
+        now = timezone.localtime()
+        today = now.date()
+        current_minute = minute_of_day(now)
+        messages = NotificationService.render_catalog(NotificationService.REMINDER_MESSAGE)
+        subjects = NotificationService.render_catalog(NotificationService.REMINDER_SUBJECT)
+        first_minute = current_minute - window + 1
+        buckets = [(today, max(first_minute, 0), current_minute)]
+        if first_minute < 0:
+            buckets.append((today - timedelta(days=1), MINUTES_PER_DAY + first_minute, MINUTES_PER_DAY - 1))
+
+        stats = {"due": 0, "sent": 0, "emails": 0, "email_failures": 0}
+        for day, first, last in buckets:
+            due = ReminderSchedule.objects.filter(
+                NotificationService.not_sent_on(day), minute_of_day__range=(first, last),
+            ).select_related('user').select_for_update(skip_locked=True, of=('self',)).order_by('pk')
+            last_pk = 0
+            while True:
+                chunk = NotificationService.send_reminder_chunk(
+                    due.filter(pk__gt=last_pk)[:chunk_size], day, messages, subjects, stats
+                )
+                if not chunk:
+                    break
+                last_pk = chunk[-1].pk
+
+        stats["elapsed"] = time.monotonic() - started
+        stats["per_second"] = stats["sent"] / stats["elapsed"] if stats["elapsed"] else 0.0
+        return stats
+
+    @staticmethod
+    def send_meal_reminders(chunk_size=1000, window=REMINDER_WINDOW):
+        """
+        Remind users of today's meals whose meal_time has come, and return run statistics.
+
+        Due rows are open MealCompletion rows of today with reminder_sent
+        unset and meal_time within the last ``window`` minutes; the
+        (meal_date, reminder_sent, meal_time) index serves the lookup. They
+        are read with their users and meals in keyset-paginated chunks and
+        claimed with a conditional UPDATE of reminder_sent, as in
+        send_reminder_chunk(), so overlapping runs never remind a meal twice
+        even where select_for_update() is a no-op. Each claimed reminder goes
+        to the channels enabled in the user's notification_preferences: an
+        in-app notification with every language column filled, an email or an
+        SMS. A chunk costs one select, one UPDATE of reminder_sent, one
+        bulk_create and one SMTP connection for all its emails. ``sent``
+        counts the reminders that went out on at least one channel.
+        """
+        started = time.monotonic()
+        now = timezone.localtime()
+        today = now.date()
+        since = max(now - timedelta(minutes=window), datetime.combine(today, dt_time.min, tzinfo=now.tzinfo))
+        templates = NotificationService.render_catalog(NotificationService.MEAL_REMINDER_MESSAGE)
+        subjects = NotificationService.render_catalog(NotificationService.REMINDER_SUBJECT)
+        due = MealCompletion.objects.filter(
+            meal_date=today,
+            meal_time__range=(since.time(), now.time()),
+            reminder_sent=False,
+            is_completed=False,
+        ).select_related('user', 'meal').order_by('pk')
+
+        sms_api = None
+        stats = {"due": 0, "sent": 0, "emails": 0, "email_failures": 0, "sms": 0, "sms_failures": 0}
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                chunk = list(
+                    due.filter(pk__gt=last_pk).select_for_update(skip_locked=True, of=('self',))[:chunk_size]
                 )
-            # Update the sent time and mark the notification as sent today
-            notification.sent_at = now
-            notification.save()
+                if not chunk:
+                    break
+                last_pk = chunk[-1].pk
+
+                # reminder_sent is not part of the synced payload, so neither the change log nor the data version move
+                claim = MealCompletion.objects.filter(reminder_sent=False)
+                try:
+                    with transaction.atomic():
+                        claimed = claim.filter(pk__in=[completion.pk for completion in chunk]).update(
+                            reminder_sent=True
+                        )
+                        if claimed != len(chunk):
+                            raise ReminderClaimConflict
+                except ReminderClaimConflict:
+                    # Another run claimed some of the rows since they were read; claim them one at a time
+                    chunk = [
+                        completion for completion in chunk
+                        if claim.filter(pk=completion.pk).update(reminder_sent=True)
+                    ]
+
+                delivered = set()
+                notifications = []
+                emails = []
+                texts = []
+                for completion in chunk:
+                    user = completion.user
+                    preferences = user.notification_preferences
+                    if not preferences.get("reminder_enabled", False):
+                        continue
+                    meal = completion.meal
+                    messages = {
+                        code: template.format(meal=getattr(meal, f"food_name_{code}", None) or meal.food_name)
+                        for code, template in templates.items()
+                    }
+                    language = user.language if user.language in messages else settings.LANGUAGE_CODE
+                    if preferences.get("in_app", False):
+                        delivered.add(completion.pk)
+                        notifications.append(Notification(
+                            user=user,
+                            message=messages[language],
+                            language=language,
+                            notification_type="meal_reminder",
+                            scheduled_time=completion.meal_time,
+                            translation_status=Notification.TRANSLATION_DONE,
+                            **{f"message_{code}": text for code, text in messages.items()},
+                        ))
+                    if "@" in user.email_or_phone:
+                        if preferences.get("email", False):
+                            emails.append((completion.pk, EmailMessage(
+                                subject=subjects[language],
+                                body=messages[language],
+                                from_email=settings.DEFAULT_FROM_EMAIL,
+                                to=[user.email_or_phone],
+                            )))
+                    elif preferences.get("sms", False):
+                        texts.append((completion.pk, user.email_or_phone, messages[language]))
+
+                Notification.objects.bulk_create(notifications, batch_size=500)
+
+            if emails:
+                try:
+                    stats["emails"] += get_connection().send_messages([email for _pk, email in emails]) or 0
+                except Exception as e:
+                    logger.error(f"Failed to send {len(emails)} meal reminder emails: {e}")
+                    stats["email_failures"] += len(emails)
+                else:
+                    delivered.update(pk for pk, _email in emails)
+
+            for pk, phone, text in texts:
+                try:
+                    if sms_api is None:
+                        sms_api = EskizAPI()  # One login per run
+                    result = sms_api.send_sms(phone, text)
+                except Exception as e:
+                    result = {"error": str(e)}
+                if result.get("error"):
+                    logger.error(f"Failed to send meal reminder SMS to {phone}: {result['error']}")
+                    stats["sms_failures"] += 1
+                else:
+                    stats["sms"] += 1
+                    delivered.add(pk)
+
+            stats["due"] += len(chunk)
+            stats["sent"] += len(delivered)
+
+        stats["elapsed"] = time.monotonic() - started
+        stats["per_second"] = stats["sent"] / stats["elapsed"] if stats["elapsed"] else 0.0
+        return stats
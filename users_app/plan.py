@@ -0,0 +1,143 @@
+import threading
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.db import transaction
+
+from users_app.models import Session
+from users_app.versions import version_cache
+
+PLAN_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+@dataclass(frozen=True)
+class SessionPlan:
+    id: int
+    session_number: int
+    calories_burned: object  # Decimal
+    session_time: object  # datetime.time or None
+    exercise_ids: tuple
+    meal_ids: tuple
+
+
+@dataclass(frozen=True)
+class ProgramPlan:
+    """
+    Immutable outline of a program: its sessions in order, with exercise and meal ids.
+
+    Plans are cached per (program, version). The version lives in the shared
+    version cache and is bumped by the signal handlers in users_app.signals
+    whenever the program or a Session, Exercise, Meal or Preparation of it
+    changes.
+    """
+    program_id: int
+    version: str
+    sessions: tuple
+    meal_calories: tuple  # (meal id, calories) pairs
+
+    def session_by_number(self, session_number):
+        for session in self.sessions:
+            if session.session_number == session_number:
+                return session
+        return None
+
+    def calories_by_meal(self):
+        return dict(self.meal_calories)
+
+
+_local_plans = {}
+_local_lock = threading.Lock()
+
+
+def _version_key(program_id):
+    return f'program_plan_version_{program_id}'
+
+
+def _plan_key(program_id, version):
+    return f'program_plan_{program_id}_{version}'
+
+
+def program_version(program_id):
+    """Current content version of a program, created on first use."""
+    versions = version_cache()
+    version = versions.get(_version_key(program_id))
+    if version is None:
+        version = uuid.uuid4().hex
+        if not versions.add(_version_key(program_id), version, None):
+            version = versions.get(_version_key(program_id), version)
+    return version
+
+
+def invalidate_program_plan(*program_ids):
+    """
+    Give the programs a new plan version once the current transaction commits.
+
+    Bumping before the commit would let a concurrent reader build the plan
+    from the old rows and cache it under the new version; see
+    users_app.versions.bump_user_data_version().
+    """
+    def bump():
+        version_cache().set_many({_version_key(program_id): uuid.uuid4().hex for program_id in program_ids}, None)
+        with _local_lock:
+            for program_id in program_ids:
+                _local_plans.pop(program_id, None)
+
+    if program_ids:
+        transaction.on_commit(bump)
+
+
+def build_program_plan(program_id, version):
+    sessions = Session.objects.filter(program_id=program_id).order_by('session_number').values_list(
+        'id', 'session_number', 'calories_burned', 'session_time'
+    )
+    exercises_by_session = defaultdict(list)
+    exercise_links = Session.exercises.through.objects.filter(session__program_id=program_id).order_by('exercise_id')
+    for session_id, exercise_id in exercise_links.values_list('session_id', 'exercise_id'):
+        exercises_by_session[session_id].append(exercise_id)
+
+    meals_by_session = defaultdict(list)
+    meal_calories = {}
+    meal_links = Session.meals.through.objects.filter(session__program_id=program_id).order_by('meal_id')
+    for session_id, meal_id, calories in meal_links.values_list('session_id', 'meal_id', 'meal__calories'):
+        meals_by_session[session_id].append(meal_id)
+        meal_calories[meal_id] = calories
+
+    return ProgramPlan(
+        program_id=program_id,
+        version=version,
+        sessions=tuple(
+            SessionPlan(
+                id=session_id,
+                session_number=session_number,
+                calories_burned=calories_burned,
+                session_time=session_time,
+                exercise_ids=tuple(exercises_by_session[session_id]),
+                meal_ids=tuple(meals_by_session[session_id]),
+            )
+            for session_id, session_number, calories_burned, session_time in sessions
+        ),
+        meal_calories=tuple(sorted(meal_calories.items())),
+    )
+
+
+def get_program_plan(program_id, version=None):
+    """
+    Plan of ``program_id``, from process memory, the cache or the database.
+
+    Costs one version read when the in-process copy is current, none when
+    the caller already read ``version``.
+    """
+    version = version or program_version(program_id)
+    plan = _local_plans.get(program_id)
+    if plan is not None and plan.version == version:
+        return plan
+
+    plan = cache.get(_plan_key(program_id, version))
+    if plan is None:
+        plan = build_program_plan(program_id, version)
+        cache.set(_plan_key(program_id, version), plan, PLAN_CACHE_TIMEOUT)
+    with _local_lock:
+        _local_plans[program_id] = plan
+    return plan
@@ -0,0 +1,187 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+from users_app.models import MealCompletion, SessionCompletion, User, UserProgress
+
+
+def _new_rollup(user_id, program_id, day):
+    return UserProgress(
+        user_id=user_id,
+        program_id=program_id,
+        date=day,
+        week_number=day.isocalendar()[1],
+        total_calories_burned=Decimal('0'),
+        calories_gained=Decimal('0'),
+    )
+
+
+def compute_rollups(user_id, dates=None):
+    """
+    Unsaved UserProgress rows for ``dates`` (all dates when None), one per program and day.
+
+    Two GROUP BY queries over the user's completion rows.
+    """
+    completed = Q(is_completed=True)
+    sessions = SessionCompletion.objects.filter(user_id=user_id, session_date__isnull=False)
+    meals = MealCompletion.objects.filter(user_id=user_id, meal_date__isnull=False)
+    if dates is not None:
+        sessions = sessions.filter(session_date__in=dates)
+        meals = meals.filter(meal_date__in=dates)
+
+    rollups = {}
+
+    def rollup(program_id, day):
+        if (program_id, day) not in rollups:
+            rollups[program_id, day] = _new_rollup(user_id, program_id, day)
+        return rollups[program_id, day]
+
+    session_totals = sessions.values('session__program_id', 'session_date').annotate(
+        completed=Count('id', filter=completed),
+        missed=Count('id', filter=~completed),
+        calories=Sum('session__calories_burned', filter=completed),
+    )
+    for row in session_totals:
+        progress = rollup(row['session__program_id'], row['session_date'])
+        progress.completed_sessions = row['completed']
+        progress.missed_sessions = row['missed']
+        progress.total_calories_burned = row['calories'] or Decimal('0')
+
+    meal_totals = meals.values('session__program_id', 'meal_date').annotate(
+        completed=Count('id', filter=completed),
+        missed=Count('id', filter=~completed),
+        calories=Sum('meal__calories', filter=completed),
+    )
+    for row in meal_totals:
+        progress = rollup(row['session__program_id'], row['meal_date'])
+        progress.completed_meals = row['completed']
+        progress.missed_meals = row['missed']
+        progress.calories_gained = row['calories'] or Decimal('0')
+
+    return list(rollups.values())
+
+
+def refresh_progress(user_id, dates=None):
+    """
+    Recompute the user's UserProgress rows for ``dates`` (all dates when None).
+
+    The user row is locked for the duration, so concurrent refreshes of the
+    same user are serialized and always rebuild from committed completions.
+    Runs in the caller's transaction when there is one.
+    """
+    if dates is not None:
+        dates = {day for day in dates if day is not None}
+        if not dates:
+            return
+    with transaction.atomic():
+        # Per-user mutex
+        list(User.objects.select_for_update().filter(pk=user_id).values_list('pk', flat=True))
+        rollups = compute_rollups(user_id, dates)
+        stale = UserProgress.objects.filter(user_id=user_id)
+        if dates is not None:
+            stale = stale.filter(date__in=dates)
+        stale.delete()
+        UserProgress.objects.bulk_create(rollups, batch_size=500)
+
+
+# Completed, missed and calorie columns of the rollup per completion model
+ROLLUP_COLUMNS = {
+    SessionCompletion: ('completed_sessions', 'missed_sessions', 'total_calories_burned'),
+    MealCompletion: ('completed_meals', 'missed_meals', 'calories_gained'),
+}
+
+
+def count_completion(user_id, model, program_id, day, calories):
+    """
+    Move one open completion of ``day`` to the completed column of its rollup.
+
+    One UPDATE of the existing rollup row under the same per-user lock as
+    refresh_progress(); a day without a rollup row yet is rebuilt with it.
+    Runs in the caller's transaction when there is one.
+    """
+    if day is None:
+        return
+    completed, missed, calories_column = ROLLUP_COLUMNS[model]
+    with transaction.atomic():
+        list(User.objects.select_for_update().filter(pk=user_id).values_list('pk', flat=True))
+        updated = UserProgress.objects.filter(user_id=user_id, program_id=program_id, date=day).update(**{
+            completed: F(completed) + 1,
+            missed: F(missed) - 1,
+            calories_column: F(calories_column) + (calories or 0),
+        })
+        if not updated:
+            refresh_progress(user_id, [day])
+
+
+def progress_totals(user, start, end):
+    """Session and meal totals of the user over start..end (inclusive), read from the rollups."""
+    totals = UserProgress.objects.filter(user=user, date__range=(start, end)).aggregate(
+        completed_sessions=Sum('completed_sessions'),
+        missed_sessions=Sum('missed_sessions'),
+        total_calories_burned=Sum('total_calories_burned'),
+        completed_meals=Sum('completed_meals'),
+        missed_meals=Sum('missed_meals'),
+        calories_gained=Sum('calories_gained'),
+    )
+    return {name: value or 0 for name, value in totals.items()}
+
+
+BUCKETS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(day, bucket):
+    if bucket == 'week':
+        return day + timedelta(days=7)
+    if bucket == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def progress_series(user, start, end, bucket):
+    """
+    Dense series of rollup totals over start..end, one entry per day, ISO week or month.
+
+    One GROUP BY over the rollups; buckets without data are filled with zeros.
+    """
+    rows = UserProgress.objects.filter(user=user, date__range=(start, end)).annotate(
+        period=BUCKETS[bucket]('date')
+    ).values('period').annotate(
+        completed_sessions=Sum('completed_sessions'),
+        missed_sessions=Sum('missed_sessions'),
+        total_calories_burned=Sum('total_calories_burned'),
+        completed_meals=Sum('completed_meals'),
+        missed_meals=Sum('missed_meals'),
+        calories_gained=Sum('calories_gained'),
+    ).order_by('period')
+    by_period = {row.pop('period'): row for row in rows}
+
+    series = []
+    period = bucket_start(start, bucket)
+    while period <= end:
+        totals = by_period.get(period, {})
+        series.append({
+            'period_start': period,
+            'completed_sessions': totals.get('completed_sessions', 0),
+            'missed_sessions': totals.get('missed_sessions', 0),
+            'total_calories_burned': totals.get('total_calories_burned') or Decimal('0'),
+            'completed_meals': totals.get('completed_meals', 0),
+            'missed_meals': totals.get('missed_meals', 0),
+            'calories_gained': totals.get('calories_gained') or Decimal('0'),
+        })
+        period = next_bucket(period, bucket)
+    return series
@@ -0,0 +1,170 @@
+import heapq
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+
+from django.db import connections
+from django.utils import timezone
+
+from users_app.changelog import SETTLE_TIME, current_token
+from users_app.models import ChangeLog, ReminderSchedule
+from users_app.notifications import MINUTES_PER_DAY, NotificationService, minute_of_day
+
+logger = logging.getLogger(__name__)
+
+FEED_INTERVAL = 1.0  # seconds between change-feed reads while no reminder is due sooner
+
+
+class ReminderScheduler:
+    """
+    Long-running reminder dispatcher built on an in-memory min-heap.
+
+    Every reminder time is loaded once into a heap of (due_at, user_id)
+    entries and the loop sleeps until the earliest one is due. Changes to
+    reminder_time and notification_preferences arrive through the change
+    log that sync_reminder_schedule() writes to; the feed is read by primary
+    key from the last token, so an idle feed costs one index lookup.
+    Superseded heap entries are skipped lazily when popped. Due users are
+    sent in chunks on a bounded thread pool; send_reminder_chunk() claims
+    each chunk with a conditional UPDATE, so the send_reminders command or a
+    second scheduler never remind the same user twice on one day. Rows are
+    also read with select_for_update(skip_locked=True), which keeps senders
+    from waiting on each other where the database supports it.
+    """
+
+    def __init__(
+        self, workers=4, chunk_size=500, feed_interval=FEED_INTERVAL, window=NotificationService.REMINDER_WINDOW,
+    ):
+        self.chunk_size = chunk_size
+        self.feed_interval = feed_interval
+        self.window = window
+        self.heap = []
+        self.due_at = {}  # user_id -> the heap entry currently in force
+        self.token = 0
+        self.stopped = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='reminders')
+        # At most two chunks queued per worker; the loop blocks instead of piling up work
+        self.slots = threading.BoundedSemaphore(workers * 2)
+        self.messages = NotificationService.render_catalog(NotificationService.REMINDER_MESSAGE)
+        self.subjects = NotificationService.render_catalog(NotificationService.REMINDER_SUBJECT)
+
+    def next_due(self, minute, last_sent_date, now):
+        """When a reminder at ``minute`` is next due, as of ``now``."""
+        today = now.date()
+        yesterday = today - timedelta(days=1)
+        current_minute = minute_of_day(now)
+        day = today
+        # Yesterday's late buckets are still within the window just after midnight
+        if minute > current_minute - self.window + MINUTES_PER_DAY and (
+            last_sent_date is None or last_sent_date < yesterday
+        ):
+            day = yesterday
+        # Already sent today, or further back than a catch-up run of send_reminders would reach
+        elif last_sent_date == today or minute <= current_minute - self.window:
+            day = today + timedelta(days=1)
+        return datetime.combine(day, time(minute // 60, minute % 60), tzinfo=now.tzinfo)
+
+    def push(self, user_id, minute, last_sent_date, now):
+        due_at = self.next_due(minute, last_sent_date, now)
+        self.due_at[user_id] = due_at
+        heapq.heappush(self.heap, (due_at, user_id))
+
+    def load(self):
+        """Fill the heap with every schedule; the feed token is taken first, so nothing is missed."""
+        self.token = current_token()
+        now = timezone.localtime()
+        rows = ReminderSchedule.objects.values_list('user_id', 'minute_of_day', 'last_sent_date')
+        for user_id, minute, last_sent_date in rows.iterator(chunk_size=5000):
+            self.push(user_id, minute, last_sent_date, now)
+        logger.info(f"Reminder scheduler loaded {len(self.due_at)} schedules")
+
+    def read_feed(self):
+        """
+        Apply schedule changes logged after the token.
+
+        Entries younger than SETTLE_TIME are applied but the token stays
+        before them, so a change committed late with a lower id is still
+        read next time; applying a row twice just pushes the same entry.
+        """
+        settled = timezone.now() - SETTLE_TIME
+        entries = list(
+            ChangeLog.objects.filter(id__gt=self.token, model=ReminderSchedule._meta.label_lower)
+            .order_by('id').values_list('id', 'object_id', 'created_at')
+        )
+        if not entries:
+            return
+        user_ids = {object_id for _id, object_id, _created_at in entries}
+        for entry_id, _object_id, created_at in entries:
+            if created_at > settled:
+                break
+            self.token = entry_id
+
+        now = timezone.localtime()
+        rows = ReminderSchedule.objects.filter(pk__in=user_ids).values_list(
+            'user_id', 'minute_of_day', 'last_sent_date'
+        )
+        for user_id, minute, last_sent_date in rows:
+            user_ids.discard(user_id)
+            self.push(user_id, minute, last_sent_date, now)
+        # Deleted schedules leave a stale heap entry behind, skipped when popped
+        for user_id in user_ids:
+            self.due_at.pop(user_id, None)
+
+    def pop_due(self, now):
+        """Due users by the day their reminder belongs to; yesterday's can be due just after midnight."""
+        due = defaultdict(list)
+        while self.heap and self.heap[0][0] <= now:
+            due_at, user_id = heapq.heappop(self.heap)
+            if self.due_at.get(user_id) == due_at:
+                due[due_at.date()].append(user_id)
+                # Tomorrow's reminder; the send may still fail, but the row then stays due for send_reminders
+                next_at = due_at + timedelta(days=1)
+                self.due_at[user_id] = next_at
+                heapq.heappush(self.heap, (next_at, user_id))
+        return due
+
+    def send(self, user_ids, day):
+        try:
+            stats = {"due": 0, "sent": 0, "emails": 0, "email_failures": 0}
+            schedules = ReminderSchedule.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+                NotificationService.not_sent_on(day), pk__in=user_ids
+            ).select_related('user')
+            NotificationService.send_reminder_chunk(schedules, day, self.messages, self.subjects, stats)
+            logger.info(
+                f"Sent {stats['sent']} reminders to {len(user_ids)} due users and {stats['emails']} emails "
+                f"({stats['email_failures']} failed)"
+            )
+        except Exception as e:
+            logger.error(f"Failed to send reminders to {len(user_ids)} users: {e}")
+        finally:
+            # Worker threads hold their own connections
+            connections.close_all()
+            self.slots.release()
+
+    def dispatch(self, user_ids, day):
+        for start in range(0, len(user_ids), self.chunk_size):
+            self.slots.acquire()
+            self.executor.submit(self.send, user_ids[start:start + self.chunk_size], day)
+
+    def run_once(self):
+        """Read the feed and dispatch what is due; returns seconds until the next due reminder or feed read."""
+        self.read_feed()
+        now = timezone.localtime()
+        for day, user_ids in self.pop_due(now).items():
+            self.dispatch(user_ids, day)
+        if not self.heap:
+            return self.feed_interval
+        return max(0.0, min(self.feed_interval, (self.heap[0][0] - timezone.localtime()).total_seconds()))
+
+    def run(self):
+        self.load()
+        try:
+            while not self.stopped.is_set():
+                self.stopped.wait(self.run_once())
+        finally:
+            self.executor.shutdown(wait=True)
+
+    def stop(self):
+        self.stopped.set()
@@ -0,0 +1,184 @@
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from users_app.changelog import SYNCED_MODELS, record as record_change
+from users_app.models import (
+    ChangeLog, Exercise, Meal, MealCompletion, Preparation, Program, Session, SessionCompletion, User, UserProgram,
+)
+from users_app.notifications import NotificationService
+from users_app.plan import invalidate_program_plan
+from users_app.progress import refresh_progress
+from users_app.translation import translations_updated
+from users_app.versions import bump_user_data_version
+
+
+def _programs_with_exercises(exercise_ids):
+    return set(Session.objects.filter(exercises__in=exercise_ids).values_list('program_id', flat=True))
+
+
+def _programs_with_meals(meal_ids):
+    return set(Session.objects.filter(meals__in=meal_ids).values_list('program_id', flat=True))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Saves of unrelated fields, such as last_login on every login, leave the schedule alone
+    if update_fields is not None and not {'reminder_time', 'notification_preferences'} & set(update_fields):
+        return
+    NotificationService.sync_reminder_schedule(instance)
+
+
+@receiver(post_save, sender=Session)
+@receiver(post_delete, sender=Session)
+def session_changed(sender, instance, **kwargs):
+    invalidate_program_plan(instance.program_id)
+
+
+@receiver(m2m_changed, sender=Session.exercises.through)
+@receiver(m2m_changed, sender=Session.meals.through)
+def session_links_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            invalidate_program_plan(instance.program_id)
+            record_change(Session, [instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        # Reverse side: instance is the exercise or meal, pk_set holds session ids
+        invalidate_program_plan(*set(
+            Session.objects.filter(pk__in=pk_set).values_list('program_id', flat=True)
+        ))
+        record_change(Session, pk_set)
+    elif action == 'pre_clear':
+        related = 'exercises' if sender is Session.exercises.through else 'meals'
+        sessions = list(Session.objects.filter(**{related: instance.pk}).values_list('pk', 'program_id'))
+        invalidate_program_plan(*{program_id for _pk, program_id in sessions})
+        record_change(Session, [pk for pk, _program_id in sessions])
+
+
+# Deletes are caught before the session links are removed with the row
+@receiver(post_save, sender=Exercise)
+@receiver(pre_delete, sender=Exercise)
+def exercise_changed(sender, instance, **kwargs):
+    invalidate_program_plan(*_programs_with_exercises([instance.pk]))
+
+
+@receiver(post_save, sender=Meal)
+@receiver(pre_delete, sender=Meal)
+def meal_changed(sender, instance, **kwargs):
+    invalidate_program_plan(*_programs_with_meals([instance.pk]))
+
+
+@receiver(post_save, sender=Preparation)
+@receiver(post_delete, sender=Preparation)
+def preparation_changed(sender, instance, **kwargs):
+    invalidate_program_plan(*_programs_with_meals([instance.meal_id]))
+
+
+@receiver(post_save, sender=Program)
+@receiver(post_delete, sender=Program)
+def program_changed(sender, instance, **kwargs):
+    invalidate_program_plan(instance.pk)
+
+
+# Translated columns are part of the rendered program skeleton
+@receiver(translations_updated, sender=Program)
+def programs_translated(sender, pks, **kwargs):
+    # The payload's goal comes from program_goal_<language>
+    invalidate_program_plan(*pks)
+
+
+@receiver(translations_updated, sender=Exercise)
+def exercises_translated(sender, pks, **kwargs):
+    invalidate_program_plan(*_programs_with_exercises(pks))
+
+
+@receiver(translations_updated, sender=Meal)
+def meals_translated(sender, pks, **kwargs):
+    invalidate_program_plan(*_programs_with_meals(pks))
+
+
+@receiver(translations_updated, sender=Preparation)
+def preparations_translated(sender, pks, **kwargs):
+    meal_ids = Preparation.objects.filter(pk__in=pks).values_list('meal_id', flat=True)
+    invalidate_program_plan(*_programs_with_meals(list(meal_ids)))
+
+
+@receiver(post_save, sender=SessionCompletion)
+@receiver(post_delete, sender=SessionCompletion)
+@receiver(post_save, sender=MealCompletion)
+@receiver(post_delete, sender=MealCompletion)
+@receiver(post_save, sender=UserProgram)
+@receiver(post_delete, sender=UserProgram)
+def user_data_changed(sender, instance, **kwargs):
+    bump_user_data_version(instance.user_id)
+
+
+# Columns the rollups are computed from; the date comes first
+ROLLUP_FIELDS = {
+    SessionCompletion: ('session_date', 'session_id', 'is_completed'),
+    MealCompletion: ('meal_date', 'session_id', 'meal_id', 'is_completed'),
+}
+
+
+def _rollup_state(instance):
+    """Values of the rollup columns, or None when one of them was deferred."""
+    try:
+        return tuple(instance.__dict__[field] for field in ROLLUP_FIELDS[type(instance)])
+    except KeyError:
+        return None
+
+
+@receiver(post_init, sender=SessionCompletion)
+@receiver(post_init, sender=MealCompletion)
+def completion_loaded(sender, instance, **kwargs):
+    # What the stored rollups reflect, compared on save
+    instance._rollup_state = _rollup_state(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=SessionCompletion)
+@receiver(post_save, sender=MealCompletion)
+def completion_saved(sender, instance, created, **kwargs):
+    previous, current = instance._rollup_state, _rollup_state(instance)
+    instance._rollup_state = current
+    # Saves of other columns, such as started_at or meal_time, leave the rollups alone
+    if not created and previous is not None and previous == current:
+        return
+    dates = [current[0] if current else getattr(instance, ROLLUP_FIELDS[sender][0])]
+    if previous is not None:
+        dates.append(previous[0])  # A moved completion leaves its old date behind
+    refresh_progress(instance.user_id, dates)
+
+
+@receiver(post_delete, sender=SessionCompletion)
+@receiver(post_delete, sender=MealCompletion)
+def completion_deleted(sender, instance, origin=None, **kwargs):
+    # Rollups of a deleted user or program go away with it through the cascade
+    if isinstance(origin, (User, Program)):
+        return
+    dates = [getattr(instance, ROLLUP_FIELDS[sender][0])]
+    if instance._rollup_state is not None:
+        dates.append(instance._rollup_state[0])
+    refresh_progress(instance.user_id, dates)
+
+
+def record_saved(sender, instance, **kwargs):
+    _collection, per_user = SYNCED_MODELS[sender]
+    record_change(sender, [instance.pk], user_id=instance.user_id if per_user else None)
+
+
+def record_deleted(sender, instance, origin=None, **kwargs):
+    # A deleted user's entries go away with the user
+    if isinstance(origin, User):
+        return
+    _collection, per_user = SYNCED_MODELS[sender]
+    record_change(sender, [instance.pk], ChangeLog.ACTION_DELETE, user_id=instance.user_id if per_user else None)
+
+
+for synced_model in SYNCED_MODELS:
+    post_save.connect(record_saved, sender=synced_model, dispatch_uid=f'changelog_save_{synced_model.__name__}')
+    post_delete.connect(record_deleted, sender=synced_model, dispatch_uid=f'changelog_delete_{synced_model.__name__}')
+
+
+@receiver(translations_updated)
+def record_translated(sender, pks, **kwargs):
+    if sender in SYNCED_MODELS and not SYNCED_MODELS[sender][1]:
+        record_change(sender, pks)
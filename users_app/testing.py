@@ -0,0 +1,53 @@
+"""Model factories shared by the app test suites."""
+from django.core.cache import cache
+
+from users_app.models import Exercise, Meal, Preparation, Program, Session
+from users_app.versions import version_cache
+
+MEAL_TRANSLATIONS = {
+    'food_name_uz': "Suli bo'tqasi",
+    'food_name_ru': 'Овсянка',
+    'food_name_en': 'Oatmeal',
+    'meal_type_uz': 'Nonushta',
+    'meal_type_ru': 'Завтрак',
+    'meal_type_en': 'Breakfast',
+}
+
+
+def create_meal(translated=True, **fields):
+    """Save a Meal; with ``translated=False`` the language columns stay empty and the row is pending."""
+    values = {
+        'meal_type': 'breakfast',
+        'food_name': 'Oatmeal',
+        'calories': 350,
+        'water_content': 200,
+        'preparation_time': 10,
+    }
+    if translated:
+        values.update(MEAL_TRANSLATIONS)
+    values.update(fields)
+    return Meal.objects.create(**values)
+
+
+def create_program(session_count, meals_per_session=4):
+    # Ids are reused after each test's rollback, so plans and versions cached by earlier tests must go
+    cache.clear()
+    version_cache().clear()
+    program = Program.objects.create(
+        frequency_per_week=3, program_goal='Lose weight', program_goal_uz='Ozish',
+        program_goal_ru='Похудение', program_goal_en='Lose weight', total_sessions=session_count,
+    )
+    exercise = Exercise.objects.create(
+        name='Squat', description='Bodyweight squat', difficulty_level='easy',
+        target_muscle='legs', video_url='https://example.com/squat',
+    )
+    meals = []
+    for index in range(meals_per_session):
+        meal = create_meal(translated=False, food_name=f'Meal {index}', calories=300)
+        Preparation.objects.create(meal=meal, name='Boil', description='Boil water', preparation_time=5)
+        meals.append(meal)
+    for number in range(1, session_count + 1):
+        session = Session.objects.create(program=program, session_number=number, calories_burned=150)
+        session.exercises.add(exercise)
+        session.meals.add(*meals)
+    return program
@@ -1,3 +1,748 @@
-from django.test import TestCase
+import json
+import threading
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from gettext import GNUTranslations
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.core.mail.backends.locmem import EmailBackend as LocMemEmailBackend
+from django.db.models import QuerySet
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from users_app.enrollment import enroll_user, ensure_materialized
+from users_app.management.commands.compile_catalogs import parse_po, write_mo
+from users_app.mail import EmailSender
+from users_app.plan import get_program_plan, program_version
+from users_app.models import (
+    Exercise, Meal, MealCompletion, Notification, Program, ReminderSchedule, Session, SessionCompletion, TranslationCache, User,
+    UserProgram,
+)
+from users_app.notifications import NotificationService
+from users_app.reminder_scheduler import ReminderScheduler
+from users_app.testing import create_meal, create_program
+from users_app.translation import (
+    CircuitBreaker, LocalDictionaryBackend, LRUCache, TranslationQueue, TranslationService, translate_instance,
+    translate_text, translation_queue, translation_service,
+)
+
+
+class ScheduleRemindersTests(TestCase):
+    now = datetime(2026, 3, 2, 8, 30, tzinfo=dt_timezone.utc)
+
+    def create_user(self, email, reminder_time):
+        user = User.objects.create_user(email, 'password')
+        user.reminder_time = reminder_time
+        user.save()
+        return user
+
+    def send(self, **kwargs):
+        with mock.patch('users_app.notifications.timezone.localtime', return_value=self.now):
+            return NotificationService.schedule_reminders(**kwargs)
+
+    def test_schedule_follows_user_settings(self):
+        user = self.create_user('schedule@example.com', time(7, 45))
+        self.assertEqual(ReminderSchedule.objects.get(user=user).minute_of_day, 7 * 60 + 45)
+
+        user.notification_preferences = dict(user.notification_preferences, reminder_enabled=False)
+        user.save(update_fields=['notification_preferences'])
+        self.assertFalse(ReminderSchedule.objects.filter(user=user).exists())
+
+        # Unrelated saves do not touch the schedule
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+
+    def test_only_users_in_due_buckets_are_reminded_once(self):
+        due = self.create_user('due@example.com', time(8, 0))
+        self.create_user('later@example.com', time(9, 0))
+        self.create_user('stale@example.com', time(6, 0))
+
+        stats = self.send(window=60)
+        self.assertEqual((stats['due'], stats['sent'], stats['emails']), (1, 1, 1))
+        self.assertEqual(list(Notification.objects.values_list('user', flat=True)), [due.pk])
+        self.assertEqual(mail.outbox[0].to, ['due@example.com'])
+        self.assertEqual(ReminderSchedule.objects.get(user=due).last_sent_date, self.now.date())
+
+        self.assertEqual(self.send(window=60)['sent'], 0)
+
+    def test_window_reaches_back_past_midnight(self):
+        missed = self.create_user('missed@example.com', time(23, 30))
+        self.create_user('early@example.com', time(22, 0))
+        fresh = self.create_user('fresh@example.com', time(0, 5))
+        ReminderSchedule.objects.filter(user=missed).update(last_sent_date=date(2026, 2, 28))
+
+        with mock.patch.object(self, 'now', datetime(2026, 3, 2, 0, 10, tzinfo=dt_timezone.utc)):
+            stats = self.send(window=60)
+        self.assertEqual((stats['due'], stats['sent']), (2, 2))
+        self.assertEqual(
+            dict(ReminderSchedule.objects.filter(user__in=[missed, fresh]).values_list('user', 'last_sent_date')),
+            # Yesterday's reminder counts for yesterday, so tonight's is still sent
+            {missed.pk: date(2026, 3, 1), fresh.pk: date(2026, 3, 2)},
+        )
+
+    def test_due_users_are_sent_in_chunks(self):
+        users = [self.create_user(f'batch{index}@example.com', time(8, index)) for index in range(5)]
+        User.objects.filter(pk=users[0].pk).update(language='ru')
+        messages = NotificationService.render_catalog(NotificationService.REMINDER_MESSAGE)
+
+        # Per chunk of two: the select, the last_sent_date claim in its own savepoint and the
+        # bulk insert, in a savepoint; the fourth, empty chunk ends the run
+        with mock.patch('users_app.notifications.get_connection', wraps=get_connection) as connect, \
+                self.assertNumQueries(24):
+            stats = self.send(window=60, chunk_size=2)
+        self.assertEqual((stats['due'], stats['sent'], stats['emails']), (5, 5, 5))
+        # One connection per chunk for all of its emails
+        self.assertEqual(connect.call_count, 3)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [user.email_or_phone for user in users])
+
+        notifications = Notification.objects.filter(notification_type='reminder')
+        self.assertEqual(notifications.count(), 5)
+        self.assertTrue(all(n.translation_status == Notification.TRANSLATION_DONE for n in notifications))
+        russian = notifications.get(user=users[0])
+        self.assertEqual((russian.language, russian.message, russian.message_en), ('ru', messages['ru'], messages['en']))
+
+
+class ReminderSchedulerTests(TestCase):
+    now = datetime(2026, 3, 2, 8, 30, tzinfo=dt_timezone.utc)
+
+    def create_user(self, email, reminder_time):
+        user = User.objects.create_user(email, 'password')
+        user.reminder_time = reminder_time
+        user.save()
+        return user
+
+    def test_heap_follows_schedule_changes(self):
+        early = self.create_user('early@example.com', time(8, 0))
+        late = self.create_user('late@example.com', time(9, 0))
+        scheduler = ReminderScheduler(workers=1)
+        with mock.patch('users_app.reminder_scheduler.timezone.localtime', return_value=self.now):
+            scheduler.load()
+        self.assertEqual(scheduler.pop_due(self.now), {self.now.date(): [early.pk]})
+        # The popped reminder moves to tomorrow
+        self.assertEqual(scheduler.due_at[early.pk], datetime(2026, 3, 3, 8, 0, tzinfo=dt_timezone.utc))
+
+        late.reminder_time = time(8, 15)
+        late.save()
+        early.notification_preferences = dict(early.notification_preferences, reminder_enabled=False)
+        early.save()
+        with mock.patch('users_app.reminder_scheduler.timezone.localtime', return_value=self.now):
+            scheduler.read_feed()
+        self.assertEqual(scheduler.pop_due(self.now), {self.now.date(): [late.pk]})
+        self.assertEqual(scheduler.pop_due(self.now + timedelta(days=1)), {date(2026, 3, 3): [late.pk]})
+
+    def test_rows_claimed_by_the_command_are_not_sent_again(self):
+        user = self.create_user('claimed@example.com', time(8, 0))
+        scheduler = ReminderScheduler(workers=1)
+        send_reminder_chunk = NotificationService.send_reminder_chunk
+
+        def interleaved(schedules, *args):
+            rows = list(schedules)
+            # The send_reminders command runs between the scheduler's read and its claim
+            with mock.patch.object(NotificationService, 'send_reminder_chunk', send_reminder_chunk), \
+                    mock.patch('users_app.notifications.timezone.localtime', return_value=self.now):
+                sent.append(NotificationService.schedule_reminders(window=60)['sent'])
+            return send_reminder_chunk(rows, *args)
+
+        sent = []
+        scheduler.slots.acquire()
+        with mock.patch.object(NotificationService, 'send_reminder_chunk', side_effect=interleaved), \
+                mock.patch('users_app.reminder_scheduler.connections'):
+            scheduler.send([user.pk], self.now.date())
+        self.assertEqual(sent, [1])
+        self.assertEqual(Notification.objects.filter(user=user, notification_type='reminder').count(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+        # The other way round the command finds nothing left to send
+        ReminderSchedule.objects.update(last_sent_date=None)
+        scheduler.slots.acquire()
+        with mock.patch('users_app.reminder_scheduler.connections'):
+            scheduler.send([user.pk], self.now.date())
+        with mock.patch('users_app.notifications.timezone.localtime', return_value=self.now):
+            self.assertEqual(NotificationService.schedule_reminders(window=60)['sent'], 0)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_window_reaches_back_past_midnight(self):
+        scheduler = ReminderScheduler(workers=1, window=60)
+        after_midnight = datetime(2026, 3, 2, 0, 10, tzinfo=dt_timezone.utc)
+        yesterday = date(2026, 3, 1)
+
+        def due(minute, last_sent_date):
+            return scheduler.next_due(minute, last_sent_date, after_midnight)
+
+        # 23:30 was missed yesterday and is still within the window
+        self.assertEqual(due(23 * 60 + 30, None), datetime(2026, 3, 1, 23, 30, tzinfo=dt_timezone.utc))
+        self.assertEqual(due(23 * 60 + 30, date(2026, 2, 28)), datetime(2026, 3, 1, 23, 30, tzinfo=dt_timezone.utc))
+        # Sent yesterday: next due tonight
+        self.assertEqual(due(23 * 60 + 30, yesterday), datetime(2026, 3, 2, 23, 30, tzinfo=dt_timezone.utc))
+        # Outside the window
+        self.assertEqual(due(22 * 60, None), datetime(2026, 3, 2, 22, 0, tzinfo=dt_timezone.utc))
+        self.assertEqual(due(5, None), datetime(2026, 3, 2, 0, 5, tzinfo=dt_timezone.utc))
+
+        scheduler.push(1, 23 * 60 + 30, None, after_midnight)
+        scheduler.push(2, 5, None, after_midnight)
+        self.assertEqual(scheduler.pop_due(after_midnight), {yesterday: [1], date(2026, 3, 2): [2]})
+
+
+class SendMealRemindersTests(TestCase):
+    now = datetime(2026, 3, 2, 8, 30, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        program = Program.objects.create(frequency_per_week=3, program_goal='Lose weight', total_sessions=1)
+        self.session = Session.objects.create(program=program, session_number=1, calories_burned=150)
+        self.user = User.objects.create_user('meals@example.com', 'password')
+
+    def add_meal(self, name, meal_time, **fields):
+        meal = create_meal(translated=False, food_name=name, food_name_ru=f'{name} ru', calories=300)
+        return MealCompletion.objects.create(
+            user=self.user, session=self.session, meal=meal, meal_date=self.now.date(), meal_time=meal_time, **fields
+        )
+
+    def send(self):
+        with mock.patch('users_app.notifications.timezone.localtime', return_value=self.now):
+            return NotificationService.send_meal_reminders(window=60)
+
+    def test_due_meals_are_reminded_once_per_channel(self):
+        due = self.add_meal('Oatmeal', time(8, 15))
+        later = self.add_meal('Soup', time(13, 0))
+        eaten = self.add_meal('Eggs', time(8, 0), is_completed=True)
+
+        stats = self.send()
+        self.assertEqual((stats['due'], stats['sent'], stats['emails'], stats['sms']), (1, 1, 1, 0))
+        notification = Notification.objects.get(notification_type='meal_reminder')
+        self.assertEqual(notification.message_ru, 'Время приёма пищи: Oatmeal ru')
+        self.assertEqual(mail.outbox[0].to, ['meals@example.com'])
+        self.assertEqual(
+            dict(MealCompletion.objects.values_list('pk', 'reminder_sent')),
+            {due.pk: True, later.pk: False, eaten.pk: False},
+        )
+
+        self.assertEqual(self.send()['due'], 0)
+
+    def test_rows_claimed_by_another_run_are_not_reminded_again(self):
+        raced = self.add_meal('Oatmeal', time(8, 15))
+        self.add_meal('Tea', time(8, 20))
+        select_for_update = QuerySet.select_for_update
+
+        # SQLite ignores the row lock: another run marks a row right after this one reads it
+        def read_then_race(queryset, *args, **kwargs):
+            rows = list(select_for_update(queryset, *args, **kwargs))
+            MealCompletion.objects.filter(pk=raced.pk).update(reminder_sent=True)
+            return rows
+
+        with mock.patch.object(QuerySet, 'select_for_update', read_then_race):
+            stats = self.send()
+        self.assertEqual((stats['due'], stats['sent'], stats['emails']), (1, 1, 1))
+        self.assertEqual(Notification.objects.get(notification_type='meal_reminder').message_en, 'Time for your meal: Tea')
+
+    def test_only_reminders_that_went_out_are_counted(self):
+        self.add_meal('Oatmeal', time(8, 15))
+        User.objects.filter(pk=self.user.pk).update(notification_preferences={
+            'reminder_enabled': True, 'in_app': False, 'email': False, 'sms': False,
+        })
+        stats = self.send()
+        self.assertEqual((stats['due'], stats['sent']), (1, 0))
+        self.assertFalse(MealCompletion.objects.filter(reminder_sent=False).exists())
+
+
+class FlakyEmailBackend(LocMemEmailBackend):
+    """Fails the first ``failures`` sends of the test, then delivers to mail.outbox."""
+    failures = 0
+
+    def send_messages(self, messages):
+        if FlakyEmailBackend.failures:
+            FlakyEmailBackend.failures -= 1
+            raise ConnectionError('SMTP unavailable')
+        return super().send_messages(messages)
+
+
+@override_settings(QUEUED_EMAIL_BACKEND='users_app.tests.FlakyEmailBackend')
+class QueuedEmailBackendTests(TestCase):
+    def setUp(self):
+        self.sender = EmailSender(retry_delay=0.01, max_attempts=3, idle_timeout=0.1)
+        self.addCleanup(self.sender.stop, timeout=5)
+
+    def message(self, to):
+        return EmailMessage(subject='Hi', body='Hello', from_email='app@example.com', to=[to])
+
+    def test_send_mail_only_enqueues(self):
+        with override_settings(EMAIL_BACKEND='users_app.mail.QueuedEmailBackend'), \
+                mock.patch('users_app.mail.email_sender', self.sender):
+            self.assertEqual(send_mail('Hi', 'Hello', 'app@example.com', ['a@example.com']), 1)
+            self.assertTrue(self.sender.flush(timeout=5))
+        self.assertEqual([message.to for message in mail.outbox], [['a@example.com']])
+
+    def test_batches_share_a_connection_and_failures_are_retried(self):
+        FlakyEmailBackend.failures = 1
+        self.sender.enqueue([self.message(f'{index}@example.com') for index in range(5)])
+        self.assertTrue(self.sender.flush(timeout=5))
+
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox), [f'{index}@example.com' for index in range(5)]
+        )
+        stats = self.sender.stats()
+        self.assertEqual((stats['sent'], stats['retried'], stats['failed'], stats['pending']), (5, 1, 0, 0))
+        # One connection, reopened once after the failure
+        self.assertEqual(stats['connections_opened'], 2)
+
+    def test_gives_up_after_max_attempts(self):
+        FlakyEmailBackend.failures = 3
+        self.sender.enqueue([self.message('lost@example.com')])
+        self.assertTrue(self.sender.flush(timeout=5))
+        self.assertEqual((self.sender.stats()['failed'], len(mail.outbox)), (1, 0))
+
+    def test_stop_ends_the_worker_and_enqueue_restarts_it(self):
+        self.sender.enqueue([self.message('first@example.com')])
+        self.assertTrue(self.sender.flush(timeout=5))
+        worker = self.sender._thread
+        self.sender.stop(timeout=5)
+        self.assertFalse(worker.is_alive())
+
+        self.sender.enqueue([self.message('second@example.com')])
+        self.assertTrue(self.sender.flush(timeout=5))
+        self.assertEqual([message.to[0] for message in mail.outbox], ['first@example.com', 'second@example.com'])
+
+    def test_stop_during_a_send_leaves_nothing_on_the_queue(self):
+        sending, release = threading.Event(), threading.Event()
+
+        def send(attempts, message):
+            sending.set()
+            release.wait(5)
+
+        with mock.patch.object(self.sender, '_send', side_effect=send):
+            self.sender.enqueue([self.message('busy@example.com')])
+            self.assertTrue(sending.wait(5))
+            worker = self.sender._thread
+            self.sender.stop(timeout=0)
+            release.set()
+            worker.join(5)
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(self.sender.stats()['queue_depth'], 0)
+
+    def test_send_times_outside_the_rate_window_are_dropped_on_send(self):
+        # Sends from long ago, never trimmed by a stats() call
+        self.sender._sent_at.extend([float('-inf')] * 2)
+        self.sender.enqueue([self.message('now@example.com')])
+        self.assertTrue(self.sender.flush(timeout=5))
+        self.assertEqual(len(self.sender._sent_at), 1)
+
+
+# Committed rows, so the command's worker threads see them on their own connections
+class BackfillTranslationsTests(TransactionTestCase):
+    dictionary = {
+        'en': {'Soup': 'Soup'},
+        'ru': {'Soup': 'Суп'},
+        'uz': {'Soup': "Sho'rva"},
+    }
+
+    def setUp(self):
+        translation_service.clear()
+        self.addCleanup(translation_service.clear)
+        for patcher in (
+            mock.patch.object(translation_service, 'backend', LocalDictionaryBackend(dictionary=self.dictionary)),
+            # Leave pending rows to the command instead of the background worker
+            mock.patch.object(translation_queue, 'enqueue'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.pending = self.add_meal('Soup')
+
+    def add_meal(self, name, **fields):
+        meal = create_meal(translated=False, meal_type='lunch', food_name=name, calories=300)
+        Meal.objects.filter(pk=meal.pk).update(**fields)
+        return meal
+
+    def backfill(self, *args):
+        out = StringIO()
+        call_command('backfill_translations', '--model', 'meal', *args, stdout=out)
+        return out.getvalue()
+
+    def test_translates_pending_rows_only(self):
+        done = self.add_meal('Bread', translation_status=Meal.TRANSLATION_DONE)
+        failed = self.add_meal('Tea', translation_status=Meal.TRANSLATION_FAILED)
+        # Translated field set, the other one has no source text
+        no_source = self.add_meal(
+            'Rice', meal_type='', food_name_en='Rice', food_name_ru='Рис', food_name_uz='Guruch'
+        )
+
+        self.assertIn('Meal: 1 rows with missing translations', self.backfill())
+        self.pending.refresh_from_db()
+        self.assertEqual((self.pending.food_name_ru, self.pending.food_name_uz), ('Суп', "Sho'rva"))
+        self.assertEqual(self.pending.translation_status, Meal.TRANSLATION_DONE)
+        statuses = Meal.objects.filter(pk__in=[done.pk, failed.pk, no_source.pk]).values_list('pk', 'translation_status')
+        self.assertEqual(dict(statuses), {
+            done.pk: Meal.TRANSLATION_DONE, failed.pk: Meal.TRANSLATION_FAILED, no_source.pk: Meal.TRANSLATION_PENDING,
+        })
+        # Nothing is left to select on the next run
+        self.assertNotIn('rows with missing translations', self.backfill())
+
+    def test_dry_run_writes_neither_rows_nor_cache(self):
+        self.backfill('--dry-run')
+        self.pending.refresh_from_db()
+        self.assertIsNone(self.pending.food_name_ru)
+        self.assertEqual(self.pending.translation_status, Meal.TRANSLATION_PENDING)
+        self.assertFalse(TranslationCache.objects.exists())
+
+    def test_local_translator_implies_dry_run(self):
+        self.assertIn('nothing is written', self.backfill('--translator', 'local'))
+        self.pending.refresh_from_db()
+        self.assertIsNone(self.pending.food_name_ru)
+        self.assertEqual(self.pending.translation_status, Meal.TRANSLATION_PENDING)
+        self.assertFalse(TranslationCache.objects.exists())
+
+
+class RecordingBackend:
+    """Translates by prefixing the language code and records every call; fails while ``fail`` is set."""
+
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+
+    def translate(self, texts, target_language):
+        self.calls.append((list(texts), target_language))
+        if self.fail:
+            raise ConnectionError('backend down')
+        return [f'{target_language}:{text}' for text in texts]
+
+
+class HangingBackend(RecordingBackend):
+    """Blocks on texts starting with 'hang' until ``release`` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def translate(self, texts, target_language):
+        if any(text.startswith('hang') for text in texts):
+            self.release.wait(5)
+        return super().translate(texts, target_language)
+
+
+class TranslationServiceTests(TestCase):
+    def setUp(self):
+        self.backend = RecordingBackend()
+        self.service = TranslationService(maxsize=2, backend=self.backend)
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+
+    def test_results_are_memoized_in_memory_then_in_the_database(self):
+        self.assertEqual(self.service.translate('Hello', 'ru'), 'ru:Hello')
+        self.assertEqual(self.service.translate('Hello', 'ru'), 'ru:Hello')
+        self.assertEqual(len(self.backend.calls), 1)
+        self.assertEqual(self.service.memory_hits, 1)
+
+        # A fresh process only has the table
+        service = TranslationService(backend=self.backend)
+        with self.assertNumQueries(1):
+            self.assertEqual(service.translate('Hello', 'ru'), 'ru:Hello')
+        self.assertEqual((service.db_hits, len(self.backend.calls)), (1, 1))
+        self.assertEqual(TranslationCache.objects.get().translated_text, 'ru:Hello')
+
+    def test_failures_return_the_source_and_are_not_cached(self):
+        self.backend.fail = True
+        self.assertEqual(self.service.translate('Hello', 'uz'), 'Hello')
+        self.assertFalse(TranslationCache.objects.exists())
+        self.backend.fail = False
+        self.assertEqual(self.service.translate('Hello', 'uz'), 'uz:Hello')
+        self.assertEqual(len(self.backend.calls), 2)
+
+    @override_settings(TRANSLATION_BREAKER_THRESHOLD=2)
+    def test_breaker_fails_fast_after_repeated_errors(self):
+        service = TranslationService(backend=self.backend)
+        self.backend.fail = True
+        for text in ('a', 'b', 'c'):
+            self.assertEqual(service.translate(text, 'uz'), text)
+        self.assertEqual(len(self.backend.calls), 2)
+        self.assertEqual(service.stats()['errors'], 2)
+        self.assertEqual(service.stats()['circuit_breaker']['rejected_calls'], 1)
+
+    @override_settings(TRANSLATION_TIMEOUT=0.05, TRANSLATION_MAX_CONCURRENCY=1)
+    def test_slow_calls_time_out_without_holding_the_pool(self):
+        backend = HangingBackend()
+        self.addCleanup(backend.release.set)
+        service = TranslationService(backend=backend)
+        self.assertEqual(service.translate('hang on', 'ru'), 'hang on')
+        self.assertEqual(service.stats()['timeouts'], 1)
+        self.assertFalse(TranslationCache.objects.exists())
+
+        # The hung call still holds its thread; the next call runs on a fresh pool
+        self.assertEqual(service.translate('Hello', 'ru'), 'ru:Hello')
+        self.assertEqual(service.stats()['timeouts'], 1)
+
+    def test_translate_text_uses_the_shared_service(self):
+        with mock.patch.object(translation_service, 'backend', self.backend):
+            translation_service.clear()
+            self.addCleanup(translation_service.clear)
+            self.assertEqual(translate_text('Bye', 'en'), 'en:Bye')
+            self.assertEqual(translate_text('Bye', 'en'), 'en:Bye')
+        self.assertEqual(len(self.backend.calls), 1)
+
+
+class CircuitBreakerTests(TestCase):
+    def test_opens_after_threshold_and_recovers_through_a_trial_call(self):
+        breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+        # After reset_timeout a single trial call is let through
+        breaker.opened_at -= 60
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        # A failed trial reopens the breaker at once
+        breaker.record_failure()
+        self.assertEqual((breaker.state, breaker.times_opened), (CircuitBreaker.OPEN, 2))
+        self.assertFalse(breaker.allow())
+
+        breaker.opened_at -= 60
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual((breaker.state, breaker.failures), (CircuitBreaker.CLOSED, 0))
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.stats()['rejected_calls'], 3)
+
+
+class LocalDictionaryBackendTests(TestCase):
+    dictionary = {'ru': {'Soup': 'Суп'}}
+
+    def test_dictionary_comes_from_a_mapping_or_a_json_file(self):
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / 'dictionary.json'
+            path.write_text(json.dumps(self.dictionary), encoding='utf-8')
+            backends = [LocalDictionaryBackend(dictionary=self.dictionary), LocalDictionaryBackend(dictionary=path)]
+            with override_settings(TRANSLATION_DICTIONARY=str(path)):
+                backends.append(LocalDictionaryBackend())
+
+        for backend in backends:
+            self.assertEqual(backend.translate(['Soup', 'Tea'], 'ru'), ['Суп', 'Tea'])
+            # Unknown languages leave the texts unchanged
+            self.assertEqual(backend.translate(['Soup'], 'uz'), ['Soup'])
+
+
+class TranslationStatusTests(TestCase):
+    def setUp(self):
+        self.backend = RecordingBackend()
+        translation_service.clear()
+        self.addCleanup(translation_service.clear)
+        patcher = mock.patch.object(translation_service, 'backend', self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add_meal(self, **fields):
+        return create_meal(translated=False, meal_type='lunch', food_name='Soup', calories=300, **fields)
+
+    def test_save_queues_missing_translations_after_commit(self):
+        with mock.patch.object(translation_queue, 'enqueue') as enqueue:
+            with self.captureOnCommitCallbacks(execute=True):
+                meal = self.add_meal()
+                enqueue.assert_not_called()
+        enqueue.assert_called_once_with(Meal, meal.pk)
+        self.assertEqual(meal.translation_status, Meal.TRANSLATION_PENDING)
+        # save() never calls the backend itself
+        self.assertEqual(self.backend.calls, [])
+
+    def test_translate_instance_fills_columns_and_status(self):
+        with mock.patch.object(translation_queue, 'enqueue'):
+            meal = self.add_meal()
+        translate_instance(Meal, meal.pk)
+        meal.refresh_from_db()
+        self.assertEqual((meal.food_name_ru, meal.translation_status), ('ru:Soup', Meal.TRANSLATION_DONE))
+
+        self.backend.fail = True
+        with mock.patch.object(translation_queue, 'enqueue'):
+            meal = self.add_meal(food_name_en='Soup', food_name_ru='Суп', food_name_uz="Sho'rva")
+            meal.food_name = 'Tea'
+            meal.food_name_ru = None
+            meal.save()
+        translate_instance(Meal, meal.pk)
+        meal.refresh_from_db()
+        self.assertEqual((meal.food_name_ru, meal.translation_status), (None, Meal.TRANSLATION_FAILED))
+
+
+class TranslationQueueTests(TransactionTestCase):
+    def test_worker_translates_queued_rows(self):
+        backend = RecordingBackend()
+        translation_service.clear()
+        self.addCleanup(translation_service.clear)
+        worker = TranslationQueue()
+        with mock.patch.object(translation_service, 'backend', backend), \
+                mock.patch.object(translation_queue, 'enqueue', worker.enqueue):
+            meal = create_meal(translated=False, meal_type='lunch', food_name='Soup', calories=300)
+            worker.queue.join()
+        meal.refresh_from_db()
+        self.assertEqual((meal.food_name_uz, meal.translation_status), ('uz:Soup', Meal.TRANSLATION_DONE))
+
+
+class CompileCatalogsTests(TestCase):
+    catalog = r'''msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\n"
+"Plural-Forms: nplurals=3; plural=(n%10==1 && n%100!=11 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2);\n"
+
+# A plain message
+msgid "Exercise created successfully"
+msgstr "Упражнение успешно создано"
+
+msgctxt "meal"
+msgid "Lunch"
+msgstr "Обед"
+
+msgid "One session"
+msgid_plural "%(count)s sessions"
+msgstr[0] "%(count)s занятие"
+msgstr[1] "%(count)s занятия"
+msgstr[2] "%(count)s занятий"
+
+#, fuzzy
+msgid "Program deleted successfully"
+msgstr "Программа удалена"
+
+msgid "Not translated yet"
+msgstr ""
+'''
+
+    def test_compiled_catalog_is_read_by_gettext(self):
+        with TemporaryDirectory() as directory:
+            po_path = Path(directory) / 'django.po'
+            po_path.write_text(self.catalog, encoding='utf-8')
+            write_mo(parse_po(po_path), po_path.with_suffix('.mo'))
+            with open(po_path.with_suffix('.mo'), 'rb') as mo_file:
+                catalog = GNUTranslations(mo_file)
+
+        self.assertEqual(catalog.gettext('Exercise created successfully'), 'Упражнение успешно создано')
+        self.assertEqual(catalog.pgettext('meal', 'Lunch'), 'Обед')
+        self.assertEqual(catalog.ngettext('One session', '%(count)s sessions', 3), '%(count)s занятия')
+        self.assertEqual(catalog.ngettext('One session', '%(count)s sessions', 5), '%(count)s занятий')
+        # Fuzzy and empty entries fall back to the msgid
+        self.assertEqual(catalog.gettext('Program deleted successfully'), 'Program deleted successfully')
+        self.assertEqual(catalog.gettext('Not translated yet'), 'Not translated yet')
+
+
+class EnrollUserTests(TestCase):
+    @override_settings(COMPLETION_WINDOW_DAYS=None)
+    def test_query_count_does_not_depend_on_program_length(self):
+        for index, session_count in enumerate((5, 20)):
+            program = create_program(session_count)
+            user = User.objects.create_user(f'enroll{index}@example.com', 'password')
+            get_program_plan(program.pk)
+            # The plan version, then bulk inserts, change log, rollups and version bump in one
+            # transaction; both programs fit in a single insert batch (SQLite caps the
+            # parameters per statement)
+            with self.assertNumQueries(18):
+                enroll_user(user, program, start_date=date(2026, 3, 2))
+            self.assertEqual(SessionCompletion.objects.filter(user=user).count(), session_count)
+            self.assertEqual(MealCompletion.objects.filter(user=user).count(), session_count * 4)
+            self.assertEqual(
+                SessionCompletion.objects.filter(user=user, session_number_private=session_count).get().session_date,
+                date(2026, 3, 2) + timedelta(days=session_count - 1),
+            )
+
+
+@override_settings(COMPLETION_WINDOW_DAYS=3)
+class CompletionWindowTests(TestCase):
+    start = date(2026, 3, 2)
+
+    def setUp(self):
+        self.program = create_program(10)
+        self.user = User.objects.create_user('window@example.com', 'password')
+
+    def today(self, day):
+        return mock.patch(
+            'users_app.enrollment.timezone.now', return_value=datetime.combine(day, time(12), tzinfo=dt_timezone.utc)
+        )
+
+    def session_dates(self):
+        return list(SessionCompletion.objects.filter(user=self.user).order_by('session_date').values_list(
+            'session_date', flat=True
+        ))
+
+    def test_enrollment_materializes_the_window_only(self):
+        user_program = enroll_user(self.user, self.program, start_date=self.start)
+        self.assertEqual(self.session_dates(), [self.start + timedelta(days=day) for day in range(3)])
+        self.assertEqual(user_program.materialized_until, self.start + timedelta(days=2))
+        self.assertEqual(MealCompletion.objects.filter(user=self.user).count(), 3 * 4)
+
+    def test_access_extends_the_window(self):
+        enroll_user(self.user, self.program, start_date=self.start)
+        with self.today(self.start + timedelta(days=2)):
+            ensure_materialized(self.user)
+            self.assertEqual(self.session_dates()[-1], self.start + timedelta(days=4))
+            # Nothing due: one query
+            with self.assertNumQueries(1):
+                ensure_materialized(self.user)
+
+        # A far-future date reaches one more window ahead at most
+        with self.today(self.start + timedelta(days=2)):
+            ensure_materialized(self.user, through=self.start + timedelta(days=365))
+        self.assertEqual(self.session_dates()[-1], self.start + timedelta(days=7))
+
+        # The window never runs past the end of the program
+        with self.today(self.start + timedelta(days=30)):
+            ensure_materialized(self.user)
+        self.assertEqual(len(self.session_dates()), 10)
+        user_program = UserProgram.objects.get(user=self.user)
+        self.assertEqual(user_program.materialized_until, user_program.end_date)
+
+
+class ProgramPlanInvalidationTests(TestCase):
+    def setUp(self):
+        # Edits are committed below; keep the translation worker out of it
+        patcher = mock.patch.object(translation_queue, 'enqueue')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.program = create_program(2)
+        self.plan = get_program_plan(self.program.pk)
+
+    def assert_invalidated_on_commit(self, edit):
+        version = program_version(self.program.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            edit()
+            # Readers keep the old version until the edit commits
+            self.assertEqual(program_version(self.program.pk), version)
+        self.assertNotEqual(program_version(self.program.pk), version)
+        return get_program_plan(self.program.pk)
+
+    def test_session_edit(self):
+        session = Session.objects.get(program=self.program, session_number=1)
+        session.calories_burned = 400
+
+        plan = self.assert_invalidated_on_commit(session.save)
+        self.assertEqual(plan.session_by_number(1).calories_burned, 400)
+
+    def test_exercise_edit(self):
+        exercise = Exercise.objects.get()
+        exercise.name = 'Lunge'
+        self.assert_invalidated_on_commit(exercise.save)
+
+    def test_meal_edit(self):
+        meal = Meal.objects.get(pk=self.plan.sessions[0].meal_ids[0])
+        meal.calories = 999
+
+        plan = self.assert_invalidated_on_commit(meal.save)
+        self.assertEqual(plan.calories_by_meal()[meal.pk], 999)
+
+    def test_program_translation(self):
+        # translate_instance writes with update(), so only translations_updated reports it
+        Program.objects.filter(pk=self.program.pk).update(program_goal_uz=None)
+        with mock.patch.object(translation_service, 'translate', return_value="Vazn yo'qotish"):
+            self.assert_invalidated_on_commit(lambda: translate_instance(Program, self.program.pk))
+
+    def test_versions_outlive_the_process_cache(self):
+        version = program_version(self.program.pk)
+        # Plans are kept per process, versions in the cache every process shares
+        cache.clear()
+        self.assertEqual(program_version(self.program.pk), version)
+        self.assertEqual(get_program_plan(self.program.pk).version, version)
@@ -0,0 +1,408 @@
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from pathlib import Path
+
+import httpx
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections
+from django.dispatch import Signal
+from django.utils.module_loading import import_string
+from googletrans import Translator
+
+logger = logging.getLogger(__name__)
+
+# Sent with the model class as sender and the updated primary keys as ``pks``
+# after translated columns are written with update()/bulk_update(), which
+# bypass post_save.
+translations_updated = Signal()
+
+
+def source_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Small thread-safe LRU used in front of the TranslationCache table."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+                return self._data[key]
+            except KeyError:
+                return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TranslationUnavailable(Exception):
+    """Raised when a backend call fails, times out or is rejected by the breaker."""
+
+
+class GoogleTranslateBackend:
+    """Adapter for googletrans with a per-request HTTP timeout."""
+
+    def __init__(self, timeout=None):
+        self.translator = Translator(timeout=httpx.Timeout(timeout) if timeout else None)
+
+    def translate(self, texts, target_language):
+        translations = self.translator.translate(list(texts), dest=target_language)
+        return [translation.text if translation else text for text, translation in zip(texts, translations)]
+
+
+class LocalDictionaryBackend:
+    """
+    Deterministic offline backend.
+
+    Translations come from TRANSLATION_DICTIONARY, a {language: {text: translation}}
+    mapping or the path of a JSON file holding one. Unknown texts are returned
+    unchanged. An optional artificial latency makes it usable for benchmarks.
+    """
+
+    def __init__(self, timeout=None, dictionary=None, latency=0.0):
+        if dictionary is None:
+            dictionary = getattr(settings, "TRANSLATION_DICTIONARY", None) or {}
+        if isinstance(dictionary, (str, Path)):
+            dictionary = json.loads(Path(dictionary).read_text(encoding="utf-8"))
+        self.dictionary = dictionary
+        self.latency = latency
+
+    def translate(self, texts, target_language):
+        if self.latency:
+            time.sleep(self.latency)
+        entries = self.dictionary.get(target_language, {})
+        return [entries.get(text, text) for text in texts]
+
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated backend errors.
+
+    After ``threshold`` consecutive failures the breaker opens and rejects
+    calls for ``reset_timeout`` seconds, then lets a single trial call
+    through (half-open); its outcome closes or reopens the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold=5, reset_timeout=60.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            if self.state == self.CLOSED:
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected_calls": self.rejected,
+        }
+
+
+def load_backend(**kwargs):
+    backend_path = getattr(settings, "TRANSLATION_BACKEND", "users_app.translation.GoogleTranslateBackend")
+    return import_string(backend_path)(timeout=getattr(settings, "TRANSLATION_TIMEOUT", None), **kwargs)
+
+
+class TranslationService:
+    """
+    Translates short texts through the configured backend, memoizing every result.
+
+    Lookups go to an in-process LRU first, then to the TranslationCache table
+    (keyed on the source text hash and target language), and only then to the
+    backend. Backend calls run with a hard deadline behind a circuit breaker;
+    when either trips, the source text is returned. Counters are kept so hit
+    rates and breaker state can be inspected at runtime.
+    """
+
+    def __init__(self, maxsize=None, backend=None):
+        self.backend = backend or load_backend()
+        self.memory = LRUCache(maxsize or getattr(settings, "TRANSLATION_CACHE_SIZE", 10000))
+        self.breaker = CircuitBreaker(
+            threshold=getattr(settings, "TRANSLATION_BREAKER_THRESHOLD", 5),
+            reset_timeout=getattr(settings, "TRANSLATION_BREAKER_RESET", 60),
+        )
+        self.timeout = getattr(settings, "TRANSLATION_TIMEOUT", None)
+        self.executor = self._new_executor()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def _new_executor(self):
+        return ThreadPoolExecutor(
+            max_workers=getattr(settings, "TRANSLATION_MAX_CONCURRENCY", 4),
+            thread_name_prefix="translation-call",
+        )
+
+    def _replace_executor(self, stale):
+        # A running call cannot be interrupted and keeps its pool thread until the
+        # backend returns. Later calls go to a fresh pool so hung calls do not use up
+        # TRANSLATION_MAX_CONCURRENCY; the stale pool's threads exit once they return,
+        # and the breaker caps how many pools a run of timeouts can leave behind.
+        with self._lock:
+            if self.executor is stale:
+                self.executor = self._new_executor()
+
+    def _call_backend(self, texts, target_language, backend=None):
+        if not self.breaker.allow():
+            raise TranslationUnavailable("Translation circuit breaker is open")
+
+        executor = self.executor
+        future = executor.submit((backend or self.backend).translate, texts, target_language)
+        try:
+            translations = future.result(timeout=self.timeout)
+        except FuturesTimeoutError:
+            future.cancel()
+            self._replace_executor(executor)
+            self._count("timeouts")
+            self.breaker.record_failure()
+            raise TranslationUnavailable(f"Translation timed out after {self.timeout}s")
+        except Exception as e:
+            self._count("errors")
+            self.breaker.record_failure()
+            raise TranslationUnavailable(str(e)) from e
+        self.breaker.record_success()
+        return translations
+
+    def translate(self, text, target_language, raise_errors=False):
+        if not text:
+            return text
+
+        key = (source_hash(text), target_language)
+        cached = self.memory.get(key)
+        if cached is not None:
+            self._count("memory_hits")
+            return cached
+
+        from users_app.models import TranslationCache
+
+        stored = TranslationCache.objects.filter(
+            source_hash=key[0], target_language=target_language
+        ).values_list("translated_text", flat=True).first()
+        if stored is not None:
+            self._count("db_hits")
+            self.memory.set(key, stored)
+            return stored
+
+        self._count("misses")
+        try:
+            translated = self._call_backend([text], target_language)[0]
+        except TranslationUnavailable as e:
+            # Failures are not cached so the text is retried on the next call
+            logger.warning(f"Translation error: {e}")
+            if raise_errors:
+                raise
+            return text
+
+        try:
+            TranslationCache.objects.get_or_create(
+                source_hash=key[0],
+                target_language=target_language,
+                defaults={"source_text": text, "translated_text": translated},
+            )
+        except IntegrityError:
+            pass
+        self.memory.set(key, translated)
+        return translated
+
+    def translate_many(self, texts, target_language, backend=None, persist=True):
+        """
+        Translate a batch of distinct texts with a single backend call.
+
+        Returns a dict of source text -> translation. Texts the backend
+        failed on are left out so callers can retry them later.
+        """
+        from users_app.models import TranslationCache
+
+        results = {}
+        pending = {}
+        for text in set(texts):
+            if not text:
+                continue
+            key = (source_hash(text), target_language)
+            cached = self.memory.get(key)
+            if cached is not None:
+                results[text] = cached
+            else:
+                pending[key[0]] = text
+        self._count("memory_hits", len(results))
+
+        if pending:
+            stored = TranslationCache.objects.filter(
+                source_hash__in=list(pending), target_language=target_language
+            ).values_list("source_hash", "translated_text")
+            for hash_, translated in stored:
+                text = pending.pop(hash_)
+                results[text] = translated
+                self.memory.set((hash_, target_language), translated)
+                self._count("db_hits")
+
+        if not pending:
+            return results
+
+        self._count("misses", len(pending))
+        batch = list(pending.values())
+        try:
+            translations = self._call_backend(batch, target_language, backend=backend)
+        except TranslationUnavailable as e:
+            logger.warning(f"Batch translation error: {e}")
+            return results
+
+        new_rows = []
+        for text, translated in zip(batch, translations):
+            results[text] = translated
+            if persist:
+                hash_ = source_hash(text)
+                self.memory.set((hash_, target_language), translated)
+                new_rows.append(TranslationCache(
+                    source_hash=hash_, target_language=target_language,
+                    source_text=text, translated_text=translated,
+                ))
+        TranslationCache.objects.bulk_create(new_rows, ignore_conflicts=True)
+        return results
+
+    def stats(self):
+        return {
+            "backend": type(self.backend).__name__,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "memory_size": len(self.memory),
+            "circuit_breaker": self.breaker.stats(),
+        }
+
+    def clear(self):
+        self.memory.clear()
+
+
+translation_service = TranslationService()
+
+
+def translate_text(text, target_language):
+    return translation_service.translate(text, target_language)
+
+
+def translate_instance(model, pk):
+    """
+    Fill the missing *_uz/_ru/_en columns of one row and update its status.
+
+    Only the translated columns and translation_status are written, so
+    concurrent edits to other fields are not overwritten.
+    """
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+
+    values = {}
+    status = model.TRANSLATION_DONE
+    for field, language, text in instance.missing_translations():
+        try:
+            values[f"{field}_{language}"] = translation_service.translate(text, language, raise_errors=True)
+        except Exception:
+            status = model.TRANSLATION_FAILED
+    model.objects.filter(pk=pk).update(translation_status=status, **values)
+    if values:
+        translations_updated.send(sender=model, pks=[pk])
+
+
+class TranslationQueue:
+    """
+    Background worker translating rows queued by TranslatableModel.save().
+
+    The queue only holds (model label, pk) pairs; the durable record of what
+    still needs translating is the row's translation_status, which the
+    process_translations command drains after a restart.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, model, pk):
+        self.queue.put((model._meta.label, pk))
+        self._ensure_worker()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="translation-worker", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            label, pk = self.queue.get()
+            try:
+                translate_instance(apps.get_model(label), pk)
+            except Exception as e:
+                logger.error(f"Failed to translate {label} #{pk}: {e}")
+            finally:
+                close_old_connections()
+                self.queue.task_done()
+
+
+translation_queue = TranslationQueue()
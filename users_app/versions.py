@@ -0,0 +1,47 @@
+import hashlib
+import uuid
+
+from django.core.cache import caches
+from django.db import transaction
+
+# Versions are bumped from every process, so they live in a cache shared between
+# processes; see CACHES in settings
+VERSION_CACHE_ALIAS = 'versions'
+
+
+def version_cache():
+    return caches[VERSION_CACHE_ALIAS]
+
+
+def _user_version_key(user_id):
+    return f'user_data_version_{user_id}'
+
+
+def user_data_version(user_id):
+    """Current version of a user's completion and enrollment data, created on first use."""
+    versions = version_cache()
+    version = versions.get(_user_version_key(user_id))
+    if version is None:
+        version = uuid.uuid4().hex
+        if not versions.add(_user_version_key(user_id), version, None):
+            version = versions.get(_user_version_key(user_id), version)
+    return version
+
+
+def bump_user_data_version(*user_ids):
+    """
+    Give the users a new data version once the current transaction commits.
+
+    Bumping before the commit would let a concurrent reader tag the old rows
+    with the new version.
+    """
+    def bump():
+        version_cache().set_many({_user_version_key(user_id): uuid.uuid4().hex for user_id in user_ids}, None)
+
+    transaction.on_commit(bump)
+
+
+def make_etag(*parts):
+    """Strong ETag over the given version tokens and request parameters."""
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'"{digest}"'
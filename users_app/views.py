@@ -21,9 +21,10 @@ from .serializers import (
 from rest_framework.parsers import JSONParser, FormParser,MultiPartParser
 from users_app.models import User, Notification, Program, UserProgram, MealCompletion, Session,SessionCompletion
 from users_app.notifications import NotificationService
+from users_app.enrollment import enroll_user
 from .eskiz_api import EskizAPI
 from drf_yasg import openapi
-from django.db import OperationalError
+from django.db import OperationalError, transaction
 from django.db import connection
 
 import logging
@@ -204,53 +205,16 @@ class VerifyCodeView(APIView):
                         datetime.now() - datetime.fromtimestamp(cached_data['timestamp']) < timedelta(minutes=5):
 
                     # Activate user and delete the verification code
-                    user.is_active = True
-                    user.save()
+                    with transaction.atomic():
+                        user.is_active = True
+                        user.save()
+
+                        if user.goal:  # Link program based on goal
+                            program = Program.objects.filter(program_goal=user.goal).first()
+                            if program:
+                                enroll_user(user, program, start_date=datetime.now().date())
                     cache.delete(f'verification_code_{user.id}')
 
-                    if user.goal:  # Link program based on goal
-                        program = Program.objects.filter(program_goal=user.goal).first()
-                        if program:
-                            # Calculate total sessions
-                            total_sessions = program.sessions.count()
-
-                            # Create UserProgram
-                            start_date = datetime.now().date()
-                            end_date = start_date + timedelta(days=total_sessions)
-                            user_program = UserProgram.objects.create(
-                                user=user,
-                                program=program,
-                                start_date=start_date,
-                                end_date=end_date
-                            )
-
-                            # Assign sessions and meals with predefined dates
-                            sessions = Session.objects.filter(program=program).order_by('session_number')
-                            for index, session in enumerate(sessions, start=1):
-                                # Calculate session date based on session number
-                                session_date = start_date + timedelta(days=index - 1)
-
-                                # Create MealCompletion
-                                meals = session.meals.all()
-                                for meal in meals:
-                                    MealCompletion.objects.create(
-                                        user=user,
-                                        meal=meal,
-                                        session=session,
-                                        is_completed=False,
-                                        meal_date=session_date,  # Assign session_date
-                                        completion_date=None,  # Completion date is set upon completion
-                                    )
-
-                                # Create SessionCompletion
-                                SessionCompletion.objects.create(
-                                    user=user,
-                                    session=session,
-                                    is_completed=False,
-                                    session_number_private=session.session_number,
-                                    session_date=session_date  # Assign session_date
-                                )
-
                     return Response({"message": _("Verification successful")}, status=status.HTTP_200_OK)
 
                 return Response({"error": _("Verification code expired or invalid")}, status=status.HTTP_400_BAD_REQUEST)